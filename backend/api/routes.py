@@ -5,199 +5,432 @@ This file contains the API routes that would be implemented in a production envi
 In the current demo implementation, this serves as a reference for the API structure.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import create_access_token, current_user, ensure_course_owner, oauth2_scheme
+from database import get_async_db
+from http_cache import conditional, weak_etag
+from models import Section, User
+from schemas import (
+    CertificateDetail, CourseDetail, CoursePage, CourseSummary, EnrollmentDetail, EnrollmentProgress, LectureDetail,
+    LiveSessionSummary, NotificationPage, ReviewDetail, SectionDetail, UserDetail, UserPublic,
+)
+from services import aggregates, catalog, certificates, course_transfer, courses, curriculum, enrollments, grading, jobs, live_sessions, notifications, progress, uploads, users
+from services.progress_buffer import buffer as progress_buffer
+from services import search as course_search
 
 # API Router
 router = APIRouter()
 
-# Authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
 # User Authentication Routes
 @router.post("/auth/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate a user and return an access token
     """
-    # In a real implementation, this would verify credentials against a database
-    # and generate a JWT token
-    pass
+    user = await users.authenticate(db, form_data.username, form_data.password)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return {"access_token": create_access_token(user.id), "token_type": "bearer"}
 
-@router.post("/auth/register")
-async def register(user_data: dict):
+@router.post("/auth/register", status_code=status.HTTP_201_CREATED)
+async def register(user_data: dict, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user
     """
-    # In a real implementation, this would validate the data,
-    # check for existing users, and create a new user in the database
-    pass
+    user = await users.register(db, user_data)
+    return {"user": UserDetail.model_validate(user), "access_token": create_access_token(user.id), "token_type": "bearer"}
 
-@router.get("/auth/me")
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+@router.get("/auth/me", response_model=UserDetail)
+async def get_current_user(user: User = Depends(current_user)):
     """
     Get the current authenticated user
     """
-    # In a real implementation, this would decode the JWT token
-    # and return the user data
-    pass
+    return user
 
 # User Routes
-@router.get("/users/{user_id}")
-async def get_user(user_id: str, token: str = Depends(oauth2_scheme)):
+# UserDetail first: a public profile has no email, fails it and falls
+# through to UserPublic
+@router.get("/users/{user_id}", response_model=Union[UserDetail, UserPublic])
+async def get_user(user_id: str, user: User = Depends(current_user), db: AsyncSession = Depends(get_async_db)):
     """
     Get user details by ID
     """
-    # In a real implementation, this would retrieve the user from the database
-    pass
-
-@router.patch("/users/{user_id}")
-async def update_user(user_id: str, user_data: dict, token: str = Depends(oauth2_scheme)):
+    found = await users.get_user(db, user_id)
+    if found.id == user.id or user.role == "admin":
+        return UserDetail.model_validate(found)
+    return UserPublic.model_validate(found)
+
+@router.patch("/users/{user_id}", response_model=UserDetail)
+async def update_user(
+    user_id: str,
+    user_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Update user details
     """
-    # In a real implementation, this would update the user in the database
-    pass
+    return await users.update_user(db, user_id, user_data, user)
 
-@router.get("/users/{user_id}/enrollments")
-async def get_user_enrollments(user_id: str, token: str = Depends(oauth2_scheme)):
+@router.get("/users/{user_id}/enrollments", response_model=List[EnrollmentDetail])
+async def get_user_enrollments(
+    user_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get all courses a user is enrolled in
     """
-    # In a real implementation, this would retrieve the user's enrollments from the database
-    pass
+    return await users.list_enrollments(db, user_id, user)
 
 # Course Routes
-@router.get("/courses")
+@router.get("/courses", response_model=CoursePage)
 async def get_courses(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     level: Optional[str] = None,
     search: Optional[str] = None,
-    page: int = 1,
-    limit: int = 10,
+    sort: str = Query(catalog.DEFAULT_SORT, pattern="^(rating|newest)$"),
+    cursor: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get all courses with optional filtering
+
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page;
+    `page` is kept for older clients and is slower on deep pages. With
+    `search`, results are ranked by relevance and `sort` is ignored.
+    """
+    try:
+        items, next_cursor = await catalog.list_courses(
+            db, category=category, level=level, search=search, sort=sort, cursor=cursor, page=page, limit=limit
+        )
+    except catalog.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    # ETag only: a page can change by gaining an older course, so its newest
+    # updated_at is not a safe Last-Modified. Counters are rendered on the
+    # cards, so they go in too
+    etag = weak_etag(next_cursor, *(
+        (course.id, course.updated_at, *(getattr(course, name) for name in aggregates.COUNTERS)) for course in items
+    ))
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "page": None if cursor else page,
+        "limit": limit,
+    }
+
+@router.get("/courses/suggest")
+async def suggest_courses(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    # In a real implementation, this would query the database with filters
-    pass
+    Typeahead suggestions for the course search box
+    """
+    return await course_search.suggest(db, q, limit=limit)
 
-@router.get("/courses/{course_id}")
-async def get_course(course_id: str):
+@router.get("/courses/export")
+async def export_courses(
+    course_id: Optional[List[str]] = Query(None),
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Export courses with their sections, lectures and quizzes as NDJSON
+
+    Pass `course_id` (repeatable) to pick courses; by default every course
+    the instructor owns. The output can be sent back to /courses/import.
+    """
+    if user.role not in ("teacher", "admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only instructors can export courses")
+    courses = await course_transfer.exportable_courses(db, user, course_id)
+    return StreamingResponse(course_transfer.stream_export(courses), media_type="application/x-ndjson")
+
+@router.post("/courses/import")
+async def import_courses(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Import courses from an NDJSON request body (see services/course_transfer.py)
+
+    Records are committed in batches. On a bad record the response is 422
+    with the number of lines already committed; resend the body with that
+    number as `skip` to carry on.
+    """
+    if user.role not in ("teacher", "admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only instructors can import courses")
+    return await course_transfer.import_lines(db, user, course_transfer.ndjson_lines(request.stream()), skip=skip)
+
+@router.get("/courses/{course_id}", response_model=CourseDetail)
+async def get_course(
+    course_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get course details by ID
     """
-    # In a real implementation, this would retrieve the course from the database
-    pass
+    return await _course_page(request, response, db, course_id=course_id)
 
-@router.get("/courses/slug/{slug}")
-async def get_course_by_slug(slug: str):
+@router.get("/courses/slug/{slug}", response_model=CourseDetail)
+async def get_course_by_slug(
+    slug: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get course details by slug
     """
-    # In a real implementation, this would retrieve the course from the database by slug
-    pass
+    return await _course_page(request, response, db, slug=slug)
 
-@router.post("/courses")
-async def create_course(course_data: dict, token: str = Depends(oauth2_scheme)):
+async def _course_validators(request, response, db, course_id=None, slug=None):
+    """
+    Resolve a course and set its caching headers. Returns (course id, 304
+    response or None).
+    """
+    validators = await curriculum.get_course_validators(db, course_id=course_id, slug=slug)
+    if validators is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    found_id, etag, last_modified = validators
+    return found_id, conditional(request, response, etag, last_modified)
+
+async def _course_page(request, response, db, course_id=None, slug=None):
+    found_id, not_modified = await _course_validators(request, response, db, course_id, slug)
+    if not_modified:
+        return not_modified
+    return await curriculum.get_course_detail(db, course_id=found_id)
+
+@router.post("/courses", response_model=CourseSummary)
+async def create_course(
+    course_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Create a new course
     """
-    # In a real implementation, this would create a new course in the database
-    pass
+    if user.role not in ("teacher", "admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only instructors can create courses")
+    return await courses.create_course(db, user, course_data)
 
-@router.patch("/courses/{course_id}")
-async def update_course(course_id: str, course_data: dict, token: str = Depends(oauth2_scheme)):
+@router.patch("/courses/{course_id}", response_model=CourseSummary)
+async def update_course(
+    course_id: str,
+    course_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Update course details
     """
-    # In a real implementation, this would update the course in the database
-    pass
+    course = await courses.get_course_or_404(db, course_id)
+    ensure_course_owner(course, user)
+    return await courses.update_course(db, course, course_data)
 
 @router.delete("/courses/{course_id}")
-async def delete_course(course_id: str, token: str = Depends(oauth2_scheme)):
+async def delete_course(
+    course_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Delete a course
+    Delete a course (archived, so existing enrollments keep working)
     """
-    # In a real implementation, this would delete the course from the database
-    pass
+    course = await courses.get_course_or_404(db, course_id)
+    ensure_course_owner(course, user)
+    await courses.archive_course(db, course)
+    return {"id": course.id, "status": course.status}
 
-@router.get("/courses/{course_id}/reviews")
-async def get_course_reviews(course_id: str):
+@router.get("/courses/{course_id}/reviews", response_model=List[ReviewDetail])
+async def get_course_reviews(
+    course_id: str,
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get all reviews for a course
     """
-    # In a real implementation, this would retrieve the course reviews from the database
-    pass
-
-@router.post("/courses/{course_id}/reviews")
-async def add_course_review(course_id: str, review_data: dict, token: str = Depends(oauth2_scheme)):
+    rows = await enrollments.list_reviews(db, course_id, page=page, limit=limit)
+    return [
+        ReviewDetail.model_validate(review).model_copy(update={"user_name": name, "user_avatar": avatar})
+        for review, name, avatar in rows
+    ]
+
+@router.post("/courses/{course_id}/reviews", response_model=ReviewDetail)
+async def add_course_review(
+    course_id: str,
+    review_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Add a review to a course
     """
-    # In a real implementation, this would add a review to the database
-    pass
+    course = await courses.get_course_or_404(db, course_id)
+    review = await enrollments.add_review(db, user, course, review_data)
+    return ReviewDetail.model_validate(review).model_copy(update={"user_name": user.name, "user_avatar": user.avatar})
 
 # Section and Lecture Routes
-@router.get("/courses/{course_id}/sections")
-async def get_course_sections(course_id: str):
+@router.get("/courses/{course_id}/sections", response_model=List[SectionDetail])
+async def get_course_sections(
+    course_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get all sections for a course
     """
-    # In a real implementation, this would retrieve the course sections from the database
-    pass
+    found_id, not_modified = await _course_validators(request, response, db, course_id=course_id)
+    if not_modified:
+        return not_modified
+    return await curriculum.load_sections(db, found_id)
 
 @router.post("/sections")
-async def create_section(section_data: dict, token: str = Depends(oauth2_scheme)):
+async def create_section(
+    section_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Create a new section
     """
-    # In a real implementation, this would create a new section in the database
-    pass
+    course = await courses.get_course_or_404(db, section_data.get("course_id"))
+    ensure_course_owner(course, user)
+    section = await courses.create_section(db, course, section_data)
+    return {"id": section.id, "course_id": section.course_id, "title": section.title, "order": section.order}
 
-@router.get("/sections/{section_id}/lectures")
-async def get_section_lectures(section_id: str):
+@router.get("/sections/{section_id}/lectures", response_model=List[LectureDetail])
+async def get_section_lectures(section_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get all lectures for a section
     """
-    # In a real implementation, this would retrieve the section lectures from the database
-    pass
+    return await curriculum.load_lectures(db, section_id)
 
 @router.post("/lectures")
-async def create_lecture(lecture_data: dict, token: str = Depends(oauth2_scheme)):
+async def create_lecture(
+    lecture_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Create a new lecture
     """
-    # In a real implementation, this would create a new lecture in the database
-    pass
+    section = await db.get(Section, lecture_data.get("section_id"))
+    if section is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Section not found")
+    course = await courses.get_course_or_404(db, section.course_id)
+    ensure_course_owner(course, user)
+    lecture = await courses.create_lecture(db, course, section, lecture_data)
+    return {"id": lecture.id, "section_id": lecture.section_id, "title": lecture.title, "order": lecture.order}
 
 # Enrollment Routes
-@router.post("/enrollments")
-async def enroll_in_course(enrollment_data: dict, token: str = Depends(oauth2_scheme)):
+@router.post("/enrollments", response_model=EnrollmentDetail)
+async def enroll_in_course(
+    enrollment_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Enroll a user in a course
+
+    Admins may enroll another user by passing `user_id`.
     """
-    # In a real implementation, this would create a new enrollment in the database
-    pass
+    user_id = enrollment_data.get("user_id") or user.id
+    if user_id != user.id and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot enroll another user")
+    course = await courses.get_course_or_404(db, enrollment_data.get("course_id"))
+    return await enrollments.enroll(db, user_id, course)
 
-@router.get("/enrollments/{enrollment_id}/progress")
-async def get_enrollment_progress(enrollment_id: str, token: str = Depends(oauth2_scheme)):
+@router.get("/enrollments/{enrollment_id}/progress", response_model=EnrollmentProgress)
+async def get_enrollment_progress(
+    enrollment_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get the progress of an enrollment
     """
-    # In a real implementation, this would retrieve the enrollment progress from the database
-    pass
+    enrollment = await enrollments.get_owned_enrollment(db, enrollment_id, user)
+    completed = await progress.completed_lecture_ids(db, enrollment.id)
+    return EnrollmentProgress.model_validate(enrollment).model_copy(update={"completed_lecture_ids": completed})
 
 @router.patch("/enrollments/{enrollment_id}/progress")
-async def update_enrollment_progress(enrollment_id: str, progress_data: dict, token: str = Depends(oauth2_scheme)):
+async def update_enrollment_progress(
+    enrollment_id: str,
+    progress_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Update the progress of an enrollment
+
+    Accepts a batch, {"lectures": [{"lecture_id": ..., "completed": true}, ...]},
+    or a single {"lecture_id": ..., "completed": true}.
+    """
+    updates = progress.parse_updates(progress_data)
+    enrollment = await enrollments.get_owned_enrollment(db, enrollment_id, user)
+    accepted, state = await progress.apply_progress(db, enrollment.id, enrollment.course_id, updates)
+    return {
+        "id": enrollment.id,
+        "accepted_lecture_ids": sorted(accepted),
+        "completed_lectures": state.completed_lectures,
+        "progress": state.progress,
+        "status": state.status,
+    }
+
+@router.post("/enrollments/{enrollment_id}/heartbeat", status_code=status.HTTP_202_ACCEPTED)
+async def progress_heartbeat(
+    enrollment_id: str,
+    heartbeat: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    # In a real implementation, this would update the enrollment progress in the database
-    pass
+    Record a player heartbeat, {"lecture_id": ..., "completed": false}
+
+    Completions are buffered and written within a few seconds; they are not
+    durable when this returns (see services/progress_buffer.py).
+    """
+    lecture_id = heartbeat.get("lecture_id")
+    if not isinstance(lecture_id, str):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="lecture_id is required")
+    enrollment = await enrollments.get_owned_enrollment(db, enrollment_id, user)
+    if not heartbeat.get("completed", False):
+        return {"id": enrollment.id, "lecture_id": lecture_id, "buffered": False}
+    if not progress_buffer.add(enrollment.id, enrollment.course_id, lecture_id):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress buffer is full, retry shortly",
+            headers={"Retry-After": str(max(1, int(progress_buffer.flush_interval)))},
+        )
+    return {"id": enrollment.id, "lecture_id": lecture_id, "buffered": True}
 
 # Quiz Routes
 @router.get("/quizzes/{quiz_id}")
@@ -209,12 +442,20 @@ async def get_quiz(quiz_id: str, token: str = Depends(oauth2_scheme)):
     pass
 
 @router.post("/quizzes/{quiz_id}/submit")
-async def submit_quiz(quiz_id: str, answers: List[dict], token: str = Depends(oauth2_scheme)):
+async def submit_quiz(
+    quiz_id: str,
+    answers: List[dict],
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Submit answers for a quiz
+
+    Each answer is {"question_id": ..., "selected_option_id": ...}, or
+    {"question_id": ..., "selected_option_ids": [...]} for questions with
+    several correct options.
     """
-    # In a real implementation, this would grade the quiz and store the results
-    pass
+    return await grading.submit(db, user, quiz_id, answers)
 
 # Assignment Routes
 @router.get("/assignments/{assignment_id}")
@@ -230,38 +471,158 @@ async def submit_assignment(
     assignment_id: str,
     content: str = Form(...),
     file: Optional[UploadFile] = File(None),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Submit an assignment
     """
-    # In a real implementation, this would store the assignment submission
-    pass
+    return await uploads.submit_assignment(db, user, assignment_id, content, file)
 
 # Live Session Routes
-@router.get("/courses/{course_id}/live-sessions")
-async def get_course_live_sessions(course_id: str, token: str = Depends(oauth2_scheme)):
+@router.get("/courses/{course_id}/live-sessions", response_model=List[LiveSessionSummary])
+async def get_course_live_sessions(
+    course_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get all live sessions for a course
     """
-    # In a real implementation, this would retrieve the course live sessions from the database
-    pass
+    course = await courses.get_course_or_404(db, course_id)
+    if course.instructor_id != user.id and user.role != "admin":
+        if await enrollments.get_enrollment(db, user.id, course.id) is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enrolled in this course")
+    return [
+        LiveSessionSummary.model_validate(session).model_copy(update={"course_title": course.title})
+        for session in await live_sessions.list_for_course(db, course.id)
+    ]
+
+@router.post("/courses/{course_id}/live-sessions", status_code=status.HTTP_201_CREATED, response_model=LiveSessionSummary)
+async def create_live_session(
+    course_id: str,
+    session_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Schedule a live session for a course
+    """
+    course = await courses.get_course_or_404(db, course_id)
+    ensure_course_owner(course, user)
+    session = await live_sessions.create_session(db, course, user, session_data)
+    return LiveSessionSummary.model_validate(session).model_copy(update={"course_title": course.title})
 
-@router.get("/live-sessions/upcoming")
-async def get_upcoming_live_sessions(token: str = Depends(oauth2_scheme)):
+@router.patch("/live-sessions/{session_id}", response_model=LiveSessionSummary)
+async def update_live_session(
+    session_id: str,
+    session_data: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Get all upcoming live sessions for the authenticated user
+    Reschedule, edit or cancel a live session
     """
-    # In a real implementation, this would retrieve the upcoming live sessions from the database
-    pass
+    session = await live_sessions.get_session_or_404(db, session_id)
+    course = await courses.get_course_or_404(db, session.course_id)
+    ensure_course_owner(course, user)
+    session = await live_sessions.update_session(db, session, session_data)
+    return LiveSessionSummary.model_validate(session).model_copy(update={"course_title": course.title})
+
+@router.get("/live-sessions/upcoming", response_model=List[LiveSessionSummary])
+async def get_upcoming_live_sessions(
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the next upcoming live sessions across the authenticated user's courses
+    """
+    return await live_sessions.upcoming_for_user(db, user.id, limit)
 
 @router.post("/live-sessions/{session_id}/join")
-async def join_live_session(session_id: str, token: str = Depends(oauth2_scheme)):
+async def join_live_session(
+    session_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Join a live session
+
+    Takes one of the session's `max_participants` seats (409 when none are
+    left); joining again is always allowed.
     """
-    # In a real implementation, this would generate a meeting URL and return it
-    pass
+    return {"id": session_id, "meeting_url": await live_sessions.join(db, session_id, user)}
+
+# Notification Routes
+@router.get("/notifications", response_model=NotificationPage)
+async def get_notifications(
+    unread: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the authenticated user's notifications, newest first
+
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        items, next_cursor = await notifications.list_inbox(db, user.id, unread=unread, cursor=cursor, limit=limit)
+    except notifications.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "unread_count": await notifications.unread_count(db, user.id),
+    }
+
+@router.get("/notifications/unread-count")
+async def get_unread_notification_count(user: User = Depends(current_user), db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the number of unread notifications
+    """
+    return {"unread_count": await notifications.unread_count(db, user.id)}
+
+@router.post("/notifications/read")
+async def mark_all_notifications_read(user: User = Depends(current_user), db: AsyncSession = Depends(get_async_db)):
+    """
+    Mark all notifications read
+    """
+    return {"updated": await notifications.mark_read(db, user.id)}
+
+@router.post("/notifications/{notification_id}/read")
+async def mark_notification_read(
+    notification_id: str,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Mark a notification read
+    """
+    return {"updated": await notifications.mark_read(db, user.id, notification_id)}
+
+@router.post("/courses/{course_id}/announcements", status_code=status.HTTP_202_ACCEPTED)
+async def announce_to_course(
+    course_id: str,
+    announcement: dict,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Notify every student enrolled in a course
+
+    Delivered in the background; see services/notifications.py.
+    """
+    course = await courses.get_course_or_404(db, course_id)
+    ensure_course_owner(course, user)
+    title, message = announcement.get("title"), announcement.get("message")
+    if not title or not message:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="title and message are required")
+    key = await notifications.announce(db, course.id, title, message, "course_update", link=announcement.get("link"))
+    await db.commit()
+    return {"course_id": course.id, "status": "queued", "key": key}
 
 # Payment Routes
 @router.post("/payments/create-intent")
@@ -307,33 +668,92 @@ async def respond_to_support_ticket(ticket_id: str, response_data: dict, token:
 
 # Certificate Routes
 @router.get("/certificates/{course_id}")
-async def get_certificate(course_id: str, token: str = Depends(oauth2_scheme)):
+async def get_certificate(
+    course_id: str,
+    response: Response,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get a certificate for a completed course
+
+    Certificates are generated in the background once a course is completed;
+    until then this answers 202 with the job status, and clients poll again
+    after Retry-After seconds.
     """
-    # In a real implementation, this would retrieve or generate a certificate
-    pass
+    certificate, job = await certificates.get_or_queue(db, user, course_id)
+    if certificate is not None:
+        return CertificateDetail.model_validate(certificate)
+    response.status_code = status.HTTP_202_ACCEPTED
+    response.headers["Retry-After"] = str(max(1, int(jobs.JOB_POLL_INTERVAL)))
+    return {"course_id": course_id, "status": job.status, "attempts": job.attempts}
 
 @router.get("/certificates/verify/{verification_code}")
-async def verify_certificate(verification_code: str):
+async def verify_certificate(verification_code: str, db: AsyncSession = Depends(get_async_db)):
     """
     Verify a certificate
+
+    Public. Codes with a bad signature are rejected without a database
+    lookup; see services/certificates.py.
     """
-    # In a real implementation, this would verify a certificate's authenticity
-    pass
+    return await certificates.verify(db, verification_code)
 
 # Media Routes
 @router.post("/media/upload")
 async def upload_media(
     file: UploadFile = File(...),
     type: str = Form(...),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(current_user),
 ):
     """
     Upload media files (images, videos, etc.)
+
+    Use the resumable /media/uploads routes for large videos.
     """
-    # In a real implementation, this would upload the file to a storage service
-    pass
+    return await uploads.upload_media(user, type, file)
+
+@router.post("/media/uploads", status_code=status.HTTP_201_CREATED)
+async def start_media_upload(upload_data: dict, user: User = Depends(current_user)):
+    """
+    Start a resumable upload, {"type": "video", "filename": "intro.mp4"}
+    """
+    return await uploads.start_upload(user, upload_data.get("type"), upload_data.get("filename"))
+
+@router.put("/media/uploads/{upload_id}/parts/{part_number}")
+async def upload_media_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    user: User = Depends(current_user),
+):
+    """
+    Upload one part as the raw request body
+
+    Send X-Content-SHA256 to have the part verified. Parts may be sent in any
+    order and re-sent after a failure.
+    """
+    return await uploads.upload_part(user, upload_id, part_number, request, request.headers.get("x-content-sha256"))
+
+@router.get("/media/uploads/{upload_id}")
+async def get_media_upload(upload_id: str, user: User = Depends(current_user)):
+    """
+    List the parts received so far, to resume an interrupted upload
+    """
+    return await uploads.list_parts(user, upload_id)
+
+@router.post("/media/uploads/{upload_id}/complete")
+async def complete_media_upload(upload_id: str, user: User = Depends(current_user)):
+    """
+    Assemble the uploaded parts into the final file
+    """
+    return await uploads.complete_upload(user, upload_id)
+
+@router.delete("/media/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_media_upload(upload_id: str, user: User = Depends(current_user)):
+    """
+    Abort a resumable upload and discard its parts
+    """
+    await uploads.abort_upload(user, upload_id)
 
 # BunnyCDN Integration Routes
 @router.post("/bunny/create-video")
@@ -0,0 +1,140 @@
+"""
+Authentication helpers for the Vaikuntha Institute Learning Platform
+
+Almost every route authenticates, so `current_user` avoids repeating work:
+
+- a decoded token is cached per process by the SHA-256 of the token, for at
+  most AUTH_TOKEN_CACHE_TTL seconds and never past the token's `exp`
+- the user principal (the User columns routes read, without the password
+  hash) is cached in the shared cache under `user_tag`. `invalidate_user`
+  drops it when a profile, role or is_active changes; see services/users.py.
+  With the memory cache backend other workers notice within
+  AUTH_USER_CACHE_TTL seconds.
+
+Passwords are hashed and checked in a separate process pool; see passwords.py.
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from cache import MemoryCache, cache, user_tag
+from database import get_async_db
+from models import User
+
+SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(60 * 24)))
+
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))  # seconds
+USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))  # seconds
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+
+# Decoded tokens, by SHA-256 of the token
+token_cache = MemoryCache(max_entries=TOKEN_CACHE_SIZE, default_ttl=TOKEN_CACHE_TTL)
+
+# User columns kept in the principal cache
+PRINCIPAL_FIELDS = ("id", "name", "email", "role", "avatar", "bio", "is_active")
+
+CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+# Tokens
+def create_access_token(user_id, expires_minutes=ACCESS_TOKEN_EXPIRE_MINUTES):
+    expires = datetime.utcnow() + timedelta(minutes=expires_minutes)
+    return jwt.encode({"sub": user_id, "exp": expires}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _decode(token):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise CREDENTIALS_EXCEPTION
+    user_id = payload.get("sub")
+    if not user_id:
+        raise CREDENTIALS_EXCEPTION
+    return user_id, payload.get("exp")
+
+
+def decode_token(token):
+    """
+    Return the user id stored in a JWT's `sub` claim
+    """
+    return _decode(token)[0]
+
+
+async def token_subject(token):
+    """
+    `decode_token` through the token cache
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = await token_cache.get(key)
+    if user_id is None:
+        user_id, expires = _decode(token)
+        ttl = TOKEN_CACHE_TTL if expires is None else min(TOKEN_CACHE_TTL, int(expires - time.time()))
+        if ttl > 0:
+            await token_cache.set(key, user_id, ttl=ttl)
+    return user_id
+
+
+# User principal
+def principal_key(user_id):
+    return f"user:principal:{user_id}"
+
+
+def _principal(data):
+    # Detached rather than transient: attaching it to a session never INSERTs
+    # it, and reading the columns left out raises instead of returning None
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_principal(db, user_id):
+    """
+    The User for `user_id`: from the cache as a detached instance, or loaded
+    into `db` and cached
+    """
+    tags = (user_tag(user_id),)
+    data = await cache.get(principal_key(user_id))
+    if data is not None:
+        return _principal(data)
+    versions = await cache.versions(tags)
+    user = await db.get(User, user_id)
+    if user is not None:
+        data = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        await cache.set(principal_key(user_id), data, ttl=USER_CACHE_TTL, tags=tags, versions=versions)
+    return user
+
+
+async def invalidate_user(user_id):
+    await cache.invalidate_tags(user_tag(user_id))
+
+
+# Dependency to get the authenticated user
+async def current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    user = await load_principal(db, await token_subject(token))
+    if user is None or not user.is_active:
+        raise CREDENTIALS_EXCEPTION
+    return user
+
+
+def ensure_course_owner(course, user):
+    """
+    Only the course's instructor or an admin may change it
+    """
+    if course.instructor_id != user.id and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to modify this course")
@@ -0,0 +1,95 @@
+"""
+Catalog listing with denormalized counters vs live COUNT(*)/AVG() aggregation
+
+Also measures a full reconciliation pass and checks it repairs injected drift.
+
+Usage (from the backend directory):
+    python -m benchmarks.aggregates --courses 5000 --users 20000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal, engine
+from models import Course
+from services import aggregates, catalog
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum, seed_enrollments, seed_users
+
+
+def live_query(limit):
+    actual = aggregates._actual_counts()
+    return (
+        catalog.catalog_query()
+        .with_only_columns(Course.id, Course.title, actual["enrollments_count"], actual["lectures_count"], actual["rating"])
+        .limit(limit)
+    )
+
+
+def stored_query(limit):
+    return (
+        catalog.catalog_query()
+        .with_only_columns(Course.id, Course.title, Course.enrollments_count, Course.lectures_count, Course.rating)
+        .limit(limit)
+    )
+
+
+async def timed(query, repeat):
+    best = float("inf")
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            (await db.execute(query)).all()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(args):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        repaired = await aggregates.reconcile(db)
+        print(f"initial reconcile: {repaired} courses in {time.perf_counter() - start:.2f}s")
+
+    for limit in (10, 100):
+        live = await timed(live_query(limit), args.repeat)
+        stored = await timed(stored_query(limit), args.repeat)
+        print(f"page of {limit:3}: live aggregation {live:8.2f} ms   stored counters {stored:8.2f} ms")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Course).where(Course.slug.in_(["course-1", "course-2"])).values(enrollments_count=-1))
+        await db.commit()
+        start = time.perf_counter()
+        repaired = await aggregates.reconcile(db)
+        print(f"drift repair: {repaired} courses in {time.perf_counter() - start:.2f}s")
+    assert repaired == 2, "reconcile should repair exactly the drifted courses"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--per-user", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, args.courses)
+    with engine.begin() as conn:
+        course_ids = conn.execute(select(Course.id).order_by(Course.slug)).scalars().all()
+        for course_id in course_ids[:200]:
+            seed_curriculum(conn, course_id, 5, 8)
+        user_ids = seed_users(conn, args.users)
+        seed_enrollments(conn, user_ids, course_ids, args.per_user)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Load benchmark comparing the sync and async session dependencies
+
+Each request runs one query that takes DB_LATENCY_MS inside the database,
+standing in for a round-trip to a remote Postgres server. The sync path
+blocks the event loop for the whole query; the async path lets other
+requests proceed while it waits.
+
+Keep --concurrency below the sync pool's capacity (15 connections on
+SQLite). Past that, the blocked event loop cannot hand connections back and
+the sync path stalls until pool_timeout.
+
+Usage (from the backend directory):
+    python -m benchmarks.async_engine --requests 400 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+
+from database import async_engine, engine, get_async_db, get_db
+
+DB_LATENCY_MS = 5
+
+
+def _register_sleep(dbapi_connection, connection_record):
+    # Simulated server-side latency, callable from SQL as pg_sleep(seconds)
+    dbapi_connection.create_function("pg_sleep", 1, time.sleep)
+
+
+event.listen(engine, "connect", _register_sleep)
+event.listen(async_engine.sync_engine, "connect", _register_sleep)
+
+QUERY = text("SELECT pg_sleep(:seconds)").bindparams(seconds=DB_LATENCY_MS / 1000)
+
+app = FastAPI()
+
+
+@app.get("/sync")
+async def sync_route(db=Depends(get_db)):
+    db.execute(QUERY)
+    return {"ok": True}
+
+
+@app.get("/async")
+async def async_route(db=Depends(get_async_db)):
+    await db.execute(QUERY)
+    return {"ok": True}
+
+
+async def run(path, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    for path in ("/sync", "/async"):
+        rps = asyncio.run(run(path, args.requests, args.concurrency))
+        print(f"{path:8} {rps:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
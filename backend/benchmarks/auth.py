@@ -0,0 +1,143 @@
+"""
+Authentication overhead: decoding and loading per request vs cached
+
+Sends `--requests` authenticated requests to GET /auth/me from `--users`
+users, first with the previous `current_user` (decode the JWT and load the
+User row every time), then with the token and principal caches. Reports
+requests per second, the authentication cost per request measured on the
+dependency alone, and database statements per request.
+
+Also runs `--logins` concurrent logins with bcrypt on the event loop and in
+the password hashing pool, and reports the worst event-loop stall seen meanwhile.
+
+Usage (from the backend directory):
+    python -m benchmarks.auth --users 100 --requests 5000 --logins 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import auth
+import passwords
+from database import AsyncSessionLocal, async_engine, count_queries, engine, get_async_db
+from ids import new_id
+from main import app
+from models import User
+from services import users
+
+from benchmarks.certificates import LoopLag
+from benchmarks.seed import create_schema
+
+PASSWORD = "correct horse battery"
+
+
+async def uncached_user(token: str = Depends(auth.oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    # Before: decode and load on every request
+    user = await db.get(User, auth.decode_token(token))
+    if user is None or not user.is_active:
+        raise auth.CREDENTIALS_EXCEPTION
+    return user
+
+
+def seed_accounts(conn, count):
+    hashed = passwords.pwd_context.hash(PASSWORD)
+    rows = [{"id": new_id(), "name": f"User {i}", "email": f"user{i}@example.com",
+             "hashed_password": hashed} for i in range(count)]
+    conn.execute(insert(User), rows)
+    return [row["id"] for row in rows]
+
+
+async def reset_caches():
+    await auth.cache.clear()
+    await auth.token_cache.clear()
+
+
+async def dependency_cost(dependency, tokens):
+    with count_queries(async_engine.sync_engine) as statements:
+        start = time.perf_counter()
+        for token in tokens:
+            async with AsyncSessionLocal() as db:
+                await dependency(token, db)
+        elapsed = time.perf_counter() - start
+    return elapsed / len(tokens) * 1e6, len(statements) / len(tokens)
+
+
+async def over_http(client, tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        response = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+    return len(tokens) / (time.perf_counter() - start)
+
+
+async def inline_login(db, email, password):
+    # Before: bcrypt on the event loop
+    user = await users.get_by_email(db, email)
+    return user if user and passwords.pwd_context.verify(password, user.hashed_password) else None
+
+
+async def login_burst(authenticate, count):
+    lag = LoopLag()
+    ticker = asyncio.create_task(lag.run())
+
+    async def one(i):
+        async with AsyncSessionLocal() as db:
+            assert await authenticate(db, f"user{i}@example.com", PASSWORD) is not None
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(count)))
+    finally:
+        ticker.cancel()
+    return count / (time.perf_counter() - start), lag.worst
+
+
+async def run(args, user_ids):
+    rng = random.Random(42)
+    tokens = [auth.create_access_token(rng.choice(user_ids)) for _ in range(args.requests)]
+    print(f"{'':26} {'requests/s':>11} {'auth us/request':>16} {'statements/request':>19}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for label, dependency in (("decode + load each time", uncached_user), ("cached", auth.current_user)):
+            await reset_caches()
+            cost, statements = await dependency_cost(dependency, tokens)
+            app.dependency_overrides = {} if dependency is auth.current_user else {auth.current_user: uncached_user}
+            await reset_caches()
+            rate = await over_http(client, tokens)
+            print(f"{label:26} {rate:11.0f} {cost:16.0f} {statements:19.2f}")
+        app.dependency_overrides = {}
+
+    print(f"{'':26} {'logins/s':>11} {'worst loop stall':>16}")
+    for label, authenticate in (("bcrypt on event loop", inline_login), ("bcrypt in process pool", users.authenticate)):
+        rate, stall = await login_burst(authenticate, args.logins)
+        print(f"{label:26} {rate:11.1f} {stall * 1000:13.0f} ms")
+    await passwords.hasher.close()
+    print(f"{len(user_ids)} users, {args.requests} requests, {args.logins} logins, {os.cpu_count()} CPU(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    with engine.begin() as conn:
+        user_ids = seed_accounts(conn, args.users)
+    asyncio.run(run(args, user_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Course page cache benchmark: uncached vs read-through for GET /courses/{id}
+
+Runs the request mix against both cache backends; the Redis backend talks to
+an in-process fake so no server is needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.cache --requests 2000 --courses 50
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import os
+import random
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import select
+
+import cache as cache_module
+from database import AsyncSessionLocal, engine
+from models import Course
+from services import curriculum
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum
+
+
+class FakeRedis:
+    """
+    The subset of redis.asyncio.Redis used by RedisCache, kept in memory
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(m.encode() for m in members)
+
+    async def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match="*"):
+        for key in [k for k in self.data if fnmatch.fnmatch(k, match)]:
+            yield key
+
+    def register_script(self, script):
+        # Only RedisCache.SET_SCRIPT is used; run its steps in Python
+        async def set_script(keys, args):
+            count = (len(keys) - 1) // 2
+            value, ttl, name, check, *versions = args
+            if check and [int(self.data.get(key, 0)) for key in keys[1:1 + count]] != list(versions):
+                return 0
+            await self.set(keys[0], value, ex=ttl)
+            for key in keys[1 + count:]:
+                await self.sadd(key, name)
+            return 1
+        return set_script
+
+
+async def uncached(course_id):
+    async with AsyncSessionLocal() as db:
+        course = await curriculum.load_course(db, course_id=course_id)
+        return course is not None
+
+
+async def cached(course_id):
+    async with AsyncSessionLocal() as db:
+        return await curriculum.get_course_detail(db, course_id=course_id) is not None
+
+
+async def run(label, fetch, course_ids, total):
+    # Skewed traffic: a few popular courses get most requests
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(total):
+        await fetch(course_ids[min(int(rng.paretovariate(1.0)) - 1, len(course_ids) - 1)])
+    elapsed = time.perf_counter() - start
+    stats = cache_module.cache.stats.as_dict() if fetch is cached else {}
+    print(f"{label:22} {total / elapsed:10.1f} req/s  {stats}")
+
+
+async def check_invalidation(course_id):
+    # A write must be visible on the very next read
+    async with AsyncSessionLocal() as db:
+        before = await curriculum.get_course_detail(db, course_id=course_id)
+        course = await db.get(Course, course_id)
+        course.title = before["title"] + " (updated)"
+        await db.commit()
+        await cache_module.cache.invalidate_tags(cache_module.course_tag(course_id))
+        after = await curriculum.get_course_detail(db, course_id=course_id)
+    assert after["title"].endswith("(updated)"), "stale course served after invalidation"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=50)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, args.courses)
+    with engine.begin() as conn:
+        course_ids = conn.execute(select(Course.id).order_by(Course.slug)).scalars().all()
+        for course_id in course_ids:
+            seed_curriculum(conn, course_id, 8, 10)
+
+    backends = {
+        "memory": cache_module.MemoryCache(max_entries=args.courses // 2),
+        "redis (fake)": cache_module.RedisCache(FakeRedis()),
+    }
+    asyncio.run(run("uncached", uncached, course_ids, args.requests))
+    for name, backend in backends.items():
+        cache_module.cache = curriculum.cache = backend
+        asyncio.run(run(f"cached, {name}", cached, course_ids, args.requests))
+        asyncio.run(check_invalidation(course_ids[0]))
+
+
+if __name__ == "__main__":
+    main()
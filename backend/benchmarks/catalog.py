@@ -0,0 +1,79 @@
+"""
+Catalog pagination benchmark: OFFSET vs keyset on a large seeded catalog
+
+Usage (from the backend directory):
+    python -m benchmarks.catalog --courses 100000 --limit 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import func
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from database import AsyncSessionLocal, engine
+from services import catalog
+
+from benchmarks.seed import create_schema, seed_courses
+
+
+async def timed(repeat, **kwargs):
+    best = float("inf")
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            courses, next_cursor = await catalog.list_courses(db, **kwargs)
+            best = min(best, time.perf_counter() - start)
+    return best * 1000, next_cursor
+
+
+async def cursor_for_page(page, limit, **filters):
+    # The cursor a client would hold after walking to `page`
+    async with AsyncSessionLocal() as db:
+        query = catalog.catalog_query(**filters).offset((page - 1) * limit - 1).limit(1)
+        course = (await db.execute(query)).scalar_one()
+    return catalog.encode_cursor(filters.get("sort", catalog.DEFAULT_SORT), course)
+
+
+async def last_page(limit, **filters):
+    async with AsyncSessionLocal() as db:
+        query = catalog.catalog_query(**filters).order_by(None).with_only_columns(func.count())
+        return max(1, (await db.execute(query)).scalar_one() // limit)
+
+
+async def run(args):
+    print(f"{'case':60} {'best ms':>10}")
+    for filters in ({}, {"category": "Programming"}, {"category": "Programming", "level": "Beginner"}):
+        deep_page = min(args.deep_page, await last_page(args.limit, **filters))
+        for page in (1, deep_page):
+            label = f"{filters or 'all'} page {page}"
+            offset_ms, _ = await timed(args.repeat, page=page, limit=args.limit, **filters)
+            print(f"{'offset ' + label:60} {offset_ms:10.2f}")
+            if page > 1:
+                cursor = await cursor_for_page(page, args.limit, **filters)
+                keyset_ms, _ = await timed(args.repeat, cursor=cursor, limit=args.limit, **filters)
+                print(f"{'keyset ' + label:60} {keyset_ms:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--deep-page", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    start = time.perf_counter()
+    seed_courses(engine, args.courses)
+    print(f"seeded {args.courses} courses in {time.perf_counter() - start:.1f}s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
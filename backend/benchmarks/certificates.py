@@ -0,0 +1,126 @@
+"""
+Certificate generation throughput at cohort graduation
+
+Marks `--students` enrollments completed at once, queues their certificate
+jobs and drains the queue with a JobWorker, first rendering inline on the
+event loop (`processes=0`, what generating inside GET /certificates would
+do) and then with each `--processes` pool size. Reports certificates per
+second and the worst event-loop stall seen while the batch ran, and checks
+that every student ends up with exactly one certificate.
+
+Rendering is CPU-bound, so the pool only scales with the cores available
+(os.cpu_count() is printed); the loop stall drops regardless.
+
+Usage (from the backend directory):
+    python -m benchmarks.certificates --students 200 --processes 1 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}")
+os.environ.setdefault("STORAGE_ROOT", os.path.join(WORK_DIR, "uploads"))
+
+from sqlalchemy import delete, func, select, update
+
+from database import AsyncSessionLocal, engine
+from models import Certificate, Course, Enrollment, Job
+from services import certificates, jobs
+
+from benchmarks.seed import create_schema, seed_courses, seed_enrollments, seed_users
+
+
+class LoopLag:
+    """
+    Longest gap between ticks of a task that wants to wake every `interval`
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.worst = 0.0
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.worst = max(self.worst, time.perf_counter() - start - self.interval)
+
+
+async def queue_cohort(pairs):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Certificate))
+        await db.execute(delete(Job))
+        for user_id, course_id in pairs:
+            await certificates.enqueue_certificate(db, user_id, course_id)
+        await db.commit()
+
+
+async def drain(worker):
+    lag = LoopLag()
+    ticker = asyncio.create_task(lag.run())
+    start = time.perf_counter()
+    try:
+        while await worker.run_once():
+            pass
+    finally:
+        ticker.cancel()
+    return time.perf_counter() - start, lag.worst
+
+
+async def check(students):
+    async with AsyncSessionLocal() as db:
+        issued, codes = (await db.execute(
+            select(func.count(Certificate.id), func.count(func.distinct(Certificate.verification_code)))
+        )).one()
+        pending = (await db.execute(select(func.count(Job.id)).where(Job.status != "done"))).scalar_one()
+    assert issued == codes == students, f"{issued} certificates, {codes} codes for {students} students"
+    assert pending == 0, f"{pending} jobs not done"
+
+
+async def run(args, pairs):
+    runs = [("inline on event loop", 0)] + [(f"process pool x{n}", n) for n in args.processes]
+    for label, processes in runs:
+        await queue_cohort(pairs)
+        worker = jobs.JobWorker(processes=processes, batch_size=args.batch_size)
+        if processes:
+            # Start the pool before timing; spawning processes is a one-off
+            await worker.run_in_process(certificates.render_certificate, {
+                "student_name": "", "course_title": "", "instructor_name": "",
+                "issue_date": "", "verification_code": "",
+            })
+        try:
+            elapsed, worst_lag = await drain(worker)
+        finally:
+            await worker.close()
+        await check(len(pairs))
+        print(f"{label:24} {len(pairs) / elapsed:8.1f} certificates/s  worst loop stall {worst_lag * 1000:7.1f} ms")
+    print(f"{len(pairs)} students, one certificate each, on {os.cpu_count()} CPU(s) ({engine.dialect.name})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=jobs.JOB_BATCH_SIZE)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        user_ids = seed_users(conn, args.students)
+        seed_enrollments(conn, user_ids, [course_id], 1, review_ratio=0)
+        conn.execute(update(Enrollment).values(status="completed", progress=100.0, completion_date=func.now()))
+    try:
+        asyncio.run(run(args, [(user_id, course_id) for user_id in user_ids]))
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Bulk course import/export: NDJSON streams vs creating lectures one by one
+
+Writes an NDJSON file of `--courses` courses with `--sections` sections of
+`--lectures` lectures each (a quiz with three questions of four options in
+every section), then:
+
+- one by one: services.courses.create_lecture for `--sample` lectures, one
+  transaction each, as the instructor API does (before)
+- bulk import: services.course_transfer.import_lines over the file (after)
+- resume: the same file again from halfway, then in full, which must not
+  add a row
+- export: services.course_transfer.export_lines for every course
+
+and reports records per second and the growth in peak RSS during each bulk
+pass. Fails unless the imported row counts, Course.lectures_count and the
+exported line count all match the file.
+
+Usage (from the backend directory):
+    python -m benchmarks.course_import --courses 100 --sections 50 --lectures 200   # 1M lectures
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import orjson
+from sqlalchemy import func, select
+
+from cli import read_lines
+from database import AsyncSessionLocal, engine
+from ids import new_id
+from models import Course, Lecture, QuizOption, Section, User
+from services import course_transfer, courses
+
+from benchmarks.seed import create_schema, seed_instructor
+
+
+def records(args):
+    for c in range(args.courses):
+        course_id = new_id()
+        yield {"record": "course", "id": course_id, "title": f"Imported Course {c}", "slug": f"imported-{c}",
+               "description": "Imported", "category": "Programming", "level": "Beginner", "price": 10.0}
+        for s in range(args.sections):
+            section_id = new_id()
+            yield {"record": "section", "id": section_id, "course_id": course_id, "title": f"Section {s + 1}", "order": s}
+            for n in range(args.lectures):
+                yield {"record": "lecture", "id": new_id(), "section_id": section_id, "title": f"Lecture {n + 1}",
+                       "type": "video", "content": f"https://video.example.com/{c}/{s}/{n}",
+                       "duration": "10:00", "order": n}
+            quiz_id = new_id()
+            yield {"record": "quiz", "id": quiz_id, "course_id": course_id, "title": f"Section {s + 1} quiz",
+                   "pass_score": 70}
+            for q in range(3):
+                question_id = new_id()
+                yield {"record": "question", "id": question_id, "quiz_id": quiz_id, "text": f"Question {q + 1}",
+                       "type": "single"}
+                for o in range(4):
+                    yield {"record": "option", "id": new_id(), "question_id": question_id, "text": f"Option {o + 1}",
+                           "is_correct": o == 0}
+
+
+def write_file(args, path):
+    count = 0
+    with open(path, "wb") as f:
+        for record in records(args):
+            f.write(orjson.dumps(record) + b"\n")
+            count += 1
+    return count
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def one_by_one(instructor_id, sample):
+    async with AsyncSessionLocal() as db:
+        instructor = await db.get(User, instructor_id)
+        course = await courses.create_course(db, instructor, {"title": "One By One", "description": "Baseline",
+                                                              "category": "Programming", "level": "Beginner",
+                                                              "price": 0})
+        section = await courses.create_section(db, course, {"title": "Section", "order": 0})
+        start = time.perf_counter()
+        for n in range(sample):
+            await courses.create_lecture(db, course, section, {"title": f"Lecture {n}", "type": "video",
+                                                               "content": "https://video.example.com/", "order": n})
+        return sample / (time.perf_counter() - start)
+
+
+async def bulk_import(instructor_id, path, batch_size, skip=0):
+    rss = peak_rss_mb()
+    async with AsyncSessionLocal() as db:
+        instructor = await db.get(User, instructor_id)
+        start = time.perf_counter()
+        summary = await course_transfer.import_lines(db, instructor, read_lines(path), skip=skip, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+    return summary, seconds, peak_rss_mb() - rss
+
+
+async def export(instructor_id):
+    rss = peak_rss_mb()
+    lines = 0
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        query = select(Course.id).where(Course.instructor_id == instructor_id, Course.slug.like("imported-%"))
+        async for chunk in course_transfer.export_lines(db, query):
+            lines += chunk.count(b"\n")
+        seconds = time.perf_counter() - start
+    return lines, seconds, peak_rss_mb() - rss
+
+
+async def counts():
+    async with AsyncSessionLocal() as db:
+        imported = select(Course.id).where(Course.slug.like("imported-%"))
+        lectures = (await db.execute(
+            select(func.count()).select_from(Lecture).join(Section).where(Section.course_id.in_(imported))
+        )).scalar_one()
+        stored = (await db.execute(
+            select(func.sum(Course.lectures_count)).where(Course.id.in_(imported))
+        )).scalar_one()
+        options = (await db.execute(select(func.count()).select_from(QuizOption))).scalar_one()
+    return lectures, stored, options
+
+
+async def run(args, path, total, instructor_id):
+    expected_lectures = args.courses * args.sections * args.lectures
+    expected_options = args.courses * args.sections * 12
+
+    rate = await one_by_one(instructor_id, args.sample)
+    print(f"{'one by one (create_lecture)':28} {rate:10.0f} lectures/s")
+
+    summary, seconds, rss = await bulk_import(instructor_id, path, args.batch_size)
+    print(f"{'bulk import':28} {total / seconds:10.0f} records/s  {seconds:7.1f}s  peak RSS +{rss:.0f} MB")
+    if (await counts()) != (expected_lectures, expected_lectures, expected_options):
+        raise SystemExit(f"Imported counts differ: {await counts()}")
+
+    _, seconds, rss = await bulk_import(instructor_id, path, args.batch_size, skip=total // 2)
+    print(f"{'resume from halfway':28} {(total - total // 2) / seconds:10.0f} records/s  {seconds:7.1f}s")
+    _, seconds, rss = await bulk_import(instructor_id, path, args.batch_size)
+    print(f"{'replay in full':28} {total / seconds:10.0f} records/s  {seconds:7.1f}s")
+    if (await counts()) != (expected_lectures, expected_lectures, expected_options):
+        raise SystemExit(f"Re-imports added rows: {await counts()}")
+
+    lines, seconds, rss = await export(instructor_id)
+    print(f"{'export':28} {lines / seconds:10.0f} records/s  {seconds:7.1f}s  peak RSS +{rss:.0f} MB")
+    if lines != total:
+        raise SystemExit(f"Exported {lines} records, expected {total}")
+
+    print(f"{total} records ({expected_lectures} lectures), {summary['committed']} lines, "
+          f"{args.batch_size} per batch; counts match after import, resume and replay")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--lectures", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=course_transfer.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    with engine.begin() as conn:
+        instructor_id = seed_instructor(conn)
+    path = os.path.join(tempfile.mkdtemp(), "courses.ndjson")
+    total = write_file(args, path)
+    asyncio.run(run(args, path, total, instructor_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Curriculum loading check: query counts and latency by course size
+
+Fails with a non-zero exit status if loading a course tree takes more than
+services.curriculum.MAX_COURSE_QUERIES statements (tests/test_curriculum.py
+checks the same bound in the test suite). The lazy-loading column shows what
+the same tree costs without eager loading.
+
+Usage (from the backend directory):
+    python -m benchmarks.curriculum
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, SessionLocal, assert_max_queries, async_engine, count_queries, engine
+from models import Course
+from schemas import CourseDetail
+from services import curriculum
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum
+
+SIZES = [(1, 1), (5, 8), (20, 20), (50, 40)]
+
+
+def lazy_query_count(course_id):
+    # Walk the tree with default lazy relationships on a sync session
+    with SessionLocal() as db, count_queries(engine) as statements:
+        course = db.get(Course, course_id)
+        CourseDetail.model_validate(course)
+    return len(statements)
+
+
+async def eager_load(course_id, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            with assert_max_queries(async_engine.sync_engine, curriculum.MAX_COURSE_QUERIES) as statements:
+                start = time.perf_counter()
+                CourseDetail.model_validate(await curriculum.load_course(db, course_id=course_id))
+                best = min(best, time.perf_counter() - start)
+    return len(statements), best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, len(SIZES))
+    with SessionLocal() as db:
+        course_ids = db.execute(select(Course.id).order_by(Course.slug)).scalars().all()
+    with engine.begin() as conn:
+        for course_id, (sections, lectures) in zip(course_ids, SIZES):
+            seed_curriculum(conn, course_id, sections, lectures)
+
+    print(f"{'sections x lectures':20} {'lazy queries':>13} {'eager queries':>14} {'eager ms':>9}")
+    try:
+        for course_id, (sections, lectures) in zip(course_ids, SIZES):
+            lazy = lazy_query_count(course_id)
+            eager, ms = asyncio.run(eager_load(course_id, args.repeat))
+            print(f"{f'{sections} x {lectures}':20} {lazy:13} {eager:14} {ms:9.2f}")
+    except AssertionError as exc:
+        print(f"FAIL: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Quiz grading throughput: row-by-row grading vs the compiled, cached answer key
+
+Simulates an exam-day burst: `--students` enrolled students each submit a
+`--questions` question quiz once. Reports submissions per minute against the
+`--target` rate and checks both graders agree on every score.
+
+SQLite allows one writer and fails read-then-write transactions that overlap
+("database is locked"), so the default concurrency is 1; point DATABASE_URL
+at Postgres to measure concurrent submissions.
+
+Usage (from the backend directory):
+    python -m benchmarks.grading --questions 100 --students 1000
+    DATABASE_URL=postgresql://... python -m benchmarks.grading --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import delete, insert, select
+
+from database import AsyncSessionLocal, async_engine, count_queries, engine
+from models import Course, Quiz, QuizAnswer, QuizOption, QuizQuestion, QuizSubmission, User
+from services import grading
+
+from benchmarks.seed import create_schema, seed_courses, seed_enrollments, seed_users
+
+
+def seed_quiz(conn, course_id, questions, options=4, seed=42):
+    """
+    One quiz with single- and multi-answer questions; returns its id
+    """
+    rng = random.Random(seed)
+    quiz_id = str(uuid.uuid4())
+    conn.execute(insert(Quiz), [{"id": quiz_id, "title": "Final exam", "course_id": course_id,
+                                 "pass_score": 70, "attempts": 1}])
+    question_rows, option_rows = [], []
+    for q in range(questions):
+        question_id = str(uuid.uuid4())
+        question_rows.append({"id": question_id, "quiz_id": quiz_id, "text": f"Question {q + 1}",
+                              "type": "multiple-choice", "points": rng.choice([1, 1, 2])})
+        correct = set(rng.sample(range(options), 2 if q % 10 == 9 else 1))
+        option_rows.extend(
+            {"id": str(uuid.uuid4()), "question_id": question_id, "text": f"Option {o + 1}", "is_correct": o in correct}
+            for o in range(options)
+        )
+    conn.execute(insert(QuizQuestion), question_rows)
+    conn.execute(insert(QuizOption), option_rows)
+    return quiz_id
+
+
+def answer_sheets(conn, quiz_id, students, seed=42):
+    # Students get roughly 75% of questions right
+    rng = random.Random(seed)
+    options = {}
+    for question_id, option_id, is_correct in conn.execute(
+        select(QuizOption.question_id, QuizOption.id, QuizOption.is_correct)
+        .join(QuizQuestion).where(QuizQuestion.quiz_id == quiz_id)
+    ):
+        options.setdefault(question_id, []).append((option_id, is_correct))
+    sheets = []
+    for _ in range(students):
+        sheet = []
+        for question_id, choices in options.items():
+            if rng.random() < 0.75:
+                picked = [option_id for option_id, is_correct in choices if is_correct]
+            else:
+                picked = [rng.choice(choices)[0]]
+            sheet.append({"question_id": question_id, "selected_option_ids": picked})
+        sheets.append(sheet)
+    return sheets
+
+
+async def naive_submit(db, user, quiz_id, answers):
+    # Load the quiz, then each question's options, compare per answer and
+    # add one QuizAnswer at a time
+    quiz = await db.get(Quiz, quiz_id)
+    questions = (await db.execute(select(QuizQuestion).where(QuizQuestion.quiz_id == quiz_id))).scalars().all()
+    total = sum(question.points for question in questions)
+    submission = QuizSubmission(id=str(uuid.uuid4()), quiz_id=quiz_id, user_id=user.id, score=0, passed=False)
+    db.add(submission)
+    await db.flush()
+    earned = 0
+    by_id = {answer["question_id"]: set(answer["selected_option_ids"]) for answer in answers}
+    for question in questions:
+        options = (await db.execute(select(QuizOption).where(QuizOption.question_id == question.id))).scalars().all()
+        picked = by_id.get(question.id, set())
+        correct = picked == {option.id for option in options if option.is_correct}
+        if correct:
+            earned += question.points
+        for option_id in picked:
+            db.add(QuizAnswer(id=str(uuid.uuid4()), submission_id=submission.id, question_id=question.id,
+                              selected_option_id=option_id, is_correct=correct))
+            await db.flush()
+    submission.score = earned * 100.0 / total
+    submission.passed = submission.score >= quiz.pass_score
+    await db.commit()
+    return {"score": submission.score}
+
+
+async def burst(submit, users, quiz_id, sheets, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    scores = {}
+
+    async def one(user, sheet):
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                scores[user.id] = (await submit(db, user, quiz_id, sheet))["score"]
+
+    with count_queries(async_engine.sync_engine) as statements:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(user, sheet) for user, sheet in zip(users, sheets)))
+        elapsed = time.perf_counter() - start
+    return elapsed, len(statements) / len(users), scores
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(QuizAnswer))
+        await db.execute(delete(QuizSubmission))
+        await db.commit()
+
+
+async def run(args, quiz_id, users, sheets):
+    sample = len(users) if args.naive_sample is None else min(args.naive_sample, len(users))
+    naive_time, naive_statements, naive_scores = await burst(
+        naive_submit, users[:sample], quiz_id, sheets[:sample], args.concurrency
+    )
+    print(f"{'row by row':24} {sample / naive_time * 60:10.0f} submissions/min {naive_statements:8.1f} statements each")
+
+    await reset()
+    engine_time, statements, scores = await burst(grading.submit, users, quiz_id, sheets, args.concurrency)
+    rate = len(users) / engine_time * 60
+    print(f"{'compiled answer key':24} {rate:10.0f} submissions/min {statements:8.1f} statements each")
+    print(f"target {args.target} submissions/min: {'met' if rate >= args.target else 'NOT met'} on {engine.dialect.name}")
+
+    mismatched = [user_id for user_id, score in naive_scores.items() if abs(scores[user_id] - score) > 1e-9]
+    assert not mismatched, f"{len(mismatched)} scores differ between graders"
+    async with AsyncSessionLocal() as db:
+        stored = (await db.execute(select(QuizSubmission.id))).scalars().all()
+    assert len(stored) == len(users), "every submission should be stored once"
+    print(f"{len(users)} submissions stored, scores agree with row-by-row grading")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--naive-sample", type=int, default=100)
+    parser.add_argument("--target", type=int, default=5000)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        user_ids = seed_users(conn, args.students)
+        seed_enrollments(conn, user_ids, [course_id], 1, review_ratio=0)
+        quiz_id = seed_quiz(conn, course_id, args.questions)
+        sheets = answer_sheets(conn, quiz_id, args.students)
+        users = conn.execute(select(User).where(User.id.in_(user_ids))).all()
+    by_id = {user.id: user for user in users}
+    asyncio.run(run(args, quiz_id, [by_id[user_id] for user_id in user_ids], sheets))
+
+
+if __name__ == "__main__":
+    main()
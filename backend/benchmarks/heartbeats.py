@@ -0,0 +1,142 @@
+"""
+Progress heartbeats: one transaction per heartbeat vs the write-behind buffer
+
+Simulates `--heartbeats` concurrent player heartbeats spread over
+`--enrollments` enrollments of one course, then checks that the buffered run
+leaves exactly one completed progress item per distinct (enrollment, lecture)
+and matching Enrollment.completed_lectures counters; tests/test_progress_buffer.py
+runs the same check. Direct writes are timed on the first `--direct-sample`
+heartbeats only; at ~100/s on SQLite all of them would take minutes.
+
+Usage (from the backend directory):
+    python -m benchmarks.heartbeats --heartbeats 10000 --enrollments 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import delete, func, select, update
+
+from database import AsyncSessionLocal, engine
+from models import Course, Enrollment, Lecture, ProgressItem, Section
+from services import progress
+from services.progress_buffer import ProgressBuffer
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum, seed_enrollments, seed_users
+
+
+def heartbeats(count, enrollment_ids, lecture_ids, seed=42):
+    # Viewers sit on one lecture for a while, so heartbeats repeat
+    rng = random.Random(seed)
+    return [(rng.choice(enrollment_ids), rng.choice(lecture_ids)) for _ in range(count)]
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ProgressItem))
+        await db.execute(update(Enrollment).values(completed_lectures=0, progress=0, status="active"))
+        await db.commit()
+
+
+async def snapshot():
+    async with AsyncSessionLocal() as db:
+        items = set((await db.execute(
+            select(ProgressItem.enrollment_id, ProgressItem.lecture_id).where(ProgressItem.completed.is_(True))
+        )).all())
+        counters = dict((await db.execute(select(Enrollment.id, Enrollment.completed_lectures))).all())
+    return items, counters
+
+
+async def run_direct(beats, course_id):
+    # SQLite serializes writers, so direct writes go through one session;
+    # on Postgres they would contend for the same rows instead
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        for enrollment_id, lecture_id in beats:
+            await progress.apply_progress(db, enrollment_id, course_id, {lecture_id: True})
+        return time.perf_counter() - start
+
+
+async def run_buffered(beats, course_id, flush_interval):
+    buffer = ProgressBuffer(flush_interval=flush_interval)
+    flusher = asyncio.create_task(buffer.run())
+
+    async def player(enrollment_id, lecture_id):
+        await asyncio.sleep(0)
+        while not buffer.add(enrollment_id, course_id, lecture_id):
+            await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(player(*beat) for beat in beats))
+    accepted = time.perf_counter() - start
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+    await buffer.close()
+    return accepted, time.perf_counter() - start, buffer.stats
+
+
+async def run(args, course_id, lecture_ids, enrollment_ids):
+    beats = heartbeats(args.heartbeats, enrollment_ids, lecture_ids)
+    distinct = len(set(beats))
+    print(f"{args.heartbeats} heartbeats, {distinct} distinct (enrollment, lecture) pairs")
+
+    sample = beats[:args.direct_sample]
+    direct = await run_direct(sample, course_id)
+    print(f"{'one transaction per heartbeat':32} {len(sample) / direct:10.0f} heartbeats/s")
+
+    await reset()
+    accepted, total, stats = await run_buffered(beats, course_id, args.flush_interval)
+    print(f"{'write-behind buffer (accept)':32} {args.heartbeats / accepted:10.0f} heartbeats/s")
+    print(f"{'write-behind buffer (durable)':32} {args.heartbeats / total:10.0f} heartbeats/s")
+    print(f"buffer stats: {stats}")
+
+    items, counters = await snapshot()
+    assert items == set(beats), f"expected {distinct} completed items, found {len(items)}"
+    expected = dict.fromkeys(enrollment_ids, 0)
+    for enrollment_id, _ in items:
+        expected[enrollment_id] += 1
+    assert counters == expected, "completed_lectures disagrees with the heartbeats sent"
+    async with AsyncSessionLocal() as db:
+        drift = (await db.execute(
+            select(func.count()).select_from(Enrollment).where(
+                Enrollment.completed_lectures != select(func.count(ProgressItem.id)).where(
+                    ProgressItem.enrollment_id == Enrollment.id, ProgressItem.completed.is_(True)
+                ).scalar_subquery()
+            )
+        )).scalar_one()
+    assert drift == 0, f"{drift} enrollments have a completed_lectures counter that disagrees with their items"
+    print("buffered state matches the heartbeats sent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--heartbeats", type=int, default=10000)
+    parser.add_argument("--enrollments", type=int, default=500)
+    parser.add_argument("--direct-sample", type=int, default=1000)
+    parser.add_argument("--sections", type=int, default=5)
+    parser.add_argument("--lectures", type=int, default=10)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        seed_curriculum(conn, course_id, args.sections, args.lectures)
+        lecture_ids = conn.execute(
+            select(Lecture.id).join(Section).where(Section.course_id == course_id)
+        ).scalars().all()
+        conn.execute(update(Course).values(lectures_count=len(lecture_ids)))
+        enrollment_ids = seed_enrollments(conn, seed_users(conn, args.enrollments), [course_id], 1, review_ratio=0)
+    asyncio.run(run(args, course_id, lecture_ids, enrollment_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Live session admission: simultaneous joins against a capped session
+
+Enrolls `--students` students in one course and sends all of them to
+services.live_sessions.join at once for a session with `--seats` seats:
+
+- count then insert: SELECT COUNT(*) of participants, insert if below the
+  limit (what the route would naively do)
+- conditional update: the reservation row and conditional increment alone,
+  every join reaching the database
+- memory seats: with the per-process counters in front, for one worker and
+  for `--workers` workers (each with its own counters) sharing the database
+
+For each case it reports admitted and rejected joins, the seats recorded in
+the database, how many joins tried to write a seat, statements per join and
+the time for the whole burst, and
+fails unless exactly `--seats` joins were admitted. Errors are joins that
+gave up waiting for the database (on SQLite, its single write lock).
+Admitted students then join again, which must succeed without taking
+another seat.
+
+Usage (from the backend directory):
+    python -m benchmarks.live_joins --students 5000 --seats 500 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+# Thousands of writers queue for SQLite's single write lock
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}?timeout=120")
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+
+import seats
+from cache import cache
+from database import AsyncSessionLocal, async_engine, count_queries, engine
+from models import Course, Enrollment, LiveSession, LiveSessionParticipant
+from services import live_sessions
+
+from benchmarks.seed import create_schema, seed_courses, seed_users
+
+
+class Student:
+    # Stands in for the authenticated User
+    role = "student"
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class DatabaseOnly:
+    # No counters: every join is decided by the database
+    authoritative = True
+
+    async def admit(self, session_id, user_id, capacity):
+        return seats.RESERVED
+
+    async def settle(self, session_id, user_id, outcome, taken=None, capacity=None):
+        pass
+
+
+async def count_then_insert(db, session_id, user, seats=None):
+    # Before: read the count, then insert if there was room
+    session = await db.get(LiveSession, session_id)
+    taken = (await db.execute(
+        select(func.count()).select_from(LiveSessionParticipant).where(LiveSessionParticipant.session_id == session_id)
+    )).scalar_one()
+    if taken >= session.max_participants:
+        raise HTTPException(status_code=409, detail="Live session is full")
+    db.add(LiveSessionParticipant(session_id=session_id, user_id=user.id))
+    await db.commit()
+    return session.meeting_url
+
+
+def seed(args):
+    create_schema(engine)
+    instructor_id = seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        conn.execute(update(Course).values(status="published"))
+        user_ids = seed_users(conn, args.students)
+        conn.execute(insert(Enrollment), [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id} for user_id in user_ids
+        ])
+        session_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        conn.execute(insert(LiveSession), [{
+            "id": session_id, "title": "Class start", "course_id": course_id, "instructor_id": instructor_id,
+            "start_time": now, "end_time": now + timedelta(hours=1),
+            "meeting_url": "https://meet.example.com/room", "max_participants": args.seats,
+        }])
+    return session_id, user_ids
+
+
+async def reset(session_id):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(LiveSessionParticipant))
+        await db.execute(update(LiveSession).values(participants_count=0))
+        await db.commit()
+    await cache.clear()
+
+
+async def burst(join, session_id, user_ids, counters):
+    async def one(i, user_id):
+        async with AsyncSessionLocal() as db:
+            try:
+                await join(db, session_id, Student(user_id), seats=counters[i % len(counters)])
+                return user_id
+            except HTTPException as exc:
+                if exc.status_code != 409:
+                    raise
+                return None
+
+    results = await asyncio.gather(*(one(i, user_id) for i, user_id in enumerate(user_ids)), return_exceptions=True)
+    admitted = [result for result in results if isinstance(result, str)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    return admitted, errors
+
+
+async def recorded(session_id):
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(func.count()).select_from(LiveSessionParticipant).where(LiveSessionParticipant.session_id == session_id)
+        )).scalar_one()
+        count = (await db.execute(select(LiveSession.participants_count).where(LiveSession.id == session_id))).scalar_one()
+    return rows, count
+
+
+async def run(args, session_id, user_ids):
+    print(f"{'':28} {'admitted':>9} {'rejected':>9} {'errors':>7} {'seat rows':>10} {'count':>6} "
+          f"{'seat writes':>12} {'statements/join':>16} {'burst ms':>9}")
+    failures = []
+    for label, join, counters, exact in (
+        ("count then insert", count_then_insert, [None], False),
+        ("conditional update", live_sessions.join, [DatabaseOnly()], True),
+        ("memory seats, 1 worker", live_sessions.join, [seats.MemorySeats()], True),
+        (f"memory seats, {args.workers} workers", live_sessions.join,
+         [seats.MemorySeats() for _ in range(args.workers)], True),
+    ):
+        await reset(session_id)
+        with count_queries(async_engine.sync_engine) as statements:
+            start = time.perf_counter()
+            admitted, errors = await burst(join, session_id, user_ids, counters)
+            elapsed = time.perf_counter() - start
+        rows, count = await recorded(session_id)
+        rejected = len(user_ids) - len(admitted) - len(errors)
+        writes = sum(statement.startswith("INSERT INTO live_session_participants") for statement in statements)
+        print(f"{label:28} {len(admitted):9} {rejected:9} {len(errors):7} {rows:10} {count:6} "
+              f"{writes:12} {len(statements) / len(user_ids):16.2f} {elapsed * 1000:9.0f}")
+        if not exact:
+            continue
+        if not len(admitted) == rows == count == args.seats:
+            failures.append(label)
+            continue
+        again, errors = await burst(join, session_id, admitted, counters)
+        if errors or len(again) != len(admitted) or await recorded(session_id) != (args.seats, args.seats):
+            failures.append(f"{label} (joining again)")
+
+    print(f"{args.students} simultaneous joins, {args.seats} seats, {os.cpu_count()} CPU(s)")
+    if failures:
+        raise SystemExit(f"Admission was not exact: {', '.join(failures)}")
+    print(f"exact: {args.seats} admitted in every case with seat counting, and all of them could join again")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--seats", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    session_id, user_ids = seed(args)
+    asyncio.run(run(args, session_id, user_ids))
+
+
+if __name__ == "__main__":
+    main()
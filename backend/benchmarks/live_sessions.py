@@ -0,0 +1,175 @@
+"""
+Dashboard schedule: upcoming live sessions for a user with many enrollments
+
+Seeds `--courses` courses with `--sessions` live sessions each (half of them
+in the past) and `--users` students enrolled in `--enrollments` courses
+each, then loads the schedule of one student:
+
+- per enrollment: load the enrollments, then query each course's sessions
+  (the obvious implementation), without the new indexes
+- one query: services.live_sessions.load_schedule, without and with the
+  (course_id, start_time) and (user_id, status) indexes
+- cached: services.live_sessions.upcoming_for_user after the first load
+
+and reports milliseconds per load, database statements per load and the
+dashboard route's requests per second (first 20 sessions, cached).
+
+Usage (from the backend directory):
+    python -m benchmarks.live_sessions --courses 2000 --sessions 20 --users 2000 --enrollments 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from sqlalchemy import insert, select, text
+
+import auth
+from cache import cache
+from database import AsyncSessionLocal, async_engine, count_queries, engine
+from main import app
+from models import Course, Enrollment, LiveSession
+from schemas import LiveSessionSummary
+from services import live_sessions
+
+from benchmarks.seed import create_schema, seed_courses, seed_users
+
+INDEXES = {
+    "ix_live_sessions_course_start": "CREATE INDEX ix_live_sessions_course_start ON live_sessions (course_id, start_time)",
+    "ix_enrollments_user_status": "CREATE INDEX ix_enrollments_user_status ON enrollments (user_id, status)",
+}
+
+
+def seed_sessions(conn, course_ids, instructor_id, per_course, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = []
+    for course_id in course_ids:
+        for n in range(per_course):
+            start = now + timedelta(days=rng.uniform(-90, 90))
+            rows.append({"id": str(uuid.uuid4()), "title": f"Session {n + 1}", "course_id": course_id,
+                         "instructor_id": instructor_id, "start_time": start, "end_time": start + timedelta(hours=1),
+                         "meeting_url": "https://meet.example.com/room"})
+    for start in range(0, len(rows), 5000):
+        conn.execute(insert(LiveSession), rows[start:start + 5000])
+
+
+def seed_student_enrollments(conn, user_ids, course_ids, per_user, seed=42):
+    rng = random.Random(seed)
+    rows = [{"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id}
+            for user_id in user_ids for course_id in rng.sample(course_ids, per_user)]
+    for start in range(0, len(rows), 5000):
+        conn.execute(insert(Enrollment), rows[start:start + 5000])
+
+
+async def per_enrollment(db, user_id):
+    # Before: one query for the enrollments, then one per course
+    now = datetime.utcnow()
+    enrolled = (await db.execute(
+        select(Enrollment.course_id, Course.title).join(Course, Course.id == Enrollment.course_id)
+        .where(Enrollment.user_id == user_id, Enrollment.status.in_(live_sessions.SCHEDULE_ENROLLMENT_STATUSES))
+    )).all()
+    schedule = []
+    for course_id, title in enrolled:
+        query = select(LiveSession).where(LiveSession.course_id == course_id, LiveSession.start_time > now,
+                                          LiveSession.status != "cancelled")
+        schedule.extend(
+            LiveSessionSummary.model_validate(session).model_copy(update={"course_title": title}).model_dump(mode="json")
+            for session in (await db.execute(query)).scalars()
+        )
+    return sorted(schedule, key=lambda entry: (entry["start_time"], entry["id"]))
+
+
+async def one_query(db, user_id):
+    return (await live_sessions.load_schedule(db, user_id))[0]
+
+
+async def cached(db, user_id):
+    return await live_sessions.upcoming_for_user(db, user_id)
+
+
+async def timed(load, user_ids, repeat):
+    with count_queries(async_engine.sync_engine) as statements:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for user_id in user_ids:
+                async with AsyncSessionLocal() as db:
+                    sessions = await load(db, user_id)
+        elapsed = time.perf_counter() - start
+    loads = repeat * len(user_ids)
+    return elapsed / loads * 1000, len(statements) / loads, len(sessions)
+
+
+def set_indexes(present):
+    with engine.begin() as conn:
+        for name, ddl in INDEXES.items():
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            if present:
+                conn.execute(text(ddl))
+        conn.execute(text("ANALYZE"))
+
+
+async def over_http(client, token, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get("/api/v1/live-sessions/upcoming", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+    return requests / (time.perf_counter() - start)
+
+
+async def run(args, user_ids):
+    sample = random.Random(7).sample(user_ids, min(args.sample, len(user_ids)))
+    print(f"{'':34} {'ms/load':>9} {'statements/load':>16} {'sessions':>9}")
+    for label, load, indexed in (
+        ("per enrollment, no indexes", per_enrollment, False),
+        ("one query, no indexes", one_query, False),
+        ("one query, indexed", one_query, True),
+        ("cached", cached, True),
+    ):
+        set_indexes(indexed)
+        await cache.clear()
+        ms, statements, sessions = await timed(load, sample, args.repeat)
+        print(f"{label:34} {ms:9.2f} {statements:16.2f} {sessions:9}")
+
+    await cache.clear()
+    token = auth.create_access_token(sample[0])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        rate = await over_http(client, token, args.requests)
+    print(f"GET /live-sessions/upcoming (cached): {rate:.0f} requests/s")
+    print(f"{args.courses} courses x {args.sessions} sessions, {args.users} users x {args.enrollments} enrollments")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--enrollments", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    start = time.perf_counter()
+    instructor_id = seed_courses(engine, args.courses)
+    with engine.begin() as conn:
+        course_ids = list(conn.execute(select(Course.id)).scalars())
+        user_ids = seed_users(conn, args.users)
+        seed_student_enrollments(conn, user_ids, course_ids, args.enrollments)
+        seed_sessions(conn, course_ids, instructor_id, args.sessions)
+    print(f"seeded in {time.perf_counter() - start:.1f}s")
+    asyncio.run(run(args, user_ids))
+
+
+if __name__ == "__main__":
+    main()
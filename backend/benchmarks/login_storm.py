@@ -0,0 +1,135 @@
+"""
+Course listing latency during a login storm
+
+While `--logins` logins arrive `--concurrency` at a time, a probe keeps
+requesting GET /courses and records its latency. Runs the storm with bcrypt
+on the event loop, in the thread pool, and in the password hashing process
+pool (passwords.py), and reports p50/p99 of /courses, logins per second and
+how many logins were turned away with 429.
+
+Usage (from the backend directory):
+    python -m benchmarks.login_storm --logins 40 --concurrency 20 --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from sqlalchemy import insert
+
+import passwords
+from database import engine
+from ids import new_id
+from main import app
+from models import User
+from services import users
+
+from benchmarks.seed import create_schema, seed_courses
+
+PASSWORD = "correct horse battery"
+
+
+class InlineHasher(passwords.PasswordHasher):
+    # Before: bcrypt called directly from the async route
+    async def _run(self, func, *args):
+        return func(*args)
+
+
+def seed_accounts(conn, count):
+    hashed = passwords.pwd_context.hash(PASSWORD)
+    conn.execute(insert(User), [
+        {"id": new_id(), "name": f"User {i}", "email": f"user{i}@example.com", "hashed_password": hashed}
+        for i in range(count)
+    ])
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def storm(client, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses = []
+
+    async def login(i):
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", data={
+                "username": f"user{i % args.accounts}@example.com", "password": PASSWORD,
+            })
+            statuses.append(response.status_code)
+
+    await asyncio.gather(*(login(i) for i in range(args.logins)))
+    return statuses
+
+
+async def probe(client, latencies, done):
+    while not done.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/courses", params={"limit": 10})
+        assert response.status_code == 200, response.text
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def run_mode(client, args, hasher):
+    users.hasher = hasher
+    latencies, done = [], asyncio.Event()
+    prober = asyncio.create_task(probe(client, latencies, done))
+    start = time.perf_counter()
+    statuses = await storm(client, args)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    await hasher.close()
+    ok = statuses.count(200)
+    assert ok + statuses.count(429) == len(statuses), statuses
+    return (statistics.median(latencies) * 1000, percentile(latencies, 99) * 1000, ok / elapsed,
+            statuses.count(429))
+
+
+async def run(args):
+    modes = [
+        ("bcrypt on event loop", InlineHasher(workers=0, queue_limit=args.logins)),
+        ("thread pool", passwords.PasswordHasher(workers=0, queue_limit=args.logins)),
+        (f"process pool x{args.workers}", passwords.PasswordHasher(workers=args.workers, queue_limit=args.logins)),
+        (f"process pool x{args.workers}, limit {args.queue_limit}",
+         passwords.PasswordHasher(workers=args.workers, queue_limit=args.queue_limit)),
+    ]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await client.get("/api/v1/courses", params={"limit": 10})
+        print(f"{'':32} {'/courses p50':>12} {'p99':>9} {'logins/s':>9} {'429s':>5}")
+        for label, hasher in modes:
+            if hasher.workers > 0:
+                await hasher.hash("warm up the pool")
+            p50, p99, rate, rejected = await run_mode(client, args, hasher)
+            print(f"{label:32} {p50:9.1f} ms {p99:6.0f} ms {rate:9.1f} {rejected:5}")
+    print(f"{args.logins} logins, {args.concurrency} at a time, bcrypt cost {passwords.BCRYPT_ROUNDS}, "
+          f"{os.cpu_count()} CPU(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=passwords.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--queue-limit", type=int, default=4)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 200)
+    with engine.begin() as conn:
+        seed_accounts(conn, args.accounts)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
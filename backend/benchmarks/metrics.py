@@ -0,0 +1,112 @@
+"""
+Overhead of request metrics
+
+Sends `--requests` requests to a trivial route on three otherwise identical
+apps: no middleware, the previous X-Process-Time middleware, and
+profiling.ProfilingMiddleware (query profile, histograms, counters, in-flight
+gauge, Server-Timing). Reports microseconds per request for each, then the
+cost of the metric updates alone and of rendering /metrics.
+
+Usage (from the backend directory):
+    python -m benchmarks.metrics --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from fastapi import FastAPI, Request
+
+import profiling
+from metrics import registry
+
+
+def build_app(http_middleware=None, asgi_middleware=None):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    if http_middleware is not None:
+        app.middleware("http")(http_middleware)
+    if asgi_middleware is not None:
+        app.add_middleware(asgi_middleware)
+    return app
+
+
+async def process_time_header(request: Request, call_next):
+    # Before: wall clock time only
+    start_time = time.time()
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = str(time.time() - start_time)
+    return response
+
+
+async def per_request(app, requests):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/items/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/items/{i}")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def recording_cost(iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        profiling.IN_FLIGHT.inc()
+        profiling.IN_FLIGHT.dec()
+        profiling.REQUEST_DURATION.observe(0.004, "GET", "/bench")
+        profiling.REQUESTS.inc("GET", "/bench", "200")
+        profiling.REQUEST_QUERIES.observe(2, "GET", "/bench")
+        profiling.REQUEST_DB_DURATION.observe(0.001, "GET", "/bench")
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def render_cost(routes, repeat=20):
+    for i in range(routes):
+        for status in ("200", "404"):
+            profiling.REQUESTS.inc("GET", f"/route/{i}", status)
+        profiling.REQUEST_DURATION.observe(0.01, "GET", f"/route/{i}")
+        profiling.REQUEST_QUERIES.observe(3, "GET", f"/route/{i}")
+        profiling.REQUEST_DB_DURATION.observe(0.002, "GET", f"/route/{i}")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = registry.render()
+    return (time.perf_counter() - start) / repeat * 1000, len(text.splitlines())
+
+
+async def run(args):
+    baseline = await per_request(build_app(), args.requests)
+    results = [
+        ("no middleware", baseline),
+        ("X-Process-Time middleware", await per_request(build_app(process_time_header), args.requests)),
+        ("profiling middleware", await per_request(build_app(asgi_middleware=profiling.ProfilingMiddleware),
+                                                   args.requests)),
+    ]
+    print(f"{'':28} {'us/request':>10} {'vs none':>9}")
+    for label, cost in results:
+        print(f"{label:28} {cost:10.1f} {cost - baseline:+9.1f}")
+    print(f"metric updates alone: {recording_cost(args.requests * 10):.2f} us/request")
+    render_ms, lines = render_cost(args.routes)
+    print(f"/metrics render with {args.routes} routes: {render_ms:.1f} ms ({lines} lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--routes", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Notification fan-out: one insert per student vs batched executemany
+
+Enrolls `--students` students in one course and announces to it:
+
+- one insert per student: an INSERT statement for each recipient in one
+  transaction (the obvious implementation)
+- batched: services.notifications.fan_out with each of `--batch-sizes`
+
+and reports rows per second, statements, and the worst event-loop stall
+seen while it ran (the fan-out runs on the job worker inside an app
+process). A second run of the same job must add no rows. Then reads the
+unread count of one student with and without the cache.
+
+Usage (from the backend directory):
+    python -m benchmarks.notifications --students 100000 --batch-sizes 500,1000,2000,10000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import delete, func, insert, select, update
+
+from cache import cache
+from database import AsyncSessionLocal, async_engine, count_queries, engine
+from models import Course, Enrollment, Notification
+from services import jobs, notifications
+
+from benchmarks.certificates import LoopLag
+from benchmarks.seed import create_schema, seed_courses, seed_users
+
+
+def seed(args):
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        conn.execute(update(Course).values(status="published"))
+        user_ids = seed_users(conn, args.students)
+        for start in range(0, len(user_ids), 5000):
+            conn.execute(insert(Enrollment), [
+                {"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id}
+                for user_id in user_ids[start:start + 5000]
+            ])
+    return course_id, user_ids
+
+
+def announcement(course_id):
+    key = f"notification:{uuid.uuid4()}"
+    return {"key": key, "course_id": course_id, "title": "Live session scheduled",
+            "message": "Week 3 Q&A starts tomorrow at 18:00 UTC.", "type": "live_session",
+            "link": "/live-sessions/week-3", "created_at": "2026-01-05T12:00:00"}
+
+
+async def one_per_student(worker, payload):
+    # Before: an INSERT per recipient
+    async with worker.session_factory() as db:
+        for user_id in await notifications.recipients(db, payload["course_id"]):
+            await db.execute(insert(Notification).values(
+                id=str(uuid.uuid4()), user_id=user_id, title=payload["title"], message=payload["message"],
+                type=payload["type"], read=False, link=payload["link"],
+            ))
+        await db.commit()
+
+
+async def timed(fan_out, worker, payload):
+    lag = LoopLag()
+    ticker = asyncio.create_task(lag.run())
+    try:
+        with count_queries(async_engine.sync_engine) as statements:
+            start = time.perf_counter()
+            await fan_out(worker, payload)
+            elapsed = time.perf_counter() - start
+    finally:
+        ticker.cancel()
+    return elapsed, len(statements), lag.worst
+
+
+async def stored():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(Notification))).scalar_one()
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Notification))
+        await db.commit()
+    await cache.clear()
+
+
+async def unread_rate(user_id, reads, cached):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for _ in range(reads):
+            if not cached:
+                await cache.clear()
+            await notifications.unread_count(db, user_id)
+    return reads / (time.perf_counter() - start)
+
+
+async def run(args, course_id, user_ids):
+    worker = jobs.JobWorker(processes=0)
+    cases = [("one insert per student", one_per_student)] + [
+        (f"batched, {size} per batch", lambda worker, payload, size=size: notifications.fan_out(worker, payload, size))
+        for size in args.batch_sizes
+    ]
+    print(f"{'':28} {'rows/s':>9} {'seconds':>8} {'statements':>11} {'worst loop stall':>17}")
+    for label, fan_out in cases:
+        await reset()
+        payload = announcement(course_id)
+        elapsed, statements, stall = await timed(fan_out, worker, payload)
+        rows = await stored()
+        assert rows == len(user_ids), f"{label}: {rows} rows for {len(user_ids)} students"
+        print(f"{label:28} {rows / elapsed:9.0f} {elapsed:8.1f} {statements:11} {stall * 1000:14.0f} ms")
+        if fan_out is not one_per_student:
+            await fan_out(worker, payload)
+            assert await stored() == rows, f"{label}: running the job again added rows"
+
+    # A few more announcements, so the count has something to count
+    for _ in range(args.announcements - 1):
+        await notifications.fan_out(worker, announcement(course_id))
+    uncached = await unread_rate(user_ids[0], args.reads, cached=False)
+    cached = await unread_rate(user_ids[0], args.reads, cached=True)
+    print(f"unread count, {args.announcements} unread: {uncached:.0f}/s from the database, {cached:.0f}/s cached")
+    print(f"{len(user_ids)} enrolled students; running each batched job twice left no duplicates")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--batch-sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[500, 1000, 2000, 10000])
+    parser.add_argument("--announcements", type=int, default=5)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    course_id, user_ids = seed(args)
+    asyncio.run(run(args, course_id, user_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Progress write throughput: one request per lecture with a full recount vs
+batched upserts with incremental progress
+
+Usage (from the backend directory):
+    python -m benchmarks.progress --enrollments 30 --batch 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import delete, func, select, update
+
+from database import AsyncSessionLocal, engine
+from models import Course, Enrollment, Lecture, ProgressItem, Section
+from services import progress
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum, seed_enrollments, seed_users
+
+
+async def naive_complete(db, enrollment_id, lecture_id, total):
+    # What the endpoint would do without batching: read-modify-write one
+    # item, then recount every item to recompute the percentage
+    item = (await db.execute(select(ProgressItem).where(
+        ProgressItem.enrollment_id == enrollment_id, ProgressItem.lecture_id == lecture_id
+    ))).scalar_one_or_none()
+    if item is None:
+        db.add(ProgressItem(id=str(uuid.uuid4()), enrollment_id=enrollment_id, lecture_id=lecture_id,
+                            completed=True, completion_date=datetime.utcnow()))
+    else:
+        item.completed = True
+    await db.flush()
+    done = (await db.execute(select(func.count()).select_from(ProgressItem).where(
+        ProgressItem.enrollment_id == enrollment_id, ProgressItem.completed.is_(True)
+    ))).scalar_one()
+    await db.execute(update(Enrollment).where(Enrollment.id == enrollment_id).values(progress=done * 100.0 / total))
+    await db.commit()
+
+
+async def run_naive(enrollment_ids, lecture_ids):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        for enrollment_id in enrollment_ids:
+            for lecture_id in lecture_ids:
+                await naive_complete(db, enrollment_id, lecture_id, len(lecture_ids))
+        return time.perf_counter() - start
+
+
+async def run_batched(enrollment_ids, lecture_ids, course_id, batch):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        for enrollment_id in enrollment_ids:
+            for i in range(0, len(lecture_ids), batch):
+                updates = {lecture_id: True for lecture_id in lecture_ids[i:i + batch]}
+                await progress.apply_progress(db, enrollment_id, course_id, updates)
+        return time.perf_counter() - start
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ProgressItem))
+        await db.execute(update(Enrollment).values(completed_lectures=0, progress=0, status="active"))
+        await db.commit()
+
+
+async def run(args, course_id, lecture_ids, enrollment_ids):
+    writes = len(lecture_ids) * len(enrollment_ids)
+    naive = await run_naive(enrollment_ids, lecture_ids)
+    print(f"{'one per request + recount':32} {writes / naive:10.0f} completions/s")
+    for batch in (1, args.batch, len(lecture_ids)):
+        await reset()
+        elapsed = await run_batched(enrollment_ids, lecture_ids, course_id, batch)
+        print(f"{f'batched upsert, batch={batch}':32} {writes / elapsed:10.0f} completions/s")
+    async with AsyncSessionLocal() as db:
+        statuses = (await db.execute(select(Enrollment.status).where(Enrollment.id.in_(enrollment_ids)))).scalars()
+        assert set(statuses) == {"completed"}, "every enrollment should end completed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--enrollments", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--lectures", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        seed_curriculum(conn, course_id, args.sections, args.lectures)
+        lecture_ids = conn.execute(
+            select(Lecture.id).join(Section).where(Section.course_id == course_id)
+        ).scalars().all()
+        conn.execute(update(Course).values(lectures_count=len(lecture_ids)))
+        enrollment_ids = seed_enrollments(conn, seed_users(conn, args.enrollments), [course_id], 1, review_ratio=0)
+    asyncio.run(run(args, course_id, lecture_ids, enrollment_ids))
+
+
+if __name__ == "__main__":
+    main()
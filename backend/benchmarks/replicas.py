@@ -0,0 +1,181 @@
+"""
+Read replica routing: which database each request's session reads from
+
+Seeds a primary SQLite file, copies it to `--replicas` replica files and
+points DATABASE_REPLICA_URLS at them, then counts the sessions that use
+each engine while the app serves:
+
+- reads: `--requests` GET requests for catalog pages, course pages and
+  reviews, which should be spread evenly over the replicas
+- read-your-writes: a user updates their profile and reads it straight
+  back, which should go to the primary, then again after
+  REPLICA_STICKY_SECONDS, which should go to a replica
+- failover: one replica's file disappears; after the request that finds
+  it gone, reads go to the others, and a health check brings it back once
+  the file returns
+
+SQLite files stand in for replicas here; nothing replicates between them,
+so a read routed to a replica after a write would see the old row.
+
+Usage (from the backend directory):
+    python -m benchmarks.replicas --replicas 2 --requests 300
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# The replica URLs have to be in the environment before database.py is imported
+DIRECTORY = tempfile.mkdtemp()
+REPLICAS = int(sys.argv[sys.argv.index("--replicas") + 1]) if "--replicas" in sys.argv else 2
+REPLICA_PATHS = [os.path.join(DIRECTORY, f"replica{i}", "bench.db") for i in range(REPLICAS)]
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(DIRECTORY, 'primary.db')}")
+os.environ.setdefault("DATABASE_REPLICA_URLS", ",".join(f"sqlite:///{path}" for path in REPLICA_PATHS))
+os.environ.setdefault("REPLICA_STICKY_SECONDS", "1")
+os.environ.setdefault("JOB_WORKER_ENABLED", "0")
+
+import httpx
+from sqlalchemy import event, select
+
+import auth
+from database import REPLICA_STICKY_SECONDS, async_engine, engine, replicas
+from main import app
+from models import Course
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum, seed_enrollments, seed_users
+
+
+def seed(args):
+    create_schema(engine)
+    seed_courses(engine, args.courses)
+    with engine.begin() as conn:
+        course_ids = conn.execute(select(Course.id)).scalars().all()
+        for course_id in course_ids:
+            seed_curriculum(conn, course_id, 3, 5)
+        user_ids = seed_users(conn, 200)
+        seed_enrollments(conn, user_ids, course_ids, 2)
+    return user_ids[0], course_ids
+
+
+def copy_to_replicas():
+    source = sqlite3.connect(make_path(os.environ["DATABASE_URL"]))
+    for path in REPLICA_PATHS:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+    source.close()
+
+
+def make_path(url):
+    return url.split("sqlite:///", 1)[1]
+
+
+class Counter:
+    """
+    Connections taken from each engine while active: one per session that
+    ran a statement there
+    """
+
+    def __init__(self):
+        self.engines = {"primary": async_engine.sync_engine}
+        self.engines.update({f"replica{i}": replica.sync_engine for i, replica in enumerate(replicas.engines)})
+        self._counts = dict.fromkeys(self.engines, 0)
+        self._listeners = {name: self._listener(name) for name in self.engines}
+
+    def _listener(self, name):
+        def engine_connect(conn):
+            self._counts[name] += 1
+        return engine_connect
+
+    def __enter__(self):
+        for name, bind in self.engines.items():
+            event.listen(bind, "engine_connect", self._listeners[name])
+        return self
+
+    def __exit__(self, *exc):
+        for name, bind in self.engines.items():
+            event.remove(bind, "engine_connect", self._listeners[name])
+
+    def counts(self):
+        return dict(self._counts)
+
+
+async def reads(client, course_ids, requests):
+    statuses = {}
+    with Counter() as counter:
+        for i in range(requests):
+            course_id = course_ids[i % len(course_ids)]
+            url = ("/api/v1/courses", f"/api/v1/courses/{course_id}", f"/api/v1/courses/{course_id}/reviews")[i % 3]
+            response = await client.get(url, params={"limit": 5, "page": 1 + i % 7} if i % 3 == 0 else None)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return statuses, counter.counts()
+
+
+async def read_your_writes(client, user_id):
+    headers = {"Authorization": f"Bearer {auth.create_access_token(user_id)}"}
+    response = await client.patch(f"/api/v1/users/{user_id}", json={"bio": "Updated"}, headers=headers)
+    assert response.status_code == 200, response.text
+    with Counter() as right_after:
+        bio = (await client.get("/api/v1/auth/me", headers=headers)).json()["bio"]
+    await asyncio.sleep(REPLICA_STICKY_SECONDS + 0.1)
+    await auth.invalidate_user(user_id)  # or /auth/me answers from the cached principal
+    with Counter() as later:
+        stale = (await client.get("/api/v1/auth/me", headers=headers)).json()["bio"]
+    return bio, right_after.counts(), stale, later.counts()
+
+
+async def failover(client, course_ids, requests):
+    gone = replicas.engines[0]
+    await gone.dispose()
+    shutil.move(os.path.dirname(REPLICA_PATHS[0]), os.path.join(DIRECTORY, "moved"))
+    statuses, counts = await reads(client, course_ids, requests)
+    down = [f"replica{i}" for i, replica in enumerate(replicas.engines) if replica not in replicas.up]
+    shutil.move(os.path.join(DIRECTORY, "moved"), os.path.dirname(REPLICA_PATHS[0]))
+    await replicas.check()
+    return statuses, counts, down, len(replicas.up)
+
+
+async def run(args, user_id, course_ids):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statuses, counts = await reads(client, course_ids, args.requests)
+        print(f"{'reads':24} statuses {statuses}  sessions {counts}")
+        spread = [count for name, count in counts.items() if name != "primary"]
+        if counts["primary"] or max(spread) - min(spread) > 1:
+            raise SystemExit("Reads were not spread evenly over the replicas")
+
+        bio, after_write, stale, later = await read_your_writes(client, user_id)
+        print(f"{'read after own write':24} bio {bio!r}  sessions {after_write}")
+        print(f"{'after the sticky window':24} bio {stale!r}  sessions {later}  (replica files do not replicate)")
+        if bio != "Updated" or later["primary"]:
+            raise SystemExit("Read-your-writes routing is wrong")
+
+        statuses, counts, down, up = await failover(client, course_ids, args.requests)
+        print(f"{'one replica gone':24} statuses {statuses}  sessions {counts}  down {down}")
+        print(f"{'after a health check':24} {up} of {len(replicas.engines)} replicas up")
+        if up != len(replicas.engines) or not down:
+            raise SystemExit("Failover did not take the replica out and back")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    user_id, course_ids = seed(args)
+    copy_to_replicas()
+    start = time.perf_counter()
+    asyncio.run(run(args, user_id, course_ids))
+    print(f"{len(replicas.engines)} replicas, {args.requests} reads per phase, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Course search benchmark: full-text index vs a naive ILIKE '%term%' scan
+
+Runs against SQLite (FTS5) by default; point DATABASE_URL at a scratch
+Postgres database to measure the tsvector/GIN path instead.
+
+Usage (from the backend directory):
+    python -m benchmarks.search --courses 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import func
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from database import AsyncSessionLocal, engine
+from services import catalog, search
+
+from benchmarks.seed import VOCABULARY, create_schema, seed_courses
+
+QUERIES = ["python", "machine learning", "photo", VOCABULARY[2000], VOCABULARY[4000][:3]]
+NAIVE_DIALECT = "default"  # any dialect without a search index takes the LIKE path
+
+
+async def timed(dialect, terms, repeat, limit):
+    """
+    Best-of-`repeat` time for the first ranked page, and the total match count
+    """
+    best = float("inf")
+    async with AsyncSessionLocal() as db:
+        query, rank = search.apply_search(catalog.catalog_query(sort=catalog.RELEVANCE), dialect, terms)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            (await db.execute(query.order_by(rank).limit(limit))).all()
+            best = min(best, time.perf_counter() - start)
+        count = (await db.execute(query.with_only_columns(func.count()))).scalar_one()
+    return best * 1000, count
+
+
+async def run(args):
+    dialect = engine.dialect.name
+    print(f"{'query':20} {'index ms':>10} {'ILIKE ms':>10} {'matches':>8}")
+    for text in QUERIES:
+        terms = search.search_terms(text)
+        indexed_ms, count = await timed(dialect, terms, args.repeat, args.limit)
+        naive_ms, _ = await timed(NAIVE_DIALECT, terms, args.repeat, args.limit)
+        print(f"{text:20} {indexed_ms:10.2f} {naive_ms:10.2f} {count:8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    start = time.perf_counter()
+    seed_courses(engine, args.courses)
+    print(f"seeded {args.courses} courses in {time.perf_counter() - start:.1f}s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
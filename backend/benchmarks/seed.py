@@ -0,0 +1,232 @@
+"""
+Synthetic data helpers shared by the benchmarks
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from database import Base
+from models import Assignment, Course, Enrollment, Lecture, Notification, ProgressItem, Quiz, Review, Section, User
+
+CATEGORIES = ["Programming", "Data Science", "Design", "Business", "Marketing", "Music", "Languages", "Finance"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+TOPICS = (
+    "python web design data machine learning guitar finance marketing react sql cloud "
+    "security photography spanish writing statistics leadership excel drawing yoga"
+).split()
+SYLLABLES = "ka lo mi ne ru sa ti vo ze an el is or um".split()
+
+
+def vocabulary(size=5000, seed=7):
+    """
+    Pseudo-words with a long tail, so most search terms are selective
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+VOCABULARY = vocabulary()
+
+
+def _words(rng, count):
+    # Zipf-like: low indexes are common, the tail is rare
+    return [VOCABULARY[min(int(rng.paretovariate(1.2)) - 1, len(VOCABULARY) - 1)] for _ in range(count)]
+
+
+def create_schema(engine):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def seed_instructor(conn):
+    user_id = str(uuid.uuid4())
+    conn.execute(insert(User), [{
+        "id": user_id,
+        "name": "Benchmark Instructor",
+        "email": f"instructor-{user_id}@example.com",
+        "hashed_password": "!",
+        "role": "teacher",
+    }])
+    return user_id
+
+
+def course_rows(count, instructor_id, seed=42, published_ratio=0.9):
+    """
+    Yield course rows with a realistic spread of categories, levels and ratings
+    """
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        title = " ".join([rng.choice(TOPICS)] + rng.sample(VOCABULARY, 3)).title()
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "title": f"{title} {i}",
+            "slug": f"course-{i}",
+            "description": " ".join(_words(rng, 40)),
+            "short_description": " ".join([rng.choice(TOPICS)] + _words(rng, 11)),
+            "price": round(rng.uniform(0, 200), 2),
+            "instructor_id": instructor_id,
+            "category": rng.choice(CATEGORIES),
+            "level": rng.choice(LEVELS),
+            "status": "published" if rng.random() < published_ratio else "draft",
+            "rating": round(rng.uniform(1, 5), 1),
+            "created_at": start + timedelta(minutes=i),
+            "updated_at": start + timedelta(minutes=i),
+        }
+
+
+def seed_courses(engine, count, batch_size=5000):
+    """
+    Insert `count` courses owned by one instructor and return the instructor id
+    """
+    with engine.begin() as conn:
+        instructor_id = seed_instructor(conn)
+        batch = []
+        for row in course_rows(count, instructor_id):
+            batch.append(row)
+            if len(batch) == batch_size:
+                conn.execute(insert(Course), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Course), batch)
+    return instructor_id
+
+
+def curriculum_rows(course_id, sections, lectures_per_section, seed=42):
+    """
+    Yield (model, row) pairs for a course tree; every fifth lecture is a quiz
+    and every seventh an assignment
+    """
+    rng = random.Random(seed)
+    for s in range(sections):
+        section_id = str(uuid.uuid4())
+        yield Section, {"id": section_id, "course_id": course_id, "title": f"Section {s + 1}", "order": s}
+        for n in range(lectures_per_section):
+            lecture_id = str(uuid.uuid4())
+            kind = "quiz" if n % 5 == 4 else "assignment" if n % 7 == 6 else "video"
+            yield Lecture, {
+                "id": lecture_id,
+                "section_id": section_id,
+                "title": " ".join(_words(rng, 5)).capitalize(),
+                "description": " ".join(_words(rng, 30)),
+                "type": kind,
+                "content": f"https://video.example.com/{lecture_id}",
+                "duration": f"{rng.randint(2, 40)}:00",
+                "preview": s == 0 and n == 0,
+                "order": n,
+            }
+            if kind == "quiz":
+                yield Quiz, {"id": str(uuid.uuid4()), "title": "Checkpoint", "course_id": course_id,
+                             "lecture_id": lecture_id, "pass_score": 70}
+            elif kind == "assignment":
+                yield Assignment, {"id": str(uuid.uuid4()), "title": "Exercise", "description": "Practice",
+                                   "course_id": course_id, "lecture_id": lecture_id}
+
+
+def seed_curriculum(conn, course_id, sections, lectures_per_section):
+    """
+    Insert a curriculum under `course_id` using one executemany per table
+    """
+    batches = {}
+    for model, row in curriculum_rows(course_id, sections, lectures_per_section):
+        batches.setdefault(model, []).append(row)
+    for model in (Section, Lecture, Quiz, Assignment):
+        if batches.get(model):
+            conn.execute(insert(model), batches[model])
+
+
+def seed_users(conn, count, role="student", batch_size=5000):
+    """
+    Insert `count` users and return their ids
+    """
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    for start in range(0, count, batch_size):
+        conn.execute(insert(User), [
+            {"id": user_id, "name": f"Student {start + i}", "email": f"{user_id}@example.com",
+             "hashed_password": "!", "role": role}
+            for i, user_id in enumerate(ids[start:start + batch_size])
+        ])
+    return ids
+
+
+def seed_enrollments(conn, user_ids, course_ids, per_user, review_ratio=0.3, seed=42, batch_size=5000):
+    """
+    Enroll each user in `per_user` distinct courses (popular courses get more
+    students) and have some of them leave a review. Returns enrollment ids.
+    """
+    rng = random.Random(seed)
+    enrollments, reviews, enrollment_ids = [], [], []
+
+    def flush():
+        if enrollments:
+            conn.execute(insert(Enrollment), enrollments)
+        if reviews:
+            conn.execute(insert(Review), reviews)
+        enrollments.clear()
+        reviews.clear()
+
+    for user_id in user_ids:
+        chosen = set()
+        while len(chosen) < min(per_user, len(course_ids)):
+            chosen.add(course_ids[min(int(rng.paretovariate(0.8)) - 1, len(course_ids) - 1)])
+        for course_id in chosen:
+            enrollment_id = str(uuid.uuid4())
+            enrollment_ids.append(enrollment_id)
+            enrollments.append({"id": enrollment_id, "user_id": user_id, "course_id": course_id})
+            if rng.random() < review_ratio:
+                reviews.append({"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id,
+                                "rating": rng.choice([3, 4, 4, 5, 5])})
+        if len(enrollments) >= batch_size:
+            flush()
+    flush()
+    return enrollment_ids
+
+
+def seed_progress(conn, enrollments, lectures_by_course, completion=0.3, seed=42, batch_size=5000):
+    """
+    Mark lectures completed for each (enrollment id, course id) in
+    `enrollments`, in course order; students finish `completion` of their
+    courses on average. Returns the number of progress items.
+    """
+    rng = random.Random(seed)
+    batch, total = [], 0
+    for enrollment_id, course_id in enrollments:
+        lectures = lectures_by_course.get(course_id, [])
+        done = min(len(lectures), int(len(lectures) * rng.random() * 2 * completion))
+        batch.extend(
+            {"id": str(uuid.uuid4()), "enrollment_id": enrollment_id, "lecture_id": lecture_id, "completed": True}
+            for lecture_id in lectures[:done]
+        )
+        if len(batch) >= batch_size:
+            conn.execute(insert(ProgressItem), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(ProgressItem), batch)
+        total += len(batch)
+    return total
+
+
+def seed_notifications(conn, user_ids, per_user, read_ratio=0.7, seed=42, batch_size=5000):
+    """
+    Insert `per_user` notifications for each user, most of them read
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for user_id in user_ids:
+        for n in range(per_user):
+            batch.append({"id": str(uuid.uuid4()), "user_id": user_id, "title": f"Announcement {n + 1}",
+                          "message": " ".join(_words(rng, 20)), "type": "announcement",
+                          "read": rng.random() < read_ratio, "created_at": start + timedelta(hours=n)})
+        if len(batch) >= batch_size:
+            conn.execute(insert(Notification), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(Notification), batch)
@@ -0,0 +1,105 @@
+"""
+Response serialization: CPU per course page, before and after typed schemas
+
+Seeds one course with `--sections` x `--lectures` lectures and times the
+work FastAPI does between the route returning and the body being sent, with
+the same field and response classes the app uses:
+
+- jsonable_encoder + JSONResponse: the route returns a dict and has no
+  response_model (before)
+- response_model + JSONResponse: schemas.CourseDetail validates and
+  serializes the dict, the stdlib json module encodes it
+- response_model + ORJSONResponse: the same, encoded by orjson (after)
+- from the ORM tree: a cache miss, CourseDetail built from the loaded Course
+
+and reports CPU microseconds per response and the body size. Fails unless
+every case produces the same JSON.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization --sections 10 --lectures 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal, engine
+from main import app
+from models import Course
+from services import curriculum
+
+from benchmarks.seed import create_schema, seed_courses, seed_curriculum
+
+
+def seed(args):
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        conn.execute(update(Course).values(status="published"))
+        seed_curriculum(conn, course_id, args.sections, args.lectures)
+    return course_id
+
+
+def course_field():
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == "/api/v1/courses/{course_id}":
+            return route.secure_cloned_response_field
+    raise LookupError("GET /api/v1/courses/{course_id} is not registered")
+
+
+async def cpu_per_response(field, content, response_class, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        body = response_class(await serialize_response(field=field, response_content=content)).body
+    return (time.process_time() - start) / repeat, body
+
+
+async def run(args, course_id):
+    field = course_field()
+    async with AsyncSessionLocal() as db:
+        page = await curriculum.get_course_detail(db, course_id=course_id)
+        course = await curriculum.load_course(db, course_id=course_id)
+        lectures = sum(len(section.lectures) for section in course.sections)
+
+        print(f"{'':36} {'us/response':>12} {'body bytes':>11}")
+        bodies, before = [], None
+        for label, case_field, content, response_class in (
+            ("jsonable_encoder + JSONResponse", None, page, JSONResponse),
+            ("response_model + JSONResponse", field, page, JSONResponse),
+            ("response_model + ORJSONResponse", field, page, ORJSONResponse),
+            ("from the ORM tree + ORJSONResponse", field, course, ORJSONResponse),
+        ):
+            seconds, body = await cpu_per_response(case_field, content, response_class, args.repeat)
+            before = before or seconds
+            bodies.append(json.loads(body))
+            print(f"{label:36} {seconds * 1e6:12.0f} {len(body):11}  ({before / seconds:.1f}x)")
+
+    if any(body != bodies[0] for body in bodies[1:]):
+        raise SystemExit("Serialized course pages differ")
+    print(f"{lectures} lectures in {len(course.sections)} sections; every case produced the same JSON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--lectures", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    course_id = seed(args)
+    asyncio.run(run(args, course_id))
+
+
+if __name__ == "__main__":
+    main()
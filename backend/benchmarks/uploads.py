@@ -0,0 +1,210 @@
+"""
+Upload memory ceiling: streaming uploads vs reading the whole body
+
+Pushes `--size-gb` of generated data through the resumable upload routes
+(local storage) and through S3Storage.put (an in-process S3 stand-in that
+only hashes what it receives), sampling the process RSS while they run. Exits
+with status 1 if RSS grows by more than `--ceiling-mb` during either, so it
+can gate CI. For comparison, `--naive-mb` of data is read into memory the way
+`await file.read()` would.
+
+Usage (from the backend directory):
+    python -m benchmarks.uploads --size-gb 2 --ceiling-mb 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}")
+os.environ.setdefault("STORAGE_ROOT", os.path.join(WORK_DIR, "uploads"))
+
+import httpx
+from jose import jwt
+
+import storage as storage_module
+from auth import SECRET_KEY
+from database import engine
+from main import app
+
+from benchmarks.seed import create_schema, seed_users
+
+CHUNK = 1024 * 1024
+MB = 1024 * 1024
+
+
+def rss():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class RssSampler:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.baseline = rss()
+        self.peak = self.baseline
+
+    async def run(self):
+        while True:
+            self.peak = max(self.peak, rss())
+            await asyncio.sleep(self.interval)
+
+    @property
+    def growth_mb(self):
+        return (self.peak - self.baseline) / MB
+
+
+async def sample(coro):
+    sampler = RssSampler()
+    task = asyncio.create_task(sampler.run())
+    start = time.perf_counter()
+    try:
+        result = await coro
+    finally:
+        task.cancel()
+        sampler.peak = max(sampler.peak, rss())
+    return result, time.perf_counter() - start, sampler.growth_mb
+
+
+async def generated(size, digest=None):
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        chunk = block[:min(CHUNK, size - sent)]
+        if digest is not None:
+            digest.update(chunk)
+        sent += len(chunk)
+        yield chunk
+
+
+class FakeS3:
+    """
+    The subset of the boto3 S3 client used by S3Storage. Bodies are read in
+    chunks and only hashed, like a remote server would consume them.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+
+    def _consume(self, body):
+        digest, size = hashlib.md5(), 0
+        while chunk := body.read(CHUNK):
+            digest.update(chunk)
+            size += len(chunk)
+        return size, f'"{digest.hexdigest()}"'
+
+    def put_object(self, Bucket, Key, Body, ContentLength):
+        self.objects[Key] = self._consume(Body)[0]
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = os.urandom(8).hex()
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, ContentLength):
+        size, etag = self._consume(Body)
+        self.uploads[UploadId][PartNumber] = (size, etag)
+        return {"ETag": etag}
+
+    def list_parts(self, Bucket, Key, UploadId):
+        parts = self.uploads[UploadId]
+        return {"Parts": [{"PartNumber": n, "Size": s, "ETag": e} for n, (s, e) in sorted(parts.items())]}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.objects[Key] = sum(size for size, _ in self.uploads.pop(UploadId).values())
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+async def resumable_upload(client, headers, size, part_size):
+    upload = (await client.post("/api/v1/media/uploads", json={"type": "video", "filename": "lecture.mp4"},
+                                headers=headers)).json()
+    digest = hashlib.sha256()
+    part_number, sent = 1, 0
+    while sent < size:
+        length = min(part_size, size - sent)
+        response = await client.put(
+            f"/api/v1/media/uploads/{upload['upload_id']}/parts/{part_number}",
+            content=generated(length, digest), headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        sent += length
+        part_number += 1
+    stored = (await client.post(f"/api/v1/media/uploads/{upload['upload_id']}/complete", headers=headers)).json()
+    assert stored["size"] == size and stored["sha256"] == digest.hexdigest(), stored
+    return stored
+
+
+async def s3_upload(size):
+    backend = storage_module.S3Storage(FakeS3(), bucket="bench")
+    digest = hashlib.sha256()
+    stored = await backend.put("media/bench/video/lecture.mp4", generated(size, digest))
+    assert stored["size"] == size and stored["sha256"] == digest.hexdigest(), stored
+    assert backend.client.objects["media/bench/video/lecture.mp4"] == size
+    return stored
+
+
+async def naive_read(size):
+    # What `await file.read()` does: the whole payload in one bytes object
+    return b"".join([chunk async for chunk in generated(size)])
+
+
+async def run(args, user_id):
+    size = int(args.size_gb * 1024 * MB)
+    headers = {"Authorization": "Bearer " + jwt.encode({"sub": user_id}, SECRET_KEY)}
+    failed = False
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        _, elapsed, growth = await sample(resumable_upload(client, headers, size, args.part_mb * MB))
+    print(f"{'resumable upload, local':28} {size / MB:8.0f} MB {size / MB / elapsed:8.0f} MB/s  RSS +{growth:6.1f} MB")
+    failed |= growth > args.ceiling_mb
+
+    _, elapsed, growth = await sample(s3_upload(size))
+    print(f"{'streamed put, S3 stand-in':28} {size / MB:8.0f} MB {size / MB / elapsed:8.0f} MB/s  RSS +{growth:6.1f} MB")
+    failed |= growth > args.ceiling_mb
+
+    if args.naive_mb:
+        naive_size = args.naive_mb * MB
+        _, elapsed, growth = await sample(naive_read(naive_size))
+        print(f"{'await file.read()':28} {naive_size / MB:8.0f} MB {naive_size / MB / elapsed:8.0f} MB/s  RSS +{growth:6.1f} MB")
+
+    if failed:
+        print(f"FAIL: streaming upload grew RSS by more than {args.ceiling_mb} MB")
+        return 1
+    print(f"OK: streaming uploads stayed under {args.ceiling_mb} MB of RSS growth")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-gb", type=float, default=2)
+    parser.add_argument("--part-mb", type=int, default=256)
+    parser.add_argument("--ceiling-mb", type=int, default=64)
+    parser.add_argument("--naive-mb", type=int, default=512)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    with engine.begin() as conn:
+        user_id = seed_users(conn, 1, role="teacher")[0]
+    try:
+        code = asyncio.run(run(args, user_id))
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
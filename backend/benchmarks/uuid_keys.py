@@ -0,0 +1,140 @@
+"""
+Id columns: index size and insert throughput, string vs native UUID keys
+
+Inserts `--rows` progress_items (completions across `--lectures` lectures
+of many enrollments) and `--rows` quiz_answers into a fresh SQLite database
+for each of:
+
+- string ids, UUIDv4: the columns as they were, 36-character strings
+- GUID, UUIDv4: 16-byte keys, still random
+- GUID, UUIDv7: 16-byte, time-ordered keys (ids.new_id)
+
+and reports insert rows per second and the bytes taken by each table and
+by its indexes (primary key, unique constraints), from SQLite's dbstat.
+
+Usage (from the backend directory):
+    python -m benchmarks.uuid_keys --rows 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import MetaData, String, create_engine, insert, text
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import Base
+from ids import GUID, new_id
+
+TABLES = ("progress_items", "quiz_answers")
+
+
+def string_metadata():
+    # The tables as they were before GUID columns
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        for column in copy.columns:
+            if isinstance(column.type, GUID):
+                column.type = String()
+    return metadata
+
+
+def uuid4():
+    return str(uuid.uuid4())
+
+
+def progress_rows(args, make_id):
+    enrollments = [make_id() for _ in range(args.rows // args.lectures)]
+    lectures = [make_id() for _ in range(args.lectures)]
+    # Students complete lectures in order: each lecture, then the next
+    for lecture_id in lectures:
+        for enrollment_id in enrollments:
+            yield {"id": make_id(), "enrollment_id": enrollment_id, "lecture_id": lecture_id, "completed": True}
+
+
+def answer_rows(args, make_id):
+    questions = [make_id() for _ in range(args.questions)]
+    options = {question_id: [make_id() for _ in range(4)] for question_id in questions}
+    for _ in range(args.rows // args.questions):
+        submission_id = make_id()
+        for question_id in questions:
+            yield {"id": make_id(), "submission_id": submission_id, "question_id": question_id,
+                   "selected_option_id": options[question_id][0], "is_correct": True}
+
+
+def timed_insert(engine, table, rows, batch_size):
+    batch, count, elapsed = [], 0, 0.0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            elapsed += _insert(engine, table, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        elapsed += _insert(engine, table, batch)
+        count += len(batch)
+    return count / elapsed
+
+
+def _insert(engine, table, batch):
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(table), batch)
+    return time.perf_counter() - start
+
+
+def sizes(engine, table):
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT s.name = m.tbl_name, sum(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.tbl_name = :table GROUP BY s.name = m.tbl_name"
+        ), {"table": table}).all()
+    by_kind = {bool(is_table): size for is_table, size in rows}
+    return by_kind.get(True, 0), by_kind.get(False, 0)
+
+
+def run_case(args, metadata, make_id):
+    path = os.path.join(tempfile.mkdtemp(), "ids.db")
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine, tables=[metadata.tables[name] for name in TABLES])
+    results = {}
+    for name, rows in (("progress_items", progress_rows(args, make_id)), ("quiz_answers", answer_rows(args, make_id))):
+        rate = timed_insert(engine, metadata.tables[name], rows, args.batch_size)
+        results[name] = (rate, *sizes(engine, name))
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--lectures", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    cases = (
+        ("string ids, UUIDv4", string_metadata(), uuid4),
+        ("GUID, UUIDv4", Base.metadata, uuid4),
+        ("GUID, UUIDv7", Base.metadata, new_id),
+    )
+    print(f"{'':20} {'table':16} {'rows/s':>9} {'table MB':>9} {'index MB':>9}")
+    baseline = None
+    for label, metadata, make_id in cases:
+        results = run_case(args, metadata, make_id)
+        baseline = baseline or results
+        for name, (rate, table_bytes, index_bytes) in results.items():
+            ratio = baseline[name][2] / index_bytes
+            print(f"{label:20} {name:16} {rate:9.0f} {table_bytes / 2**20:9.1f} {index_bytes / 2**20:9.1f}"
+                  f"  (indexes {ratio:.2f}x smaller)")
+    print(f"{args.rows} rows per table, {args.batch_size} per insert, sqlite")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Certificate verification: database lookup per request vs signed codes
+
+Issues `--certificates` certificates, then sends `--requests` requests to
+GET /certificates/verify/{code} for genuine codes, well-formed codes with a
+bad signature and random garbage, and reports requests per second and
+database statements per request. The baseline looks every code up in the
+database, which is what the route did before codes were signed.
+
+Usage (from the backend directory):
+    python -m benchmarks.verification --certificates 10000 --requests 5000
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import secrets
+import string
+import tempfile
+import time
+import uuid
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+
+from database import AsyncSessionLocal, async_engine, count_queries, engine
+from main import app
+from models import Certificate, Course
+from services import certificates
+
+from benchmarks.seed import create_schema, seed_courses, seed_enrollments, seed_users
+
+
+def seed_certificates(conn, user_ids, course_id):
+    codes = [certificates.verification_code(user_id, course_id) for user_id in user_ids]
+    conn.execute(insert(Certificate), [
+        {"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id,
+         "certificate_url": f"/uploads/certificates/{course_id}/{user_id}.pdf", "verification_code": code}
+        for user_id, code in zip(user_ids, codes)
+    ])
+    return codes
+
+
+def forged_code():
+    # Right length and alphabet, signature does not match
+    return base64.b32encode(secrets.token_bytes(16)).decode().rstrip("=")
+
+
+def garbage_code(rng):
+    return "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(4, 40)))
+
+
+async def lookup_verify(db, code):
+    # Before: every request is a database lookup
+    row = (await db.execute(
+        certificates._verification_query().where(Certificate.verification_code == code)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Certificate not found")
+    return certificates._verification_detail(row)
+
+
+async def direct(verify, codes):
+    found = 0
+    with count_queries(async_engine.sync_engine) as statements:
+        start = time.perf_counter()
+        for code in codes:
+            async with AsyncSessionLocal() as db:
+                try:
+                    await verify(db, code)
+                    found += 1
+                except HTTPException:
+                    pass
+        elapsed = time.perf_counter() - start
+    return len(codes) / elapsed, len(statements) / len(codes), found
+
+
+async def over_http(client, codes):
+    found = 0
+    with count_queries(async_engine.sync_engine) as statements:
+        start = time.perf_counter()
+        for code in codes:
+            response = await client.get(f"/api/v1/certificates/verify/{code}")
+            found += response.status_code == 200
+        elapsed = time.perf_counter() - start
+    return len(codes) / elapsed, len(statements) / len(codes), found
+
+
+async def run(args, codes):
+    rng = random.Random(42)
+    sets = {
+        "valid": [rng.choice(codes) for _ in range(args.requests)],
+        "bad signature": [forged_code() for _ in range(args.requests)],
+        "random garbage": [garbage_code(rng) for _ in range(args.requests)],
+    }
+    loaded = await certificates.preload_verified()
+    print(f"preloaded {loaded} verified codes")
+    print(f"{'':32} {'requests/s':>12} {'statements/request':>20}")
+    for label, verify in (("database lookup", lookup_verify), ("signed codes", certificates.verify)):
+        for kind, sample in sets.items():
+            rate, statements, found = await direct(verify, sample)
+            assert found == (len(sample) if kind == "valid" else 0), (label, kind, found)
+            print(f"{label + ', ' + kind:32} {rate:12.0f} {statements:20.2f}")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for kind, sample in sets.items():
+            rate, statements, found = await over_http(client, sample)
+            assert found == (len(sample) if kind == "valid" else 0), ("http", kind, found)
+            print(f"{'GET verify, ' + kind:32} {rate:12.0f} {statements:20.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--certificates", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        user_ids = seed_users(conn, args.certificates)
+        seed_enrollments(conn, user_ids, [course_id], 1, review_ratio=0)
+        codes = seed_certificates(conn, user_ids, course_id)
+    asyncio.run(run(args, codes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Cache configuration for the Vaikuntha Institute Learning Platform
+
+Two interchangeable backends with the same async interface:
+
+- MemoryCache: per-process LRU with TTL and a size bound (the default)
+- RedisCache: shared across workers; pass any redis.asyncio-compatible client
+
+Entries can carry tags. Invalidating a tag drops every entry stored under it,
+so write routes only need to know which object changed, not which keys were
+derived from it. Each tag also has a version; a reader that loaded data
+before an invalidation cannot store it afterwards (see `versions`/`set`).
+
+With the memory backend invalidations only reach the worker that handled the
+write; other workers serve their copy until it expires. Use CACHE_BACKEND=redis
+when running more than one worker.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))  # seconds
+# Tag versions the memory backend remembers; older ones are forgotten
+CACHE_MAX_TAG_VERSIONS = int(os.getenv("CACHE_MAX_TAG_VERSIONS", "16384"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class MemoryCache:
+    """
+    In-process LRU cache. Values are stored by reference; treat them as read-only.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL, clock=time.monotonic,
+                 max_tag_versions=CACHE_MAX_TAG_VERSIONS):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.max_tag_versions = max_tag_versions
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        # Versions come from one counter, so they only grow. The least
+        # recently invalidated tags are forgotten past max_tag_versions;
+        # a forgotten tag reads as the highest version forgotten so far,
+        # which is at least what any reader saw before its last invalidation.
+        self._tag_versions = OrderedDict()  # tag -> version
+        self._version_counter = 0
+        self._version_floor = 0
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value, tags = entry
+        if expires_at <= self.clock():
+            self._remove(key)
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def versions(self, tags):
+        return tuple(self._tag_versions.get(tag, self._version_floor) for tag in tags)
+
+    async def set(self, key, value, ttl=None, tags=(), versions=None):
+        """
+        Store `value`. If `versions` (from an earlier `versions(tags)` call) is
+        stale, one of the tags was invalidated meanwhile and nothing is stored.
+        """
+        if versions is not None and versions != await self.versions(tags):
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + (ttl or self.default_ttl), value, tuple(tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+        return True
+
+    async def delete(self, key):
+        self._remove(key)
+
+    async def invalidate_tags(self, *tags):
+        for tag in tags:
+            self._bump(tag)
+            for key in self._tags.pop(tag, ()):
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        # Readers that looked up versions before the clear cannot store
+        self._tag_versions.clear()
+        self._version_counter += 1
+        self._version_floor = self._version_counter
+
+    def _bump(self, tag):
+        self._version_counter += 1
+        self._tag_versions[tag] = self._version_counter
+        self._tag_versions.move_to_end(tag)
+        while len(self._tag_versions) > self.max_tag_versions:
+            _, version = self._tag_versions.popitem(last=False)
+            self._version_floor = max(self._version_floor, version)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """
+    Redis-backed cache. Values are stored as JSON; tag membership is kept in
+    Redis sets and tag versions in counters, so invalidation works across workers.
+    Evictions are done by Redis itself and are not counted here.
+    """
+
+    # Checks the tag versions and stores the entry in one step, so an
+    # invalidation cannot land between the check and the write.
+    # KEYS: entry, version keys..., tag keys...
+    # ARGV: value, ttl, entry name (for the tag sets), check (0/1), versions...
+    SET_SCRIPT = """
+    local count = (#KEYS - 1) / 2
+    if ARGV[4] == '1' then
+        for i = 1, count do
+            if tonumber(redis.call('GET', KEYS[1 + i]) or '0') ~= tonumber(ARGV[4 + i]) then
+                return 0
+            end
+        end
+    end
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    for i = 1, count do
+        redis.call('SADD', KEYS[1 + count + i], ARGV[3])
+        redis.call('EXPIRE', KEYS[1 + count + i], ARGV[2])
+    end
+    return 1
+    """
+
+    def __init__(self, client, prefix="vaikuntha:cache:", default_ttl=CACHE_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._set_script = client.register_script(self.SET_SCRIPT)
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def _version_key(self, tag):
+        return f"{self.prefix}tagv:{tag}"
+
+    async def get(self, key):
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    async def versions(self, tags):
+        if not tags:
+            return ()
+        values = await self.client.mget([self._version_key(tag) for tag in tags])
+        return tuple(int(value or 0) for value in values)
+
+    async def set(self, key, value, ttl=None, tags=(), versions=None):
+        tags = tuple(tags)
+        stored = await self._set_script(
+            keys=[self._key(key), *(self._version_key(tag) for tag in tags), *(self._tag_key(tag) for tag in tags)],
+            args=[json.dumps(value), ttl or self.default_ttl, key, 0 if versions is None else 1, *(versions or ())],
+        )
+        return bool(stored)
+
+    async def delete(self, key):
+        await self.client.delete(self._key(key))
+
+    async def invalidate_tags(self, *tags):
+        for tag in tags:
+            await self.client.incr(self._version_key(tag))
+            keys = await self.client.smembers(self._tag_key(tag))
+            if keys:
+                await self.client.delete(*(self._key(_decode(key)) for key in keys))
+                self.stats.invalidations += len(keys)
+            await self.client.delete(self._tag_key(tag))
+
+    async def clear(self):
+        # Only used by tooling; scans this cache's prefix
+        async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            await self.client.delete(key)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def create_cache(backend=CACHE_BACKEND):
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return RedisCache(redis.from_url(REDIS_URL))
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}'")
+
+
+# Shared cache instance
+cache = create_cache()
+
+
+# Tags and keys for cached objects
+def course_tag(course_id):
+    return f"course:{course_id}"
+
+
+def slug_tag(slug):
+    return f"course-slug:{slug}"
+
+
+def quiz_tag(quiz_id):
+    return f"quiz:{quiz_id}"
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def schedule_tag(user_id):
+    return f"schedule:{user_id}"
+
+
+def live_sessions_tag(course_id):
+    return f"live-sessions:{course_id}"
+
+
+def live_session_tag(session_id):
+    return f"live-session:{session_id}"
+
+
+def inbox_tag(user_id):
+    return f"inbox:{user_id}"
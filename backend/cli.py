@@ -0,0 +1,118 @@
+"""
+Command line tools for the Vaikuntha Institute Learning Platform
+
+Bulk course export and import (see services/course_transfer.py), run
+against DATABASE_URL directly rather than through the API:
+
+    python cli.py export [--course-id ID ...] [--instructor EMAIL] [-o courses.ndjson]
+    python cli.py import courses.ndjson --instructor EMAIL [--resume]
+
+An import writes the number of lines committed to `<file>.checkpoint` after
+every batch; `--resume` skips that many lines. The checkpoint is removed
+once the whole file is in.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select
+
+from database import AsyncSessionLocal
+from ids import id_bytes, id_str
+from models import Course, User
+from services import course_transfer
+
+
+async def find_user(db, key):
+    # By email, or by id
+    user = (await db.execute(
+        select(User).where(or_(User.email == key, User.id == id_str(id_bytes(key))))
+    )).scalars().first()
+    if user is None:
+        raise SystemExit(f"No user '{key}'")
+    return user
+
+
+async def export_courses(args):
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with AsyncSessionLocal() as db:
+            courses = select(Course.id)
+            if args.instructor:
+                courses = courses.where(Course.instructor_id == (await find_user(db, args.instructor)).id)
+            if args.course_id:
+                courses = courses.where(Course.id.in_(args.course_id))
+            async for chunk in course_transfer.export_lines(db, courses):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+async def read_lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line.rstrip(b"\r\n")
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+async def import_courses(args):
+    checkpoint = f"{args.file}.checkpoint"
+    skip = read_checkpoint(checkpoint) if args.resume else 0
+
+    async def save_checkpoint(committed):
+        # Write then rename, so an interrupted run never leaves a torn file
+        with open(f"{checkpoint}.tmp", "w") as f:
+            f.write(str(committed))
+        os.replace(f"{checkpoint}.tmp", checkpoint)
+        print(f"{committed} lines committed", file=sys.stderr)
+
+    async with AsyncSessionLocal() as db:
+        user = await find_user(db, args.instructor)
+        try:
+            summary = await course_transfer.import_lines(
+                db, user, read_lines(args.file), skip=skip, batch_size=args.batch_size, on_commit=save_checkpoint,
+            )
+        except HTTPException as exc:
+            raise SystemExit(f"Import stopped: {json.dumps(exc.detail)}\nRun again with --resume to continue")
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    print(json.dumps(summary))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vaikuntha Institute command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write courses and their content as NDJSON")
+    export.add_argument("--course-id", action="append", help="Course to export (repeatable); default all")
+    export.add_argument("--instructor", help="Only this instructor's courses (email or id)")
+    export.add_argument("-o", "--output", help="File to write; default stdout")
+    export.set_defaults(handler=export_courses)
+
+    import_ = commands.add_parser("import", help="Load courses from an NDJSON export")
+    import_.add_argument("file")
+    import_.add_argument("--instructor", required=True,
+                         help="Importing user (email or id); courses are assigned to them unless they are an admin")
+    import_.add_argument("--resume", action="store_true", help="Skip the lines committed by an earlier run")
+    import_.add_argument("--batch-size", type=int, default=None,
+                         help=f"Records per transaction (default {course_transfer.IMPORT_BATCH_SIZE})")
+    import_.set_defaults(handler=import_courses)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+HTTP caching helpers for the Vaikuntha Institute Learning Platform
+
+Routes compute cheap validators (an ETag and a Last-Modified time) before
+loading or serializing anything. If the client's copy is still current they
+answer 304 with no body; otherwise the validators and Cache-Control are set
+on the normal response.
+"""
+
+import hashlib
+import os
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+PUBLIC_MAX_AGE = int(os.getenv("HTTP_PUBLIC_MAX_AGE", "60"))  # seconds
+PUBLIC_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_STALE_WHILE_REVALIDATE", "300"))  # seconds
+
+# Shared caches (CDN) may store public catalog responses; browsers revalidate
+# with If-None-Match once max-age has passed
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age={PUBLIC_MAX_AGE}, stale-while-revalidate={PUBLIC_STALE_WHILE_REVALIDATE}"
+)
+
+
+def weak_etag(*parts):
+    """
+    Weak ETag built from anything that changes when the representation does
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value):
+    # Timestamps are stored as naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _not_modified_since(header, last_modified):
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional(request, response, etag, last_modified=None, cache_control=PUBLIC_CACHE_CONTROL):
+    """
+    Set caching headers on `response` and return a 304 response if the
+    request's If-None-Match / If-Modified-Since show the client is current,
+    otherwise None.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,101 @@
+"""
+Row ids for the Vaikuntha Institute Learning Platform
+
+Every primary and foreign key is a GUID column: a native UUID on
+PostgreSQL, 16 raw bytes (BLOB) on SQLite, where the 36-character strings it
+replaces took 2.25x the space in every key and index entry. Application code
+keeps handling ids as their canonical strings; the column type converts on
+the way in and out.
+
+New ids are UUIDv7 (RFC 9562): a 48-bit millisecond timestamp followed by
+a counter and random bits, so rows inserted together land next to each
+other in the primary key index instead of on random pages as UUIDv4 ids do.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+# Bound in place of strings that are not UUIDs; no row has it, so looking up
+# a malformed id finds nothing instead of raising
+NIL_UUID = uuid.UUID(int=0)
+
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """
+    Time-ordered UUID: unix milliseconds, a 12-bit counter, 62 random bits.
+    The counter (RFC 9562 method 1) keeps ids from one process increasing
+    within a millisecond too, so each insert appends to the index.
+    """
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms, _counter = ms, int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms, _counter = _last_ms + 1, 0
+        ms, counter = _last_ms, _counter
+    value = (ms & (1 << 48) - 1) << 80 | 0x7 << 76 | counter << 64 | 0x2 << 62
+    return uuid.UUID(int=value | int.from_bytes(os.urandom(8), "big") >> 2)
+
+
+def new_id():
+    return str(uuid7())
+
+
+def id_bytes(value):
+    """
+    The 16 bytes of a UUID string, or of NIL_UUID if it is not one
+    """
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    try:
+        raw = bytes.fromhex(value.replace("-", ""))
+    except (TypeError, ValueError, AttributeError):
+        return NIL_UUID.bytes
+    return raw if len(raw) == 16 else NIL_UUID.bytes
+
+
+def id_str(raw):
+    # str(uuid.UUID(bytes=raw)), without building the UUID
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+class GUID(TypeDecorator):
+    """
+    UUID column: postgresql UUID, BLOB(16) elsewhere. Values are str.
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return id_str(id_bytes(value))
+        return id_bytes(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return str(value)
+        return id_str(value)
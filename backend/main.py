@@ -2,25 +2,59 @@
 Main FastAPI application for the Vaikuntha Institute Learning Platform
 """
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import time
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))  # seconds
+
 # Import API routes
 from api.routes import router as api_router
+from cache import cache
+from database import async_engine, engine, replicas
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry, sample_event_loop_lag
+from passwords import hasher
+import profiling
+from services import aggregates, certificates, jobs
+from services.progress_buffer import buffer as progress_buffer
+
+# Background tasks run for the lifetime of the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(progress_buffer.run()),
+        asyncio.create_task(certificates.preload_verified()),
+        asyncio.create_task(sample_event_loop_lag(LOOP_LAG_INTERVAL)),
+    ]
+    if aggregates.RECONCILE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(aggregates.reconcile_periodically()))
+    if jobs.JOB_WORKER_ENABLED:
+        tasks.append(asyncio.create_task(jobs.worker.run()))
+    if replicas.engines:
+        tasks.append(asyncio.create_task(replicas.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await progress_buffer.close()
+    await jobs.worker.close()
+    await hasher.close()
 
 # Create FastAPI app
 app = FastAPI(
     title="Vaikuntha Institute API",
     description="API for the Vaikuntha Institute online learning platform",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -38,20 +72,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add middleware for request timing
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Request timing: X-Process-Time and Server-Timing headers, latency, query
+# count and in-flight requests on /metrics
+profiling.instrument(engine, async_engine.sync_engine, *(replica.sync_engine for replica in replicas.engines))
+profiling.register_pool_metrics({
+    "sync": engine,
+    "async": async_engine.sync_engine,
+    **{f"replica{i}": replica.sync_engine for i, replica in enumerate(replicas.engines)},
+})
+app.add_middleware(profiling.ProfilingMiddleware)
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Cache counters
+@app.get("/health/cache")
+async def cache_stats():
+    return {"backend": type(cache).__name__, **cache.stats.as_dict()}
+
+# Password hashing pool
+@app.get("/health/passwords")
+async def password_hasher_stats():
+    return hasher.stats()
+
+# Latency percentiles per route, estimated from the /metrics histograms
+@app.get("/health/latency")
+async def latency_stats():
+    return profiling.latency_summary()
+
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,203 @@
+"""
+Metrics for the Vaikuntha Institute Learning Platform
+
+Counters, gauges and fixed-bucket histograms kept in process memory and
+served on GET /metrics in the Prometheus text format. Each worker process
+reports its own values; Prometheus adds them up across workers.
+
+Recording is meant to be cheap enough for every request: no locks (updates
+come from the event loop thread; one racing with a thread-pool thread can at
+worst lose an increment), a dict lookup and a bisect per observation, and
+all formatting deferred to `render`. Gauges that read other objects (pool
+sizes) are callbacks evaluated only when scraped.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        for label_values, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._callbacks = {}
+
+    def set(self, value, *label_values):
+        self._values[label_values] = value
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set_function(self, func, *label_values):
+        """
+        Read the value from `func()` at scrape time
+        """
+        self._callbacks[label_values] = func
+
+    def value(self, *label_values):
+        if label_values in self._callbacks:
+            return self._callbacks[label_values]()
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        values = dict(self._values)
+        for label_values, func in self._callbacks.items():
+            values[label_values] = func()
+        for label_values, value in sorted(values.items()):
+            if value is not None:
+                yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [count per bucket (+Inf last), sum]
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def series(self):
+        return list(self._series)
+
+    def quantile(self, q, *label_values):
+        """
+        Estimate a quantile by linear interpolation inside its bucket, as
+        Prometheus' histogram_quantile does. Values in the +Inf bucket are
+        reported as the largest finite bound.
+        """
+        series = self._series.get(label_values)
+        if not series:
+            return None
+        counts = series[0]
+        rank = q * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def samples(self):
+        for label_values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                yield f"{self.name}_bucket", _format_labels(self.labels, label_values, le), cumulative
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry
+registry = Registry()
+
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a sleeping task", buckets=LOOP_LAG_BUCKETS
+)
+EVENT_LOOP_LAG_LAST = registry.gauge("event_loop_lag_last_seconds", "Most recent event loop lag sample")
+
+
+async def sample_event_loop_lag(interval=0.5):
+    """
+    Background task: sleep `interval` and record how much later than that
+    the loop resumed us. Sustained lag means something blocks the loop.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
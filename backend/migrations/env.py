@@ -0,0 +1,37 @@
+"""
+Alembic environment for the Vaikuntha Institute Learning Platform
+
+Runs against the database in DATABASE_URL, using the app's sync engine.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import DATABASE_URL, Base, engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,145 @@
+"""
+Store primary and foreign keys as UUIDs instead of strings
+
+Converts every id column listed in ID_COLUMNS in place:
+
+- PostgreSQL: drops the foreign keys between them, changes each column to
+  the native uuid type (`USING column::uuid`, which also rebuilds its
+  indexes) and recreates the foreign keys.
+- SQLite: rewrites each value as its 16 raw bytes. Column types are only
+  declarations there, so the tables (and the full-text search triggers on
+  courses) are left as they are.
+
+Databases created from the current models need no conversion; run
+`alembic stamp 0001` on them instead. Fails without changing anything if a
+column holds a value that is not a UUID.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Every GUID column in models.py, by table
+ID_COLUMNS = {
+    "jobs": ("id",),
+    "users": ("id",),
+    "courses": ("id", "instructor_id"),
+    "notifications": ("id", "user_id"),
+    "support_tickets": ("id", "user_id", "assigned_to_id"),
+    "certificates": ("id", "user_id", "course_id"),
+    "enrollments": ("id", "user_id", "course_id"),
+    "live_sessions": ("id", "course_id", "instructor_id"),
+    "payments": ("id", "user_id", "course_id"),
+    "reviews": ("id", "user_id", "course_id"),
+    "sections": ("id", "course_id"),
+    "ticket_responses": ("id", "ticket_id", "user_id"),
+    "lectures": ("id", "section_id"),
+    "live_session_participants": ("id", "session_id", "user_id"),
+    "assignments": ("id", "course_id", "lecture_id"),
+    "progress_items": ("id", "enrollment_id", "lecture_id"),
+    "quizzes": ("id", "course_id", "lecture_id"),
+    "assignment_submissions": ("id", "assignment_id", "user_id"),
+    "quiz_questions": ("id", "quiz_id"),
+    "quiz_submissions": ("id", "quiz_id", "user_id"),
+    "quiz_options": ("id", "question_id"),
+    "quiz_answers": ("id", "submission_id", "question_id", "selected_option_id"),
+}
+
+UUID_PATTERN = "^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
+
+def _tables(bind):
+    existing = set(sa.inspect(bind).get_table_names())
+    return [table for table in ID_COLUMNS if table in existing]
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+        return True
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def _to_bytes(value):
+    return uuid.UUID(value).bytes if isinstance(value, str) else value
+
+
+def _to_text(value):
+    return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+
+def _invalid(bind, column):
+    if bind.dialect.name == "postgresql":
+        return f"{column} !~ '{UUID_PATTERN}'"
+    return f"typeof({column}) = 'text' AND NOT is_uuid({column})"
+
+
+def _check_values(bind):
+    problems = []
+    for table in _tables(bind):
+        for column in ID_COLUMNS[table]:
+            count = bind.execute(sa.text(
+                f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL AND {_invalid(bind, column)}"
+            )).scalar_one()
+            if count:
+                problems.append(f"{table}.{column}: {count} rows")
+    if problems:
+        raise RuntimeError("Ids that are not UUIDs, fix or remove them first: " + ", ".join(problems))
+
+
+def _convert_sqlite(bind, function):
+    connection = bind.connection.driver_connection
+    connection.create_function("is_uuid", 1, _is_uuid, deterministic=True)
+    connection.create_function("convert_id", 1, function, deterministic=True)
+    if function is _to_bytes:
+        _check_values(bind)
+    for table in _tables(bind):
+        assignments = ", ".join(f"{column} = convert_id({column})" for column in ID_COLUMNS[table])
+        op.execute(f"UPDATE {table} SET {assignments}")
+
+
+def _convert_postgresql(bind, type_, cast):
+    inspector = sa.inspect(bind)
+    tables = _tables(bind)
+    foreign_keys = [
+        (table, key) for table in tables for key in inspector.get_foreign_keys(table)
+        if set(key["constrained_columns"]) <= set(ID_COLUMNS[table])
+    ]
+    for table, key in foreign_keys:
+        op.drop_constraint(key["name"], table, type_="foreignkey")
+    for table in tables:
+        for column in ID_COLUMNS[table]:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {type_} USING {column}::{cast}")
+    for table, key in foreign_keys:
+        op.create_foreign_key(
+            key["name"], table, key["referred_table"], key["constrained_columns"], key["referred_columns"],
+            **key.get("options", {}),
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        _check_values(bind)
+        _convert_postgresql(bind, "uuid", "uuid")
+    else:
+        _convert_sqlite(bind, _to_bytes)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        _convert_postgresql(bind, "varchar", "text")
+    else:
+        _convert_sqlite(bind, _to_text)
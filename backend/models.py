@@ -2,19 +2,19 @@
 Database models for the Vaikuntha Institute Learning Platform
 """
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, DateTime, Enum, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, DateTime, Enum, JSON, Table, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
-import uuid
 from database import Base
+from ids import GUID, new_id
 
 # User model
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     hashed_password = Column(String, nullable=False)
@@ -33,7 +33,7 @@ class User(Base):
     assignment_submissions = relationship("AssignmentSubmission", back_populates="user")
     payments = relationship("Payment", back_populates="user")
     certificates = relationship("Certificate", back_populates="user")
-    support_tickets = relationship("SupportTicket", back_populates="user")
+    support_tickets = relationship("SupportTicket", back_populates="user", foreign_keys="SupportTicket.user_id")
     ticket_responses = relationship("TicketResponse", back_populates="user")
     notifications = relationship("Notification", back_populates="user")
 
@@ -41,7 +41,7 @@ class User(Base):
 class Course(Base):
     __tablename__ = "courses"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     title = Column(String, nullable=False)
     slug = Column(String, unique=True, nullable=False, index=True)
     description = Column(Text)
@@ -49,7 +49,7 @@ class Course(Base):
     thumbnail = Column(String)
     price = Column(Float, nullable=False)
     discount_price = Column(Float)
-    instructor_id = Column(String, ForeignKey("users.id"), nullable=False)
+    instructor_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     category = Column(String, nullable=False)
     level = Column(String, nullable=False)
     duration = Column(String)
@@ -58,6 +58,9 @@ class Course(Base):
     status = Column(String, default="draft")
     enrollments_count = Column(Integer, default=0)
     rating = Column(Float, default=0)
+    # Running totals behind `rating`, maintained by services.aggregates
+    rating_sum = Column(Float, default=0, nullable=False)
+    ratings_count = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -69,12 +72,70 @@ class Course(Base):
     live_sessions = relationship("LiveSession", back_populates="course")
     certificates = relationship("Certificate", back_populates="course")
 
+    # Catalog indexes: each one matches a filter + sort combination used by
+    # services.catalog, ending in id so keyset pagination is an index range scan
+    __table_args__ = (
+        Index("ix_courses_catalog_rating", "status", "category", "level", "rating", "id"),
+        Index("ix_courses_catalog_newest", "status", "category", "level", "created_at", "id"),
+        Index("ix_courses_status_rating", "status", "rating", "id"),
+        Index("ix_courses_status_newest", "status", "created_at", "id"),
+    )
+
+# Course full-text search (queried by services.search). The search structures
+# live outside the ORM because their DDL is specific to each database.
+COURSE_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE courses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX ix_courses_search_vector ON courses USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE courses_fts USING fts5(
+            title, short_description, description,
+            content='courses', tokenize='porter unicode61', prefix='2 3'
+        )
+        """,
+        "INSERT INTO courses_fts(courses_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')",
+        """
+        CREATE TRIGGER courses_fts_insert AFTER INSERT ON courses BEGIN
+            INSERT INTO courses_fts(rowid, title, short_description, description)
+            VALUES (new.rowid, new.title, new.short_description, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER courses_fts_delete AFTER DELETE ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, title, short_description, description)
+            VALUES ('delete', old.rowid, old.title, old.short_description, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER courses_fts_update AFTER UPDATE OF title, short_description, description ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, title, short_description, description)
+            VALUES ('delete', old.rowid, old.title, old.short_description, old.description);
+            INSERT INTO courses_fts(rowid, title, short_description, description)
+            VALUES (new.rowid, new.title, new.short_description, new.description);
+        END
+        """,
+    ],
+}
+
+for dialect, statements in COURSE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Course.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+event.listen(Course.__table__, "after_drop", DDL("DROP TABLE IF EXISTS courses_fts").execute_if(dialect="sqlite"))
+
 # Section model
 class Section(Base):
     __tablename__ = "sections"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     order = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -88,8 +149,8 @@ class Section(Base):
 class Lecture(Base):
     __tablename__ = "lectures"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    section_id = Column(String, ForeignKey("sections.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    section_id = Column(GUID, ForeignKey("sections.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
     type = Column(String, nullable=False)  # video, quiz, assignment, text
@@ -110,12 +171,13 @@ class Lecture(Base):
 class Enrollment(Base):
     __tablename__ = "enrollments"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
     enrollment_date = Column(DateTime, default=datetime.utcnow)
     completion_date = Column(DateTime)
     progress = Column(Float, default=0)  # percentage
+    completed_lectures = Column(Integer, default=0, nullable=False)  # maintained by services.progress
     status = Column(String, default="active")  # active, completed, refunded
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -125,13 +187,22 @@ class Enrollment(Base):
     course = relationship("Course", back_populates="enrollments")
     progress_items = relationship("ProgressItem", back_populates="enrollment")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_enrollments_user_course"),
+        Index("ix_enrollments_course_status", "course_id", "status"),
+        # A user's current courses (services.live_sessions schedule)
+        Index("ix_enrollments_user_status", "user_id", "status"),
+        # A course's students in user order (services.notifications pages through them)
+        Index("ix_enrollments_course_user", "course_id", "user_id"),
+    )
+
 # Progress tracking model
 class ProgressItem(Base):
     __tablename__ = "progress_items"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    enrollment_id = Column(String, ForeignKey("enrollments.id"), nullable=False)
-    lecture_id = Column(String, ForeignKey("lectures.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    enrollment_id = Column(GUID, ForeignKey("enrollments.id"), nullable=False)
+    lecture_id = Column(GUID, ForeignKey("lectures.id"), nullable=False)
     completed = Column(Boolean, default=False)
     completion_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -141,15 +212,19 @@ class ProgressItem(Base):
     enrollment = relationship("Enrollment", back_populates="progress_items")
     lecture = relationship("Lecture", back_populates="progress_items")
 
+    __table_args__ = (
+        UniqueConstraint("enrollment_id", "lecture_id", name="uq_progress_items_enrollment_lecture"),
+    )
+
 # Quiz model
 class Quiz(Base):
     __tablename__ = "quizzes"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     title = Column(String, nullable=False)
     description = Column(Text)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
-    lecture_id = Column(String, ForeignKey("lectures.id"))
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
+    lecture_id = Column(GUID, ForeignKey("lectures.id"))
     time_limit = Column(Integer)  # in minutes
     pass_score = Column(Float, nullable=False)  # percentage
     attempts = Column(Integer, default=1)
@@ -165,8 +240,8 @@ class Quiz(Base):
 class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    quiz_id = Column(String, ForeignKey("quizzes.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    quiz_id = Column(GUID, ForeignKey("quizzes.id"), nullable=False, index=True)
     text = Column(Text, nullable=False)
     type = Column(String, nullable=False)  # multiple-choice, true-false, matching
     points = Column(Float, default=1)
@@ -181,8 +256,8 @@ class QuizQuestion(Base):
 class QuizOption(Base):
     __tablename__ = "quiz_options"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    question_id = Column(String, ForeignKey("quiz_questions.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    question_id = Column(GUID, ForeignKey("quiz_questions.id"), nullable=False, index=True)
     text = Column(Text, nullable=False)
     is_correct = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -195,9 +270,9 @@ class QuizOption(Base):
 class QuizSubmission(Base):
     __tablename__ = "quiz_submissions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    quiz_id = Column(String, ForeignKey("quizzes.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    quiz_id = Column(GUID, ForeignKey("quizzes.id"), nullable=False)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     score = Column(Float, nullable=False)
     passed = Column(Boolean, nullable=False)
     time_spent = Column(Integer)  # in seconds
@@ -208,14 +283,19 @@ class QuizSubmission(Base):
     user = relationship("User", back_populates="quiz_submissions")
     answers = relationship("QuizAnswer", back_populates="submission")
 
+    __table_args__ = (
+        # Attempt counting per student
+        Index("ix_quiz_submissions_quiz_user", "quiz_id", "user_id"),
+    )
+
 # Quiz Answer model
 class QuizAnswer(Base):
     __tablename__ = "quiz_answers"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    submission_id = Column(String, ForeignKey("quiz_submissions.id"), nullable=False)
-    question_id = Column(String, ForeignKey("quiz_questions.id"), nullable=False)
-    selected_option_id = Column(String, ForeignKey("quiz_options.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    submission_id = Column(GUID, ForeignKey("quiz_submissions.id"), nullable=False)
+    question_id = Column(GUID, ForeignKey("quiz_questions.id"), nullable=False)
+    selected_option_id = Column(GUID, ForeignKey("quiz_options.id"), nullable=False)
     is_correct = Column(Boolean, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -226,11 +306,11 @@ class QuizAnswer(Base):
 class Assignment(Base):
     __tablename__ = "assignments"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
-    lecture_id = Column(String, ForeignKey("lectures.id"))
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
+    lecture_id = Column(GUID, ForeignKey("lectures.id"))
     due_date = Column(DateTime)
     points = Column(Float, default=100)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -244,9 +324,9 @@ class Assignment(Base):
 class AssignmentSubmission(Base):
     __tablename__ = "assignment_submissions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    assignment_id = Column(String, ForeignKey("assignments.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    assignment_id = Column(GUID, ForeignKey("assignments.id"), nullable=False)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     content = Column(Text)
     file_url = Column(String)
     grade = Column(Float)
@@ -262,9 +342,9 @@ class AssignmentSubmission(Base):
 class Review(Base):
     __tablename__ = "reviews"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
     rating = Column(Float, nullable=False)
     comment = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -274,13 +354,18 @@ class Review(Base):
     user = relationship("User", back_populates="reviews")
     course = relationship("Course", back_populates="reviews")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_reviews_user_course"),
+        Index("ix_reviews_course_created", "course_id", "created_at"),
+    )
+
 # Payment model
 class Payment(Base):
     __tablename__ = "payments"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String, nullable=False, default="USD")
     payment_method = Column(String, nullable=False)
@@ -296,29 +381,48 @@ class Payment(Base):
 class LiveSession(Base):
     __tablename__ = "live_sessions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     title = Column(String, nullable=False)
     description = Column(Text)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
-    instructor_id = Column(String, ForeignKey("users.id"), nullable=False)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
+    instructor_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     start_time = Column(DateTime, nullable=False)
     end_time = Column(DateTime, nullable=False)
     meeting_url = Column(String, nullable=False)
     status = Column(String, default="scheduled")
     max_participants = Column(Integer)
+    participants_count = Column(Integer, default=0, nullable=False)  # seats taken, maintained by services.live_sessions
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     course = relationship("Course", back_populates="live_sessions")
 
+    # Upcoming sessions of a course are a range scan on start_time
+    __table_args__ = (
+        Index("ix_live_sessions_course_start", "course_id", "start_time"),
+    )
+
+# Seats taken in a live session: one row per admitted user
+class LiveSessionParticipant(Base):
+    __tablename__ = "live_session_participants"
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    session_id = Column(GUID, ForeignKey("live_sessions.id"), nullable=False)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("session_id", "user_id", name="uq_live_session_participants_session_user"),
+    )
+
 # Certificate model
 class Certificate(Base):
     __tablename__ = "certificates"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    course_id = Column(GUID, ForeignKey("courses.id"), nullable=False)
     issue_date = Column(DateTime, default=datetime.utcnow)
     certificate_url = Column(String, nullable=False)
     verification_code = Column(String, nullable=False, unique=True)
@@ -327,12 +431,38 @@ class Certificate(Base):
     user = relationship("User", back_populates="certificates")
     course = relationship("Course", back_populates="certificates")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_certificates_user_course"),
+    )
+
+# Background job model
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    kind = Column(String, nullable=False)
+    key = Column(String, nullable=False, unique=True)  # idempotency key, e.g. certificate:{user_id}:{course_id}
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Workers claim the oldest runnable jobs
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
 # Notification model
 class Notification(Base):
     __tablename__ = "notifications"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
     type = Column(String, nullable=False)
@@ -343,18 +473,23 @@ class Notification(Base):
     # Relationships
     user = relationship("User", back_populates="notifications")
 
+    # Unread counts and the inbox, newest first
+    __table_args__ = (
+        Index("ix_notifications_user_read_created", "user_id", "read", "created_at"),
+    )
+
 # Support Ticket model
 class SupportTicket(Base):
     __tablename__ = "support_tickets"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     subject = Column(String, nullable=False)
     message = Column(Text, nullable=False)
     status = Column(String, default="open")
     priority = Column(String, default="medium")
     category = Column(String, nullable=False)
-    assigned_to_id = Column(String, ForeignKey("users.id"))
+    assigned_to_id = Column(GUID, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -366,9 +501,9 @@ class SupportTicket(Base):
 class TicketResponse(Base):
     __tablename__ = "ticket_responses"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    ticket_id = Column(String, ForeignKey("support_tickets.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    ticket_id = Column(GUID, ForeignKey("support_tickets.id"), nullable=False)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     message = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,112 @@
+"""
+Password hashing for the Vaikuntha Institute Learning Platform
+
+bcrypt at cost 12 is about 250ms of CPU per hash or check. Running it on the
+event loop stalls every request on the worker, and threads still contend for
+the GIL, so hashing has its own process pool:
+
+- PASSWORD_HASH_WORKERS processes (0 runs in the thread pool instead)
+- at most PASSWORD_HASH_QUEUE_LIMIT hashes in flight or waiting; beyond that
+  `HashingBusy` is raised and login/register answer 429 with Retry-After,
+  rather than queueing requests that would time out anyway
+- BCRYPT_ROUNDS sets the cost. A hash made with a different cost is replaced
+  on the next successful login (`verify_and_update`), so raising or lowering
+  the cost needs no migration.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(4 * max(PASSWORD_HASH_WORKERS, 1))))
+
+# min and max pinned to the configured cost: hashes with any other cost need updating
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# Run in the pool's processes; module-level so they can be pickled
+def _hash(password):
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password, hashed_password):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue_limit=PASSWORD_HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+        self._dummy_hash = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise HashingBusy(f"{self.pending} password hashes already queued")
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(func, *args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password):
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password, hashed_password):
+        """
+        Returns (valid, new_hash); new_hash is set when the stored hash used
+        a different cost and should be replaced
+        """
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    async def dummy_hash(self):
+        """
+        A hash at the configured cost to check against when the user does not
+        exist, so a login for an unknown email takes as long as a wrong password
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        return self._dummy_hash
+
+    def stats(self):
+        return {"workers": self.workers, "pending": self.pending, "queue_limit": self.queue_limit,
+                "rejected": self.rejected}
+
+    async def close(self):
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Shared hasher instance
+hasher = PasswordHasher()
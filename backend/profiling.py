@@ -0,0 +1,216 @@
+"""
+Per-request profiling and metrics for the Vaikuntha Institute Learning Platform
+
+SQLAlchemy cursor events on both engines time every statement and add it to
+the profile of the request that ran it (held in a context variable, which
+asyncio tasks and SQLAlchemy's async greenlets both inherit). Each response
+then carries
+
+    Server-Timing: db;dur=12.3;desc="4 queries", app;dur=20.1
+
+plus X-Process-Time (seconds, measured with a monotonic clock), and is
+counted in per-route histograms on /metrics alongside the number of requests
+in flight and connection pool usage. Requests slower than
+SLOW_REQUEST_MS, or running more than SLOW_REQUEST_QUERIES statements (the
+usual sign of an N+1), are logged as one JSON line with their slowest
+statement; statements slower than SLOW_QUERY_MS are logged on their own.
+"""
+
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+LOGGED_STATEMENT_LENGTH = 500
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time to handle a request", ("method", "route")
+)
+REQUESTS = registry.counter("http_requests_total", "Requests handled", ("method", "route", "status"))
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "Database statements run per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_DURATION = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in database statements per request", ("method", "route")
+)
+QUERY_DURATION = registry.histogram("db_query_duration_seconds", "Time to run one database statement")
+SLOW_QUERIES = registry.counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests being handled")
+POOL_SIZE = registry.gauge("db_pool_size", "Connections the pool keeps open", ("engine",))
+POOL_CHECKED_OUT = registry.gauge("db_pool_checked_out", "Connections in use", ("engine",))
+POOL_OVERFLOW = registry.gauge("db_pool_overflow", "Connections open beyond the pool size", ("engine",))
+
+
+class QueryProfile:
+    __slots__ = ("count", "duration", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def add(self, duration, statement):
+        self.count += 1
+        self.duration += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+
+_profile = ContextVar("query_profile", default=None)
+
+
+def current_profile():
+    return _profile.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    QUERY_DURATION.observe(duration)
+    profile = _profile.get()
+    if profile is not None:
+        profile.add(duration, statement)
+    if duration * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(duration * 1000, 1),
+            "statement": statement[:LOGGED_STATEMENT_LENGTH],
+        }))
+
+
+def _handle_error(context):
+    # The statement failed; after_cursor_execute will not run for it
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument(*engines):
+    """
+    Time every statement run on these (sync) engines; pass
+    `async_engine.sync_engine` for an async engine
+    """
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+        event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+        event.listen(bind, "handle_error", _handle_error)
+
+
+def _pool_stat(engine, name):
+    # Read at scrape time; engine.pool is replaced by dispose(), and pools
+    # other than QueuePool (SQLite in memory) have no size
+    def read():
+        method = getattr(engine.pool, name, None)
+        return method() if callable(method) else None
+    return read
+
+
+def register_pool_metrics(engines):
+    """
+    Report pool usage for each engine in {label: sync engine}
+    """
+    for label, bind in engines.items():
+        POOL_SIZE.set_function(_pool_stat(bind, "size"), label)
+        POOL_CHECKED_OUT.set_function(_pool_stat(bind, "checkedout"), label)
+        # QueuePool.overflow() is negative until the pool has opened `size` connections
+        overflow = _pool_stat(bind, "overflow")
+        POOL_OVERFLOW.set_function(lambda overflow=overflow: None if overflow() is None else max(0, overflow()), label)
+
+
+def latency_summary():
+    """
+    Estimated p50/p95/p99 latency in milliseconds per route
+    """
+    summary = {}
+    for method, route in REQUEST_DURATION.series():
+        summary[f"{method} {route}"] = {
+            "count": REQUEST_DURATION.count(method, route),
+            **{f"p{q}": round(REQUEST_DURATION.quantile(q / 100, method, route) * 1000, 1) for q in (50, 95, 99)},
+        }
+    return summary
+
+
+def route_name(scope):
+    # The route template, not the path, so ids do not multiply the series
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class ProfilingMiddleware:
+    """
+    Plain ASGI middleware: `@app.middleware("http")` runs the app in a
+    separate task and costs several hundred microseconds per request
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = _profile.set(profile)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={profile.duration * 1000:.1f};desc="{profile.count} queries", app;dur={elapsed * 1000:.1f}',
+                )
+                headers.append("X-Process-Time", str(elapsed))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            _profile.reset(token)
+            self.record(scope, status_code, time.perf_counter() - start, profile)
+
+    @staticmethod
+    def record(scope, status_code, elapsed, profile):
+        method, route = scope["method"], route_name(scope)
+        REQUEST_DURATION.observe(elapsed, method, route)
+        REQUESTS.inc(method, route, str(status_code))
+        REQUEST_QUERIES.observe(profile.count, method, route)
+        REQUEST_DB_DURATION.observe(profile.duration, method, route)
+        if elapsed * 1000 >= SLOW_REQUEST_MS or profile.count > SLOW_REQUEST_QUERIES:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": method,
+                "route": route,
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "db_ms": round(profile.duration * 1000, 1),
+                "queries": profile.count,
+                "slowest_query_ms": round(profile.slowest * 1000, 1),
+                "slowest_statement": (profile.slowest_statement or "")[:LOGGED_STATEMENT_LENGTH],
+            }))
@@ -0,0 +1,191 @@
+"""
+Response schemas for the Vaikuntha Institute Learning Platform
+
+Routes declare these as `response_model`, so FastAPI validates what they
+return (ORM objects or cached dicts) and serializes it with pydantic-core
+instead of walking it with jsonable_encoder; main.py sends the result with
+ORJSONResponse. Cached payloads are stored as `model_dump(mode="json")`
+and validate back into the same model.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, Field, model_validator
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+def _related_id(name, relationship):
+    # `quiz_id` in a cached dict, `lecture.quiz.id` on the ORM object
+    return Field(None, validation_alias=AliasChoices(name, AliasPath(relationship, "id")))
+
+
+# User schemas
+class UserPublic(Schema):
+    id: str
+    name: str
+    role: str
+    avatar: Optional[str] = None
+    bio: Optional[str] = None
+
+
+class UserDetail(UserPublic):
+    """
+    Profile as seen by its owner or an admin
+    """
+    email: str
+    is_active: Optional[bool] = None
+
+
+class InstructorSummary(Schema):
+    id: str
+    name: str
+    avatar: Optional[str] = None
+    bio: Optional[str] = None
+
+
+# Curriculum schemas
+class LectureDetail(Schema):
+    """
+    Lecture outline entry. Content is only included for free preview lectures.
+    """
+    id: str
+    section_id: str
+    title: str
+    description: Optional[str] = None
+    type: str
+    content: Optional[str] = None
+    duration: Optional[str] = None
+    preview: Optional[bool] = None
+    order: int
+    quiz_id: Optional[str] = _related_id("quiz_id", "quiz")
+    assignment_id: Optional[str] = _related_id("assignment_id", "assignment")
+
+    @model_validator(mode="after")
+    def _hide_content(self):
+        if not self.preview:
+            self.content = None
+        return self
+
+
+class SectionDetail(Schema):
+    id: str
+    course_id: str
+    title: str
+    order: int
+    lectures: List[LectureDetail] = []
+
+
+# Course schemas
+class CourseSummary(Schema):
+    """
+    Fields shown on catalog cards
+    """
+    id: str
+    title: str
+    slug: str
+    short_description: Optional[str] = None
+    thumbnail: Optional[str] = None
+    price: float
+    discount_price: Optional[float] = None
+    instructor_id: str
+    category: str
+    level: str
+    duration: Optional[str] = None
+    lectures_count: Optional[int] = None
+    featured: Optional[bool] = None
+    status: Optional[str] = None
+    enrollments_count: Optional[int] = None
+    rating: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class CourseDetail(CourseSummary):
+    """
+    Course page payload: catalog fields plus instructor and full curriculum
+    """
+    description: Optional[str] = None
+    instructor: Optional[InstructorSummary] = None
+    sections: List[SectionDetail] = []
+
+
+class CoursePage(BaseModel):
+    items: List[CourseSummary]
+    next_cursor: Optional[str] = None
+    page: Optional[int] = None
+    limit: int
+
+
+# Enrollment schemas
+class EnrollmentDetail(Schema):
+    id: str
+    user_id: str
+    course_id: str
+    enrollment_date: Optional[datetime] = None
+    completion_date: Optional[datetime] = None
+    progress: Optional[float] = None
+    status: Optional[str] = None
+
+
+class EnrollmentProgress(EnrollmentDetail):
+    completed_lecture_ids: List[str] = []
+
+
+# Review schemas
+class ReviewDetail(Schema):
+    id: str
+    user_id: str
+    user_name: Optional[str] = None
+    user_avatar: Optional[str] = None
+    course_id: str
+    rating: float
+    comment: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+# Certificate schemas
+class CertificateDetail(Schema):
+    id: str
+    user_id: str
+    course_id: str
+    issue_date: Optional[datetime] = None
+    certificate_url: str
+    verification_code: str
+
+
+# Live session schemas
+class LiveSessionSummary(Schema):
+    """
+    Schedule entry; the meeting URL is only handed out when joining
+    """
+    id: str
+    course_id: str
+    course_title: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    instructor_id: str
+    start_time: datetime
+    end_time: datetime
+    status: Optional[str] = None
+    max_participants: Optional[int] = None
+
+
+# Notification schemas
+class NotificationDetail(Schema):
+    id: str
+    title: str
+    message: str
+    type: str
+    read: Optional[bool] = None
+    link: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class NotificationPage(BaseModel):
+    items: List[NotificationDetail]
+    next_cursor: Optional[str] = None
+    unread_count: int
@@ -0,0 +1,153 @@
+"""
+Live session seat counters for the Vaikuntha Institute Learning Platform
+
+Whether a user gets a seat is decided in the database (see
+services.live_sessions.join): a reservation row plus a conditional
+`participants_count + 1 ... WHERE participants_count < max_participants`,
+which stays exact with any number of workers. These counters sit in front of
+it, so that a class start, when every student joins in the same second, costs
+about one database transaction per seat instead of one per request, and the
+rest are turned away in O(1):
+
+- MemorySeats: per process. Lets at most `capacity - taken` joins through to
+  the database at once (the others wait for them to settle) and rejects
+  everything once the database has reported the session full. It only knows
+  the users this worker admitted, so the caller checks the database before
+  turning away a user who might hold a seat from another worker.
+- RedisSeats: one set of admitted users per session, updated by a Lua script,
+  shared by all workers; rejections need no database lookup.
+
+`admit` answers ADMITTED (already holds a seat), FULL, or RESERVED (go ahead
+and ask the database); every RESERVED must be followed by one `settle` with
+the database's answer. Capacity is passed on every call, so raising or
+lowering max_participants takes effect immediately.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+
+from cache import REDIS_URL
+
+SEATS_BACKEND = os.getenv("SEATS_BACKEND", "memory")
+SEATS_MAX_SESSIONS = int(os.getenv("SEATS_MAX_SESSIONS", "1024"))
+SEATS_TTL = int(os.getenv("SEATS_TTL", str(24 * 3600)))  # seconds, Redis keys only
+
+ADMITTED = "admitted"
+FULL = "full"
+RESERVED = "reserved"
+
+# Outcomes passed to `settle`
+JOINED = "joined"  # new seat taken
+REJOINED = "rejoined"  # the user already had a seat
+REJECTED = "rejected"  # no seat left
+FAILED = "failed"  # anything else; the reservation is released
+
+
+class _SessionSeats:
+    __slots__ = ("taken", "pending", "users", "changed")
+
+    def __init__(self):
+        self.taken = 0  # latest participants_count seen from the database
+        self.pending = 0  # joins let through and not settled yet
+        self.users = set()  # admitted by this worker
+        self.changed = asyncio.Condition()
+
+
+class MemorySeats:
+    authoritative = False
+
+    def __init__(self, max_sessions=SEATS_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def _seats(self, session_id):
+        seats = self._sessions.get(session_id)
+        if seats is None:
+            seats = self._sessions[session_id] = _SessionSeats()
+            # Forget the least recently used idle sessions
+            for old_id in list(self._sessions):
+                if len(self._sessions) <= self.max_sessions:
+                    break
+                if old_id != session_id and self._sessions[old_id].pending == 0:
+                    del self._sessions[old_id]
+        self._sessions.move_to_end(session_id)
+        return seats
+
+    async def admit(self, session_id, user_id, capacity):
+        seats = self._seats(session_id)
+        if user_id in seats.users:
+            return ADMITTED
+        async with seats.changed:
+            while True:
+                if capacity is not None and seats.taken >= capacity:
+                    return FULL
+                if capacity is None or seats.taken + seats.pending < capacity:
+                    seats.pending += 1
+                    return RESERVED
+                await seats.changed.wait()
+
+    async def settle(self, session_id, user_id, outcome, taken=None, capacity=None):
+        seats = self._seats(session_id)
+        async with seats.changed:
+            seats.pending -= 1
+            if outcome in (JOINED, REJOINED):
+                seats.users.add(user_id)
+            if taken is not None:
+                seats.taken = max(seats.taken, taken)
+            if outcome == REJECTED and capacity is not None:
+                seats.taken = max(seats.taken, capacity)
+            seats.changed.notify_all()
+
+
+# KEYS[1] = admitted set; ARGV = user id, capacity (-1 for none), ttl
+ADMIT_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then return 2 end
+local capacity = tonumber(ARGV[2])
+if capacity >= 0 and redis.call('SCARD', KEYS[1]) >= capacity then return 0 end
+redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisSeats:
+    """
+    Seats shared across workers. A user is added to the session's set when
+    admitted here and removed again if the database then refuses them.
+    """
+    authoritative = True
+
+    def __init__(self, client, prefix="vaikuntha:seats:", ttl=SEATS_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, session_id):
+        return f"{self.prefix}{session_id}"
+
+    async def admit(self, session_id, user_id, capacity):
+        result = await self.client.eval(
+            ADMIT_SCRIPT, 1, self._key(session_id), user_id, -1 if capacity is None else capacity, self.ttl
+        )
+        return {2: ADMITTED, 1: RESERVED}.get(int(result), FULL)
+
+    async def settle(self, session_id, user_id, outcome, taken=None, capacity=None):
+        if outcome in (REJECTED, FAILED):
+            await self.client.srem(self._key(session_id), user_id)
+
+
+def create_seats(backend=SEATS_BACKEND):
+    if backend == "memory":
+        return MemorySeats()
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("SEATS_BACKEND=redis requires the 'redis' package") from exc
+        return RedisSeats(redis.from_url(REDIS_URL))
+    raise ValueError(f"Unknown SEATS_BACKEND '{backend}'")
+
+
+# Shared seat counters
+seats = create_seats()
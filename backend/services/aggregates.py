@@ -0,0 +1,137 @@
+"""
+Denormalized course counters for the Vaikuntha Institute Learning Platform
+
+Course.enrollments_count, lectures_count and rating are read on every catalog
+card, so they are stored on the course instead of being computed with
+COUNT(*)/AVG() per request. Writers adjust them with single-statement
+`x = x + 1` updates inside their own transaction, which stays correct under
+concurrency without locking the course row for longer than the update.
+
+Anything that bypasses these helpers (manual SQL, refunds, deleted rows) can
+make the counters drift; `reconcile` recomputes them from the source tables
+and is run periodically from the app lifespan.
+"""
+
+import asyncio
+import logging
+import os
+
+from sqlalchemy import func, or_, select, update
+
+from cache import cache, course_tag, slug_tag
+from database import AsyncSessionLocal
+from models import Course, Enrollment, Lecture, Review, Section
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reconciliation passes; 0 disables the background job
+RECONCILE_INTERVAL = int(os.getenv("AGGREGATE_RECONCILE_INTERVAL", "3600"))
+
+# Enrollments that still count towards a course's total
+COUNTED_ENROLLMENT_STATUSES = ("active", "completed")
+
+# Counter columns kept here; they are rendered on course cards and pages, so
+# HTTP validators have to cover them
+COUNTERS = ("enrollments_count", "lectures_count", "rating_sum", "ratings_count")
+
+
+def _update_counters(course_id, **values):
+    # updated_at moves with the counters: they are rendered, so the course's
+    # Last-Modified has to change along with its ETag
+    return update(Course).where(Course.id == course_id).values(**values)
+
+
+async def add_enrollment(db, course_id, delta=1):
+    await db.execute(_update_counters(course_id, enrollments_count=Course.enrollments_count + delta))
+
+
+async def add_lecture(db, course_id, delta=1):
+    await db.execute(_update_counters(course_id, lectures_count=Course.lectures_count + delta))
+
+
+async def add_rating(db, course_id, rating):
+    """
+    Fold one review into the running sum/count. The SET expressions all read
+    the row's old values, so `rating` is computed from the same snapshot.
+    """
+    await db.execute(
+        _update_counters(
+            course_id,
+            rating_sum=Course.rating_sum + rating,
+            ratings_count=Course.ratings_count + 1,
+            rating=(Course.rating_sum + rating) / (Course.ratings_count + 1),
+        )
+    )
+
+
+def _actual_counts():
+    enrollments = (
+        select(func.count(Enrollment.id))
+        .where(Enrollment.course_id == Course.id, Enrollment.status.in_(COUNTED_ENROLLMENT_STATUSES))
+        .scalar_subquery()
+    )
+    lectures = (
+        select(func.count(Lecture.id))
+        .join(Section, Lecture.section_id == Section.id)
+        .where(Section.course_id == Course.id)
+        .scalar_subquery()
+    )
+    rating_sum = select(func.coalesce(func.sum(Review.rating), 0.0)).where(Review.course_id == Course.id).scalar_subquery()
+    ratings_count = select(func.count(Review.id)).where(Review.course_id == Course.id).scalar_subquery()
+    rating = select(func.coalesce(func.avg(Review.rating), 0.0)).where(Review.course_id == Course.id).scalar_subquery()
+    return {
+        "enrollments_count": enrollments,
+        "lectures_count": lectures,
+        "rating_sum": rating_sum,
+        "ratings_count": ratings_count,
+        "rating": rating,
+    }
+
+
+async def recount_lectures(db, course_ids):
+    """
+    Set lectures_count from the lectures table for the given courses, after
+    a bulk import that bypassed add_lecture. Does not commit.
+    """
+    await db.execute(
+        update(Course).where(Course.id.in_(course_ids))
+        .values(lectures_count=_actual_counts()["lectures_count"]),
+        execution_options={"synchronize_session": False},
+    )
+
+
+async def reconcile(db):
+    """
+    Recompute every course's counters from the source tables, touching only
+    rows that drifted. Returns the number of courses repaired.
+    """
+    actual = _actual_counts()
+    drifted = or_(
+        Course.enrollments_count.is_distinct_from(actual["enrollments_count"]),
+        Course.lectures_count.is_distinct_from(actual["lectures_count"]),
+        Course.ratings_count.is_distinct_from(actual["ratings_count"]),
+        # Compare sums with a tolerance; float addition order differs
+        func.abs(Course.rating_sum - actual["rating_sum"]) > 1e-6,
+    )
+    repaired = (await db.execute(
+        update(Course).where(drifted).values(**actual).returning(Course.id, Course.slug),
+        execution_options={"synchronize_session": False},
+    )).all()
+    await db.commit()
+    await cache.invalidate_tags(*(tag for row in repaired for tag in (course_tag(row.id), slug_tag(row.slug))))
+    return len(repaired)
+
+
+async def reconcile_periodically(interval=RECONCILE_INTERVAL):
+    """
+    Background task started from the app lifespan
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                repaired = await reconcile(db)
+            if repaired:
+                logger.warning("Repaired drifted counters on %d courses", repaired)
+        except Exception:
+            logger.exception("Course counter reconciliation failed")
@@ -0,0 +1,137 @@
+"""
+Course catalog queries for the Vaikuntha Institute Learning Platform
+
+Listing uses keyset pagination: the client gets an opaque cursor holding the
+sort value and id of the last course on the page, and the next page starts
+strictly after that row. Paired with the catalog indexes on Course this is an
+index range scan, so page 5000 costs the same as page 1. Plain `page` numbers
+are still accepted and fall back to OFFSET for older clients.
+
+Searches are ordered by relevance instead, which has no stable keyset; their
+cursors carry the offset of the next page.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from models import Course
+from services import search as course_search
+
+# Sort key -> column used for ordering (always paired with Course.id)
+SORTS = {
+    "rating": Course.rating,
+    "newest": Course.created_at,
+}
+DEFAULT_SORT = "rating"
+RELEVANCE = "relevance"
+PUBLISHED = "published"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(payload):
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(cursor, sort):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return payload
+
+
+def encode_cursor(sort, course):
+    """
+    Build the opaque cursor pointing just past `course`
+    """
+    value = getattr(course, SORTS[sort].key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return _encode({"s": sort, "v": value, "id": course.id})
+
+
+def decode_cursor(sort, cursor):
+    """
+    Return the (sort value, id) pair stored in a cursor
+    """
+    payload = _decode(cursor, sort)
+    try:
+        value, course_id = payload["v"], payload["id"]
+        if sort == "newest":
+            value = datetime.fromisoformat(value)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    return value, course_id
+
+
+def catalog_query(category=None, level=None, sort=DEFAULT_SORT):
+    """
+    Base query for published courses with the catalog filters applied
+    """
+    query = select(Course).where(Course.status == PUBLISHED)
+    if category:
+        query = query.where(Course.category == category)
+    if level:
+        query = query.where(Course.level == level)
+    if sort == RELEVANCE:
+        return query
+    return query.order_by(SORTS[sort].desc(), Course.id.desc())
+
+
+async def _fetch_page(db, query, limit):
+    # Fetch one extra row to learn whether another page exists
+    courses = (await db.execute(query.limit(limit + 1))).scalars().all()
+    return courses[:limit], len(courses) > limit
+
+
+async def search_courses(db, terms, category=None, level=None, cursor=None, page=1, limit=10):
+    """
+    Return one page of courses matching `terms`, best match first
+    """
+    if cursor:
+        offset = _decode(cursor, RELEVANCE).get("v")
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursor("Malformed cursor")
+    else:
+        offset = (page - 1) * limit
+
+    query, rank = course_search.apply_search(
+        catalog_query(category, level, RELEVANCE), db.bind.dialect.name, terms
+    )
+    courses, has_more = await _fetch_page(db, query.order_by(rank, Course.id).offset(offset), limit)
+    next_cursor = _encode({"s": RELEVANCE, "v": offset + limit}) if has_more else None
+    return courses, next_cursor
+
+
+async def list_courses(db, category=None, level=None, search=None, sort=DEFAULT_SORT, cursor=None, page=1, limit=10):
+    """
+    Return one catalog page and the cursor for the next one.
+
+    When `cursor` is given, `page` is ignored. A non-empty `search` orders
+    results by relevance and ignores `sort`.
+    """
+    terms = course_search.search_terms(search)
+    if terms:
+        return await search_courses(db, terms, category, level, cursor, page, limit)
+
+    query = catalog_query(category, level, sort)
+    if cursor:
+        value, course_id = decode_cursor(sort, cursor)
+        query = query.where(tuple_(SORTS[sort], Course.id) < (value, course_id))
+    else:
+        query = query.offset((page - 1) * limit)
+
+    courses, has_more = await _fetch_page(db, query, limit)
+    next_cursor = encode_cursor(sort, courses[-1]) if has_more else None
+    return courses, next_cursor
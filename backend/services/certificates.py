@@ -0,0 +1,323 @@
+"""
+Course completion certificates for the Vaikuntha Institute Learning Platform
+
+Certificates are generated by the job queue (services.jobs), not inside a
+request: when an enrollment becomes `completed`, `write_progress` enqueues a
+job keyed by user and course in the same transaction. The worker renders the
+PDF in its process pool, stores it at a key derived from user and course, and
+inserts the Certificate row. Every step is idempotent, so a job that runs
+twice (lease expired, retry after a crash) leaves exactly one certificate.
+
+GET /certificates/{course_id} is then a lookup; until the job has run it
+answers 202 with the job status so clients can poll.
+
+Verification codes are signed: 10 bytes derived from user and course
+followed by the first 6 bytes of their HMAC-SHA256, base32 encoded (26
+characters). Deriving the body, rather than drawing it at random, means two
+workers racing on the same job print the same code. The public verify route
+checks the signature with a constant-time comparison before anything else,
+so mistyped, guessed or garbage codes never reach the database. Genuine codes
+are answered from `verified`, a bounded in-process LRU filled with recent
+certificates at startup and with each certificate as it is issued.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import os
+import zlib
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from auth import SECRET_KEY
+from cache import MemoryCache
+from database import UPSERT_INSERTS, AsyncSessionLocal
+from models import Certificate, Course, Enrollment, User
+from services import jobs
+from storage import iter_bytes, storage
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND = "certificate"
+
+CERTIFICATE_SECRET = os.getenv("CERTIFICATE_SECRET", SECRET_KEY).encode()
+CODE_BODY_BYTES = 10
+CODE_SIGNATURE_BYTES = 6
+CODE_LENGTH = 26  # base32 of 16 bytes, without padding
+
+# Recently issued or verified certificates, by code
+VERIFIED_CACHE_SIZE = int(os.getenv("CERTIFICATE_VERIFIED_CACHE_SIZE", "100000"))
+VERIFIED_CACHE_TTL = int(os.getenv("CERTIFICATE_VERIFIED_CACHE_TTL", str(24 * 3600)))  # seconds
+verified = MemoryCache(max_entries=VERIFIED_CACHE_SIZE, default_ttl=VERIFIED_CACHE_TTL)
+
+# A4 landscape, in points
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595
+BORDER_POINTS = 4000  # samples along each guilloche curve
+
+
+def job_key(user_id, course_id):
+    return f"certificate:{user_id}:{course_id}"
+
+
+def certificate_key(user_id, course_id):
+    return f"certificates/{course_id}/{user_id}.pdf"
+
+
+def _signature(body):
+    return hmac.new(CERTIFICATE_SECRET, body, hashlib.sha256).digest()[:CODE_SIGNATURE_BYTES]
+
+
+def verification_code(user_id, course_id):
+    # Keyed so codes cannot be worked out from the (public) ids
+    body = hmac.new(CERTIFICATE_SECRET, f"code:{user_id}:{course_id}".encode(), hashlib.sha256).digest()
+    body = body[:CODE_BODY_BYTES]
+    return base64.b32encode(body + _signature(body)).decode().rstrip("=")
+
+
+def check_verification_code(code):
+    """
+    Return the normalized code if its signature is valid, else None. Accepts
+    lower case and the spaces or dashes people add when typing codes.
+    """
+    code = code.replace("-", "").replace(" ", "").upper()
+    if len(code) != CODE_LENGTH:
+        return None
+    try:
+        raw = base64.b32decode(code + "=" * 6)
+    except ValueError:
+        return None
+    body, signature = raw[:CODE_BODY_BYTES], raw[CODE_BODY_BYTES:]
+    if not hmac.compare_digest(signature, _signature(body)):
+        return None
+    return code
+
+
+def _pdf_text(text):
+    return text.encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _guilloche(inset, waves, amplitude, phase):
+    # A sine wave running around a rectangle inset from the page edge
+    width, height = PAGE_WIDTH - 2 * inset, PAGE_HEIGHT - 2 * inset
+    perimeter = 2 * (width + height)
+    ops = []
+    for i in range(BORDER_POINTS + 1):
+        d = perimeter * i / BORDER_POINTS
+        if d <= width:
+            x, y, nx, ny = inset + d, inset, 0, 1
+        elif d <= width + height:
+            x, y, nx, ny = PAGE_WIDTH - inset, inset + d - width, -1, 0
+        elif d <= 2 * width + height:
+            x, y, nx, ny = PAGE_WIDTH - inset - (d - width - height), PAGE_HEIGHT - inset, 0, -1
+        else:
+            x, y, nx, ny = inset, PAGE_HEIGHT - inset - (d - 2 * width - height), 1, 0
+        offset = amplitude * math.sin(2 * math.pi * waves * i / BORDER_POINTS + phase)
+        ops.append(f"{x + nx * offset:.2f} {y + ny * offset:.2f} {'m' if i == 0 else 'l'}")
+    ops.append("S")
+    return "\n".join(ops)
+
+
+def render_certificate(data):
+    """
+    Render a one-page PDF certificate and return its bytes. Pure and
+    module-level so it can run in the job worker's process pool.
+    """
+    border = [
+        "0.55 0.42 0.13 RG 0.4 w",
+        *(_guilloche(24 + 3 * k, 180 + 7 * k, 6, k * 0.7) for k in range(6)),
+    ]
+    lines = [
+        (28, 160, "Certificate of Completion"),
+        (14, 230, "This certifies that"),
+        (30, 275, data["student_name"]),
+        (14, 320, "has successfully completed"),
+        (22, 360, data["course_title"]),
+        (12, 430, f"Instructor: {data['instructor_name']}"),
+        (12, 450, f"Issued {data['issue_date']}"),
+        (10, 520, f"Verification code {data['verification_code']}"),
+    ]
+    text = [
+        f"BT /F1 {size} Tf {max(40, PAGE_WIDTH / 2 - len(line) * size * 0.26):.1f} {PAGE_HEIGHT - top} Td "
+        f"({_pdf_text(line)}) Tj ET"
+        for size, top, line in lines
+    ]
+    content = zlib.compress("\n".join(border + ["0 g"] + text).encode("latin-1"), 6)
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+        f"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+
+async def enqueue_certificate(db, user_id, course_id):
+    """
+    Queue certificate generation in the caller's transaction. A finished job
+    is queued again too: the handler does nothing if the certificate exists,
+    and otherwise it last ran while the enrollment was not completed.
+    """
+    await jobs.enqueue(
+        db, JOB_KIND, job_key(user_id, course_id), {"user_id": user_id, "course_id": course_id},
+        requeue=("failed", "done"),
+    )
+
+
+async def get_for_user(db, user_id, course_id):
+    query = select(Certificate).where(Certificate.user_id == user_id, Certificate.course_id == course_id)
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def get_or_queue(db, user, course_id):
+    """
+    The user's certificate for a course, or the job generating it. Queues the
+    job if it is missing or failed, e.g. for courses completed before
+    certificates were generated automatically.
+    """
+    certificate = await get_for_user(db, user.id, course_id)
+    if certificate is not None:
+        return certificate, None
+    query = select(Enrollment.status).where(Enrollment.user_id == user.id, Enrollment.course_id == course_id)
+    if (await db.execute(query)).scalar_one_or_none() != "completed":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not completed")
+    job = await jobs.get_job(db, job_key(user.id, course_id))
+    if job is None or job.status in ("failed", "done"):
+        await enqueue_certificate(db, user.id, course_id)
+        await db.commit()
+        job = await jobs.get_job(db, job_key(user.id, course_id))
+    return None, job
+
+
+def _verification_query():
+    return (
+        select(Certificate.verification_code, Certificate.id, Certificate.course_id, Course.title,
+               User.name, Certificate.issue_date)
+        .join(Course, Course.id == Certificate.course_id)
+        .join(User, User.id == Certificate.user_id)
+    )
+
+
+def _verification_detail(row):
+    return {
+        "valid": True,
+        "certificate_id": row.id,
+        "course_id": row.course_id,
+        "course_title": row.title,
+        "student_name": row.name,
+        "issue_date": row.issue_date.isoformat(),
+        "verification_code": row.verification_code,
+    }
+
+
+async def verify(db, code):
+    """
+    Public certificate verification
+    """
+    code = check_verification_code(code)
+    if code is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Certificate not found")
+    detail = await verified.get(code)
+    if detail is None:
+        row = (await db.execute(_verification_query().where(Certificate.verification_code == code))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Certificate not found")
+        detail = _verification_detail(row)
+        await verified.set(code, detail)
+    return detail
+
+
+async def preload_verified(limit=VERIFIED_CACHE_SIZE):
+    """
+    Fill `verified` with the most recently issued certificates; started from
+    the app lifespan
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            query = _verification_query().order_by(Certificate.issue_date.desc()).limit(limit)
+            rows = (await db.execute(query)).all()
+    except Exception:
+        logger.exception("Could not preload verified certificates")
+        return 0
+    for row in reversed(rows):  # newest end up most recently used
+        await verified.set(row.verification_code, _verification_detail(row))
+    return len(rows)
+
+
+async def _certificate_data(db, user_id, course_id):
+    student = User.__table__.alias("student")
+    instructor = User.__table__.alias("instructor")
+    query = (
+        select(student.c.name, Course.title, instructor.c.name, Enrollment.status, Enrollment.completion_date,
+               Certificate.id)
+        .select_from(Enrollment)
+        .join(student, student.c.id == Enrollment.user_id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .join(instructor, instructor.c.id == Course.instructor_id)
+        .outerjoin(Certificate, (Certificate.user_id == Enrollment.user_id) & (Certificate.course_id == Enrollment.course_id))
+        .where(Enrollment.user_id == user_id, Enrollment.course_id == course_id)
+    )
+    return (await db.execute(query)).first()
+
+
+@jobs.handler(JOB_KIND)
+async def generate_certificate(worker, payload):
+    user_id, course_id = payload["user_id"], payload["course_id"]
+    async with worker.session_factory() as db:
+        row = await _certificate_data(db, user_id, course_id)
+    if row is None:
+        raise LookupError(f"No enrollment for user {user_id} in course {course_id}")
+    student_name, course_title, instructor_name, enrollment_status, completion_date, certificate_id = row
+    if certificate_id is not None or enrollment_status != "completed":
+        return  # already issued by an earlier run, or no longer eligible
+
+    issue_date = completion_date or datetime.utcnow()
+    data = {
+        "student_name": student_name,
+        "course_title": course_title,
+        "instructor_name": instructor_name,
+        "issue_date": issue_date.strftime("%d %B %Y"),
+        "verification_code": verification_code(user_id, course_id),
+    }
+    stored = await _render_and_store(worker, user_id, course_id, data)
+
+    async with worker.session_factory() as db:
+        insert = UPSERT_INSERTS[db.bind.dialect.name]
+        await db.execute(
+            insert(Certificate)
+            .values(user_id=user_id, course_id=course_id, issue_date=issue_date,
+                    certificate_url=stored["url"], verification_code=data["verification_code"])
+            .on_conflict_do_nothing(index_elements=[Certificate.user_id, Certificate.course_id])
+        )
+        await db.commit()
+        row = (await db.execute(_verification_query().where(
+            Certificate.user_id == user_id, Certificate.course_id == course_id
+        ))).first()
+
+    # Another run won the insert. Its row is what verification answers from,
+    # so the stored PDF (which this run may have overwritten) must match it
+    winner = {**data, "issue_date": row.issue_date.strftime("%d %B %Y"), "verification_code": row.verification_code}
+    if winner != data:
+        await _render_and_store(worker, user_id, course_id, winner)
+    await verified.set(row.verification_code, _verification_detail(row))
+
+
+async def _render_and_store(worker, user_id, course_id, data):
+    pdf = await worker.run_in_process(render_certificate, data)
+    # Same key on every run, so a retry overwrites rather than leaks objects
+    return await storage.put(certificate_key(user_id, course_id), iter_bytes(pdf))
@@ -0,0 +1,326 @@
+"""
+Bulk course import and export for the Vaikuntha Institute Learning Platform
+
+Course trees move as NDJSON: one record per line, `{"record": "lecture",
+"id": ..., "section_id": ..., ...}`, with the record types in RECORD_TYPES
+(not under "type", which lectures and quiz questions have as a field).
+Exports list every record of one type before the next, parents first, read
+with server-side cursors, so memory stays flat however large the catalog is.
+
+Imports read the stream line by line and insert IMPORT_BATCH_SIZE records
+per transaction with one executemany per type. A record must come after
+its parent (exports always do); parents are checked to exist and to belong
+to the importing instructor before each batch is inserted. Rows are
+inserted with ON CONFLICT (id) DO NOTHING, so replaying a file, or the tail
+of one after an interruption, skips what is already there. The number of
+lines committed is the checkpoint: pass it back as `skip` to resume.
+
+Course.lectures_count is recounted once for the courses an import touched,
+when it ends (services.aggregates.reconcile repairs courses left by an
+import that was cut off).
+"""
+
+import os
+import uuid
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from cache import cache, course_tag, slug_tag
+from database import UPSERT_INSERTS, AsyncSessionLocal
+from models import Course, Lecture, Quiz, QuizOption, QuizQuestion, Section
+from services import aggregates
+from services.courses import (
+    COURSE_FIELDS, LECTURE_FIELDS, REQUIRED_COURSE_FIELDS, REQUIRED_LECTURE_FIELDS,
+    REQUIRED_SECTION_FIELDS, SECTION_FIELDS, slugify,
+)
+
+IMPORT_BATCH_SIZE = int(os.getenv("COURSE_IMPORT_BATCH_SIZE", "5000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("COURSE_EXPORT_CHUNK_SIZE", "2000"))
+MAX_LINE_SIZE = 1024 * 1024  # bytes
+
+
+class RecordType:
+    def __init__(self, name, model, fields, required, parent=None, optional_parent=None):
+        self.name = name
+        self.model = model
+        self.fields = ("id",) + tuple(fields)
+        self.required = tuple(required)
+        self.parent = parent  # required foreign key, checked before insert
+        self.optional_parent = optional_parent
+        self.defaults = {
+            field: model.__table__.c[field].default.arg
+            for field in self.fields
+            if model.__table__.c[field].default is not None and model.__table__.c[field].default.is_scalar
+        }
+
+
+# Parents first
+RECORD_TYPES = [
+    RecordType("course", Course, ("instructor_id",) + tuple(sorted(COURSE_FIELDS)), REQUIRED_COURSE_FIELDS),
+    RecordType("section", Section, ("course_id",) + tuple(sorted(SECTION_FIELDS)), REQUIRED_SECTION_FIELDS,
+               parent="course_id"),
+    RecordType("lecture", Lecture, ("section_id",) + tuple(sorted(LECTURE_FIELDS)), REQUIRED_LECTURE_FIELDS,
+               parent="section_id"),
+    RecordType("quiz", Quiz, ("course_id", "lecture_id", "title", "description", "time_limit", "pass_score", "attempts"),
+               ("title", "pass_score"), parent="course_id", optional_parent="lecture_id"),
+    RecordType("question", QuizQuestion, ("quiz_id", "text", "type", "points"), ("text", "type"), parent="quiz_id"),
+    RecordType("option", QuizOption, ("question_id", "text", "is_correct"), ("text",), parent="question_id"),
+]
+RECORD_TYPES_BY_NAME = {record_type.name: record_type for record_type in RECORD_TYPES}
+
+
+def _owners(foreign_key):
+    """
+    Query for (id, course id, instructor id) of the rows a foreign key
+    points at, and the id column to filter it by
+    """
+    if foreign_key == "course_id":
+        return select(Course.id, Course.id, Course.instructor_id), Course.id
+    if foreign_key == "section_id":
+        query = select(Section.id, Course.id, Course.instructor_id).join(Course, Course.id == Section.course_id)
+        return query, Section.id
+    if foreign_key == "lecture_id":
+        query = (select(Lecture.id, Course.id, Course.instructor_id)
+                 .join(Section, Section.id == Lecture.section_id).join(Course, Course.id == Section.course_id))
+        return query, Lecture.id
+    if foreign_key == "quiz_id":
+        query = select(Quiz.id, Course.id, Course.instructor_id).join(Course, Course.id == Quiz.course_id)
+        return query, Quiz.id
+    query = (select(QuizQuestion.id, Course.id, Course.instructor_id)
+             .join(Quiz, Quiz.id == QuizQuestion.quiz_id).join(Course, Course.id == Quiz.course_id))
+    return query, QuizQuestion.id
+
+
+# Export
+async def exportable_courses(db, user, course_ids=None):
+    """
+    Query for the ids of the courses to export: the given ones, or all of
+    the user's (every course for admins). 404 if one of the given courses
+    does not exist or is not theirs.
+    """
+    query = select(Course.id)
+    if user.role != "admin":
+        query = query.where(Course.instructor_id == user.id)
+    if course_ids:
+        query = query.where(Course.id.in_(course_ids))
+        found = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+        if found < len(set(course_ids)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    return query
+
+
+def _export_queries(courses):
+    columns = lambda record_type: [record_type.model.__table__.c[field] for field in record_type.fields]
+    course, section, lecture, quiz, question, option = RECORD_TYPES
+    yield course, select(*columns(course)).where(Course.id.in_(courses))
+    yield section, select(*columns(section)).where(Section.course_id.in_(courses))
+    yield lecture, (select(*columns(lecture)).join(Section, Section.id == Lecture.section_id)
+                    .where(Section.course_id.in_(courses)))
+    yield quiz, select(*columns(quiz)).where(Quiz.course_id.in_(courses))
+    yield question, (select(*columns(question)).join(Quiz, Quiz.id == QuizQuestion.quiz_id)
+                     .where(Quiz.course_id.in_(courses)))
+    yield option, (select(*columns(option)).join(QuizQuestion, QuizQuestion.id == QuizOption.question_id)
+                   .join(Quiz, Quiz.id == QuizQuestion.quiz_id).where(Quiz.course_id.in_(courses)))
+
+
+async def export_lines(db, courses):
+    """
+    NDJSON lines (bytes, newline included) for the courses selected by the
+    `courses` query and everything under them
+    """
+    for record_type, query in _export_queries(courses):
+        query = query.order_by(record_type.model.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield b"".join(
+                orjson.dumps({"record": record_type.name, **row._asdict()}) + b"\n" for row in rows
+            )
+
+
+async def stream_export(courses):
+    """
+    export_lines on its own session, for a StreamingResponse (the request's
+    session is closed before the body is sent)
+    """
+    async with AsyncSessionLocal() as db:
+        async for chunk in export_lines(db, courses):
+            yield chunk
+
+
+# Import
+async def ndjson_lines(chunks):
+    """
+    Split a stream of byte chunks into lines
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+        if len(pending) > MAX_LINE_SIZE:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Line too long")
+    if pending:
+        yield pending
+
+
+def _is_id(value):
+    try:
+        uuid.UUID(value)
+        return True
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+class ImportFailed(Exception):
+    def __init__(self, line, error):
+        super().__init__(error)
+        self.line = line
+        self.error = error
+
+
+def parse_record(line, number):
+    """
+    Validate one NDJSON line; returns (record type, row) or None for a blank line
+    """
+    if not line.strip():
+        return None
+    try:
+        data = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        raise ImportFailed(number, "Invalid JSON")
+    record_type = RECORD_TYPES_BY_NAME.get(data.get("record")) if isinstance(data, dict) else None
+    if record_type is None:
+        raise ImportFailed(number, f"Unknown record type, expected one of: {', '.join(RECORD_TYPES_BY_NAME)}")
+    row = {**record_type.defaults, **{field: data.get(field) for field in record_type.fields if field in data}}
+    for field in record_type.fields:
+        row.setdefault(field, None)
+    if record_type.model is Course and not row["slug"]:
+        row["slug"] = slugify(row.get("title") or "")
+    missing = [field for field in record_type.required if row[field] is None]
+    if missing:
+        raise ImportFailed(number, f"Missing required fields: {', '.join(missing)}")
+    required_ids = ("id", record_type.parent)
+    for field in required_ids + (record_type.optional_parent, "instructor_id"):
+        if field in row and (row[field] is not None or field in required_ids) and not _is_id(row[field]):
+            raise ImportFailed(number, f"'{field}' is not a UUID")
+    return record_type, row
+
+
+class CourseImport:
+    """
+    One import run: buffers parsed records and writes them batch by batch
+    """
+
+    def __init__(self, db, user, batch_size=None):
+        self.db = db
+        self.user = user
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.batches = {record_type.name: [] for record_type in RECORD_TYPES}
+        self.pending = 0
+        self.records = dict.fromkeys(RECORD_TYPES_BY_NAME, 0)
+        self.touched_courses = set()
+
+    def add(self, record_type, row):
+        # Courses belong to the importing instructor; admins may keep the
+        # instructor in the record
+        if record_type.model is Course and (self.user.role != "admin" or not row["instructor_id"]):
+            row["instructor_id"] = self.user.id
+        self.batches[record_type.name].append(row)
+        self.pending += 1
+
+    async def _check_parents(self, record_type, rows, foreign_key, line):
+        wanted = {row[foreign_key] for row in rows if row[foreign_key] is not None}
+        if not wanted:
+            return
+        query, parent_id = _owners(foreign_key)
+        found = (await self.db.execute(query.where(parent_id.in_(wanted)))).all()
+        if len(found) < len(wanted):
+            raise ImportFailed(line, f"A {record_type.name} references a {foreign_key[:-3]} that does not exist "
+                                     "(records must come after their parents)")
+        if self.user.role != "admin" and any(instructor_id != self.user.id for _, _, instructor_id in found):
+            raise ImportFailed(line, f"A {record_type.name} belongs to a course you do not own")
+        if record_type.model in (Section, Lecture):
+            self.touched_courses.update(course_id for _, course_id, _ in found)
+
+    async def flush(self, line):
+        """
+        Insert the buffered records in one transaction
+        """
+        insert = UPSERT_INSERTS[self.db.bind.dialect.name]
+        try:
+            for record_type in RECORD_TYPES:
+                rows = self.batches[record_type.name]
+                if not rows:
+                    continue
+                for foreign_key in (record_type.parent, record_type.optional_parent):
+                    if foreign_key:
+                        await self._check_parents(record_type, rows, foreign_key, line)
+                await self.db.execute(
+                    insert(record_type.model).on_conflict_do_nothing(index_elements=[record_type.model.id]), rows
+                )
+            await self.db.commit()
+        except DBAPIError as exc:
+            await self.db.rollback()
+            raise ImportFailed(line, f"Batch could not be inserted: {exc.orig}")
+        except BaseException:
+            await self.db.rollback()
+            raise
+        for name, rows in self.batches.items():
+            self.records[name] += len(rows)
+            rows.clear()
+        self.pending = 0
+
+    async def finish(self):
+        """
+        Recount lectures and drop cached pages of the courses touched
+        """
+        if not self.touched_courses:
+            return
+        await aggregates.recount_lectures(self.db, self.touched_courses)
+        slugs = (await self.db.execute(select(Course.slug).where(Course.id.in_(self.touched_courses)))).scalars()
+        await self.db.commit()
+        await cache.invalidate_tags(
+            *(course_tag(course_id) for course_id in self.touched_courses), *(slug_tag(slug) for slug in slugs)
+        )
+
+
+async def import_lines(db, user, lines, skip=0, batch_size=None, on_commit=None):
+    """
+    Import NDJSON lines (an async iterable of bytes), skipping the first
+    `skip`. Calls `on_commit(lines committed)` after every batch. Returns a
+    summary; raises HTTPException 422 with the committed count on the
+    first bad record or batch.
+    """
+    run = CourseImport(db, user, batch_size)
+    number = committed = skip
+    try:
+        seen = 0
+        async for line in lines:
+            seen += 1
+            if seen <= skip:
+                continue
+            number = seen
+            parsed = parse_record(line, number)
+            if parsed is not None:
+                run.add(*parsed)
+            if run.pending >= run.batch_size:
+                await run.flush(number)
+                committed = number
+                if on_commit is not None:
+                    await on_commit(committed)
+        await run.flush(number)
+        committed = number
+        if on_commit is not None:
+            await on_commit(committed)
+    except ImportFailed as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"line": exc.line, "error": exc.error, "committed": committed},
+        )
+    finally:
+        await run.finish()
+    return {"committed": committed, "records": run.records}
@@ -0,0 +1,105 @@
+"""
+Course authoring for the Vaikuntha Institute Learning Platform
+
+Every write commits first and then invalidates the cached course pages, so the
+next read sees the change.
+"""
+
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from cache import cache, course_tag, slug_tag
+from models import Course, Lecture, Section
+from services import aggregates
+
+COURSE_FIELDS = {
+    "title", "slug", "description", "short_description", "thumbnail", "price",
+    "discount_price", "category", "level", "duration", "featured", "status",
+}
+SECTION_FIELDS = {"title", "order"}
+LECTURE_FIELDS = {"title", "description", "type", "content", "duration", "preview", "order"}
+
+REQUIRED_COURSE_FIELDS = ("title", "price", "category", "level")
+REQUIRED_SECTION_FIELDS = ("title", "order")
+REQUIRED_LECTURE_FIELDS = ("title", "type", "content", "order")
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _pick(data, fields, required=()):
+    missing = [field for field in required if data.get(field) is None]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing required fields: {', '.join(missing)}",
+        )
+    return {key: value for key, value in data.items() if key in fields}
+
+
+async def invalidate_course(course_id, *slugs):
+    await cache.invalidate_tags(course_tag(course_id), *(slug_tag(slug) for slug in slugs if slug))
+
+
+async def _commit(db, conflict_detail):
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+
+
+async def get_course_or_404(db, course_id):
+    course = await db.get(Course, course_id)
+    if course is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    return course
+
+
+async def create_course(db, instructor, data):
+    fields = _pick(data, COURSE_FIELDS, REQUIRED_COURSE_FIELDS)
+    fields.setdefault("slug", slugify(fields.get("title", "")))
+    course = Course(instructor_id=instructor.id, **fields)
+    db.add(course)
+    await _commit(db, "A course with this slug already exists")
+    await invalidate_course(course.id, course.slug)
+    return course
+
+
+async def update_course(db, course, data):
+    old_slug = course.slug
+    for key, value in _pick(data, COURSE_FIELDS).items():
+        setattr(course, key, value)
+    await _commit(db, "A course with this slug already exists")
+    await invalidate_course(course.id, old_slug, course.slug)
+    return course
+
+
+async def archive_course(db, course):
+    """
+    Courses are archived rather than removed so enrollments, payments and
+    certificates that reference them stay valid
+    """
+    course.status = "archived"
+    await db.commit()
+    await invalidate_course(course.id, course.slug)
+
+
+async def create_section(db, course, data):
+    section = Section(course_id=course.id, **_pick(data, SECTION_FIELDS, REQUIRED_SECTION_FIELDS))
+    db.add(section)
+    await db.commit()
+    await invalidate_course(course.id, course.slug)
+    return section
+
+
+async def create_lecture(db, course, section, data):
+    lecture = Lecture(section_id=section.id, **_pick(data, LECTURE_FIELDS, REQUIRED_LECTURE_FIELDS))
+    db.add(lecture)
+    await aggregates.add_lecture(db, course.id)
+    await db.commit()
+    await invalidate_course(course.id, course.slug)
+    return lecture
@@ -0,0 +1,163 @@
+"""
+Course curriculum loading for the Vaikuntha Institute Learning Platform
+
+Every relationship on the Course -> Section -> Lecture -> Quiz/Assignment tree
+is lazy by default, which costs one query per section and per lecture (and
+does not work at all under AsyncSession). The loaders here fetch each level in
+a single statement instead, so the number of queries is fixed no matter how
+large the course is:
+
+    course + instructor        1 query (joined)
+    sections                   1 query (selectin)
+    lectures + quiz/assignment 1 query (selectin, joined)
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from cache import cache, course_tag, slug_tag
+from http_cache import weak_etag
+from models import Course, Lecture, Section
+from schemas import CourseDetail
+from services import aggregates
+
+# Upper bound on statements issued by load_course, checked by tests/test_curriculum.py
+MAX_COURSE_QUERIES = 4
+
+
+def lecture_options():
+    return (joinedload(Lecture.quiz), joinedload(Lecture.assignment))
+
+
+def section_options():
+    return (selectinload(Section.lectures).options(*lecture_options()),)
+
+
+def course_options():
+    return (
+        joinedload(Course.instructor),
+        selectinload(Course.sections).options(*section_options()),
+    )
+
+
+async def load_course(db, course_id=None, slug=None):
+    """
+    Load a course by id or slug with its full curriculum, or None
+    """
+    query = select(Course).options(*course_options())
+    if course_id is not None:
+        query = query.where(Course.id == course_id)
+    else:
+        query = query.where(Course.slug == slug)
+    return (await db.execute(query)).unique().scalar_one_or_none()
+
+
+async def get_course_detail(db, course_id=None, slug=None):
+    """
+    Serialized course page, read through the cache. Returns None if not found.
+
+    Entries are tagged with the course id or slug they were looked up by;
+    services.courses invalidates both on every write.
+    """
+    if course_id is not None:
+        key, tags = f"course:id:{course_id}", (course_tag(course_id),)
+    else:
+        key, tags = f"course:slug:{slug}", (slug_tag(slug),)
+    data = await cache.get(key)
+    if data is not None:
+        return data
+
+    versions = await cache.versions(tags)
+    course = await load_course(db, course_id=course_id, slug=slug)
+    if course is None:
+        return None
+    data = CourseDetail.model_validate(course).model_dump(mode="json")
+    await cache.set(key, data, tags=tags, versions=versions)
+    return data
+
+
+async def get_course_validators(db, course_id=None, slug=None):
+    """
+    HTTP validators for a course page, read through the cache: returns
+    (course id, ETag, last modified) or None if the course does not exist.
+
+    Last modified is the newest updated_at across the course, its sections
+    and lectures. Section and lecture counts go into the ETag so removals,
+    which leave no updated_at behind, still change it, and so do the course's
+    counters (services.aggregates), which are rendered on the page.
+    """
+    if course_id is not None:
+        key, tags = f"course:validators:id:{course_id}", (course_tag(course_id),)
+    else:
+        key, tags = f"course:validators:slug:{slug}", (slug_tag(slug),)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached["id"], cached["etag"], datetime.fromisoformat(cached["last_modified"])
+
+    versions = await cache.versions(tags)
+    def section_stat(column):
+        return select(column).where(Section.course_id == Course.id).scalar_subquery()
+
+    def lecture_stat(column):
+        return (
+            select(column)
+            .join(Section, Lecture.section_id == Section.id)
+            .where(Section.course_id == Course.id)
+            .scalar_subquery()
+        )
+
+    query = select(
+        Course.id,
+        Course.updated_at,
+        section_stat(func.max(Section.updated_at)),
+        section_stat(func.count(Section.id)),
+        lecture_stat(func.max(Lecture.updated_at)),
+        lecture_stat(func.count(Lecture.id)),
+        *(getattr(Course, name) for name in aggregates.COUNTERS),
+    )
+    if course_id is not None:
+        query = query.where(Course.id == course_id)
+    else:
+        query = query.where(Course.slug == slug)
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+
+    found_id, course_updated, sections_updated, section_count, lectures_updated, lecture_count, *counters = row
+    last_modified = max(value for value in (course_updated, sections_updated, lectures_updated) if value)
+    etag = weak_etag(found_id, last_modified.isoformat(), section_count, lecture_count, *counters)
+    await cache.set(
+        key,
+        {"id": found_id, "etag": etag, "last_modified": last_modified.isoformat()},
+        tags=tags,
+        versions=versions,
+    )
+    return found_id, etag, last_modified
+
+
+async def load_sections(db, course_id):
+    """
+    Load a course's sections in order, each with its lectures
+    """
+    query = (
+        select(Section)
+        .where(Section.course_id == course_id)
+        .order_by(Section.order)
+        .options(*section_options())
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+async def load_lectures(db, section_id):
+    """
+    Load a section's lectures in order, with any quiz or assignment attached
+    """
+    query = (
+        select(Lecture)
+        .where(Lecture.section_id == section_id)
+        .order_by(Lecture.order)
+        .options(*lecture_options())
+    )
+    return (await db.execute(query)).unique().scalars().all()
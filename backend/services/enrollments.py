@@ -0,0 +1,86 @@
+"""
+Enrollments and reviews for the Vaikuntha Institute Learning Platform
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from cache import cache, course_tag, schedule_tag, slug_tag
+from models import Enrollment, Review, User
+from services import aggregates
+
+
+async def get_enrollment(db, user_id, course_id):
+    query = select(Enrollment).where(Enrollment.user_id == user_id, Enrollment.course_id == course_id)
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def get_owned_enrollment(db, enrollment_id, user):
+    """
+    Load an enrollment that belongs to `user` (admins may load any)
+    """
+    enrollment = await db.get(Enrollment, enrollment_id)
+    if enrollment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found")
+    if enrollment.user_id != user.id and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your enrollment")
+    return enrollment
+
+
+async def enroll(db, user_id, course):
+    """
+    Enroll a user and bump the course's enrollment counter in the same
+    transaction. Enrolling twice is a conflict.
+    """
+    if course.status != "published":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Course is not open for enrollment")
+    enrollment = Enrollment(user_id=user_id, course_id=course.id)
+    db.add(enrollment)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Already enrolled in this course")
+    await aggregates.add_enrollment(db, course.id)
+    await db.commit()
+    # The course's enrollment count changed, and its live sessions join the
+    # user's schedule
+    await cache.invalidate_tags(course_tag(course.id), slug_tag(course.slug), schedule_tag(user_id))
+    return enrollment
+
+
+async def add_review(db, user, course, data):
+    """
+    Store a review from an enrolled student and fold it into the course rating
+    """
+    rating = data.get("rating")
+    if not isinstance(rating, (int, float)) or not 1 <= rating <= 5:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Rating must be between 1 and 5")
+    if await get_enrollment(db, user.id, course.id) is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only enrolled students can review a course")
+
+    review = Review(user_id=user.id, course_id=course.id, rating=rating, comment=data.get("comment"))
+    db.add(review)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You have already reviewed this course")
+    await aggregates.add_rating(db, course.id, rating)
+    await db.commit()
+    # The course page shows the rating
+    await cache.invalidate_tags(course_tag(course.id), slug_tag(course.slug))
+    return review
+
+
+async def list_reviews(db, course_id, page=1, limit=20):
+    query = (
+        select(Review, User.name, User.avatar)
+        .join(User, Review.user_id == User.id)
+        .where(Review.course_id == course_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+    return (await db.execute(query)).all()
@@ -0,0 +1,240 @@
+"""
+Quiz grading for the Vaikuntha Institute Learning Platform
+
+Grading a submission row by row (load every question and option, compare
+is_correct per answer, insert one QuizAnswer at a time) costs a few hundred
+statements per submission on a 100-question quiz. Instead each quiz is
+compiled once into an answer key:
+
+    {"quiz_id", "course_id", "pass_score", "attempts", "total_points",
+     "questions": {question_id: {"points", "correct": [option ids],
+                                 "options": [option ids]}}}
+
+The key is cached (tag `quiz:{id}`), a submission is graded against it in
+one pass over the answers, and the submission plus all of its answers are
+written with one INSERT each.
+
+Keys are invalidated from ORM events whenever a Quiz, QuizQuestion or
+QuizOption is inserted, updated or deleted through a session, so edits made
+by any code path drop the cached key right after they commit. Bulk
+UPDATE/DELETE statements bypass those events; call `invalidate_quiz` after
+them.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from cache import cache, quiz_tag
+from ids import new_id
+from models import Enrollment, Quiz, QuizAnswer, QuizOption, QuizQuestion, QuizSubmission
+
+logger = logging.getLogger(__name__)
+
+
+async def invalidate_quiz(*quiz_ids):
+    await cache.invalidate_tags(*(quiz_tag(quiz_id) for quiz_id in quiz_ids))
+
+
+async def compile_answer_key(db, quiz_id):
+    """
+    Build the answer key for a quiz from two queries, or None if not found
+    """
+    quiz = (await db.execute(
+        select(Quiz.id, Quiz.course_id, Quiz.pass_score, Quiz.attempts).where(Quiz.id == quiz_id)
+    )).first()
+    if quiz is None:
+        return None
+    rows = (await db.execute(
+        select(QuizQuestion.id, QuizQuestion.points, QuizOption.id, QuizOption.is_correct)
+        .outerjoin(QuizOption, QuizOption.question_id == QuizQuestion.id)
+        .where(QuizQuestion.quiz_id == quiz_id)
+    )).all()
+
+    questions = {}
+    for question_id, points, option_id, is_correct in rows:
+        question = questions.setdefault(question_id, {"points": points or 0, "correct": [], "options": []})
+        if option_id is not None:
+            question["options"].append(option_id)
+            if is_correct:
+                question["correct"].append(option_id)
+    return {
+        "quiz_id": quiz.id,
+        "course_id": quiz.course_id,
+        "pass_score": quiz.pass_score,
+        "attempts": quiz.attempts,
+        "total_points": sum(question["points"] for question in questions.values()),
+        "questions": questions,
+    }
+
+
+async def get_answer_key(db, quiz_id):
+    """
+    Answer key read through the cache. Returns None if the quiz does not exist.
+    """
+    key, tags = f"quiz:key:{quiz_id}", (quiz_tag(quiz_id),)
+    answer_key = await cache.get(key)
+    if answer_key is not None:
+        return answer_key
+
+    versions = await cache.versions(tags)
+    answer_key = await compile_answer_key(db, quiz_id)
+    if answer_key is None:
+        return None
+    await cache.set(key, answer_key, tags=tags, versions=versions)
+    return answer_key
+
+
+def parse_answers(answers):
+    """
+    Accept [{"question_id", "selected_option_id"}] or
+    [{"question_id", "selected_option_ids": [...]}] and return
+    {question_id: set of option ids}. Repeated questions are merged.
+    """
+    if not isinstance(answers, list):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Answers must be a list")
+    selected = {}
+    for answer in answers:
+        if not isinstance(answer, dict) or not isinstance(answer.get("question_id"), str):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Each answer needs a question_id")
+        option_ids = answer.get("selected_option_ids")
+        if option_ids is None:
+            option_ids = [answer.get("selected_option_id")]
+        if not isinstance(option_ids, list) or not all(isinstance(option_id, str) for option_id in option_ids):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Each answer needs selected options")
+        selected.setdefault(answer["question_id"], set()).update(option_ids)
+    return selected
+
+
+def grade(answer_key, selected):
+    """
+    Grade {question_id: option ids} against an answer key in one pass.
+
+    A question scores its points only if exactly its correct options were
+    selected. Returns (score percentage, {question_id: correct}).
+    """
+    questions = answer_key["questions"]
+    earned = 0
+    results = {}
+    for question_id, option_ids in selected.items():
+        question = questions.get(question_id)
+        if question is None:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown question {question_id}")
+        if not option_ids.issubset(question["options"]):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown option for question {question_id}")
+        correct = option_ids == set(question["correct"])
+        if correct:
+            earned += question["points"]
+        results[question_id] = correct
+    total = answer_key["total_points"]
+    return (earned * 100.0 / total if total else 0.0), results
+
+
+async def submit(db, user, quiz_id, answers, time_spent=None):
+    """
+    Grade and store a submission. Only students enrolled in the quiz's course
+    may submit, at most `attempts` times.
+    """
+    answer_key = await get_answer_key(db, quiz_id)
+    if answer_key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    selected = parse_answers(answers)
+
+    enrolled = (
+        select(func.count(Enrollment.id))
+        .where(Enrollment.user_id == user.id, Enrollment.course_id == answer_key["course_id"])
+        .scalar_subquery()
+    )
+    previous = (
+        select(func.count(QuizSubmission.id))
+        .where(QuizSubmission.quiz_id == quiz_id, QuizSubmission.user_id == user.id)
+        .scalar_subquery()
+    )
+    is_enrolled, attempts_used = (await db.execute(select(enrolled, previous))).one()
+    if not is_enrolled:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only enrolled students can take this quiz")
+    if answer_key["attempts"] and attempts_used >= answer_key["attempts"]:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No attempts left for this quiz")
+
+    score, results = grade(answer_key, selected)
+    passed = score >= answer_key["pass_score"]
+    now = datetime.utcnow()
+    submission_id = new_id()
+    await db.execute(insert(QuizSubmission).values(
+        id=submission_id, quiz_id=quiz_id, user_id=user.id, score=score, passed=passed,
+        time_spent=time_spent, submitted_at=now,
+    ))
+    # One row per selected option; is_correct is the question's result
+    rows = [
+        {
+            "id": new_id(),
+            "submission_id": submission_id,
+            "question_id": question_id,
+            "selected_option_id": option_id,
+            "is_correct": results[question_id],
+            "created_at": now,
+        }
+        for question_id, option_ids in selected.items()
+        for option_id in sorted(option_ids)
+    ]
+    if rows:
+        await db.execute(insert(QuizAnswer), rows)
+    await db.commit()
+    return {
+        "id": submission_id,
+        "quiz_id": quiz_id,
+        "score": score,
+        "passed": passed,
+        "correct_answers": sum(results.values()),
+        "total_questions": len(answer_key["questions"]),
+        "submitted_at": now.isoformat(),
+    }
+
+
+# Cache invalidation on quiz edits
+def _edited_quiz_ids(session):
+    quiz_ids, question_ids = set(), set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Quiz):
+            quiz_ids.add(obj.id)
+        elif isinstance(obj, QuizQuestion):
+            quiz_ids.add(obj.quiz_id)
+        elif isinstance(obj, QuizOption):
+            question_ids.add(obj.question_id)
+    return quiz_ids, question_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_quiz_edits(session, flush_context, instances):
+    quiz_ids, question_ids = _edited_quiz_ids(session)
+    if question_ids:
+        # Options only know their question; resolve the quiz before the flush
+        quiz_ids.update(session.execute(
+            select(QuizQuestion.quiz_id).where(QuizQuestion.id.in_(question_ids))
+        ).scalars())
+    quiz_ids.discard(None)
+    if quiz_ids:
+        session.info.setdefault("edited_quiz_ids", set()).update(quiz_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_quiz_edits(session):
+    quiz_ids = session.info.pop("edited_quiz_ids", None)
+    if not quiz_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync session outside the app (scripts); nothing cached in this process
+        logger.info("Quizzes %s changed outside the event loop; cached keys expire on their TTL", sorted(quiz_ids))
+        return
+    loop.create_task(invalidate_quiz(*quiz_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_quiz_edits(session):
+    session.info.pop("edited_quiz_ids", None)
@@ -0,0 +1,220 @@
+"""
+Background jobs for the Vaikuntha Institute Learning Platform
+
+Slow or CPU-heavy work (rendering certificates) is not done inside requests.
+The change that needs it inserts a row into `jobs` in its own transaction,
+and workers started from the app lifespan pick the row up:
+
+- durable: jobs survive restarts. A claimed job carries a lease
+  (locked_until); if its worker dies, the lease expires and another worker
+  runs the job again.
+- idempotent: `key` is unique (e.g. certificate:{user_id}:{course_id}), so
+  enqueueing the same work twice is a no-op, and handlers must tolerate
+  running twice.
+- retried with exponential backoff up to max_attempts, then left `failed`
+  with last_error for inspection; `enqueue` puts a failed job back.
+- CPU-bound steps go through `JobWorker.run_in_process`, a process pool, so
+  they never block the event loop of the worker serving requests.
+
+Every app process runs a worker; claiming is a single UPDATE (with SKIP
+LOCKED on Postgres) so two workers never run the same job at once.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+from sqlalchemy import and_, or_, select, update
+
+from database import UPSERT_INSERTS, AsyncSessionLocal
+from ids import new_id
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_ENABLED = os.getenv("JOB_WORKER_ENABLED", "1") == "1"
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", str(os.cpu_count() or 1)))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "16"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # seconds
+JOB_LEASE = int(os.getenv("JOB_LEASE", "300"))  # seconds a claimed job may run before it is retried
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "30"))  # seconds, doubled after each failure
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+# kind -> async handler(worker, payload)
+HANDLERS = {}
+
+
+def handler(kind):
+    """
+    Register the coroutine that runs jobs of `kind`
+    """
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+async def enqueue(db, kind, key, payload, max_attempts=JOB_MAX_ATTEMPTS, requeue=("failed",)):
+    """
+    Add a job in the caller's transaction. An existing job with `key` is
+    queued again only if its status is in `requeue`; otherwise this is a no-op.
+    """
+    now = datetime.utcnow()
+    insert = UPSERT_INSERTS[db.bind.dialect.name]
+    statement = insert(Job).values(
+        id=new_id(), kind=kind, key=key, payload=payload, status="queued",
+        attempts=0, max_attempts=max_attempts, run_after=now, created_at=now, updated_at=now,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[Job.key],
+        set_={"status": "queued", "attempts": 0, "run_after": now, "last_error": None, "updated_at": now},
+        where=Job.status.in_(requeue),
+    )
+    await db.execute(statement)
+
+
+async def get_job(db, key):
+    query = select(Job).where(Job.key == key).execution_options(populate_existing=True)
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+def _runnable(now):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_until < now),  # lease expired
+    )
+
+
+async def claim(db, limit=JOB_BATCH_SIZE, lease=JOB_LEASE):
+    """
+    Mark up to `limit` runnable jobs as running and return them
+    """
+    now = datetime.utcnow()
+    candidates = select(Job.id).where(_runnable(now)).order_by(Job.run_after).limit(limit)
+    if db.bind.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    statement = (
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()), _runnable(now))
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            locked_until=now + timedelta(seconds=lease),
+            updated_at=now,
+        )
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    )
+    jobs = (await db.execute(statement, execution_options={"synchronize_session": False})).all()
+    await db.commit()
+    return jobs
+
+
+async def mark_done(db, job_id):
+    await db.execute(
+        update(Job).where(Job.id == job_id).values(
+            status="done", locked_until=None, last_error=None, updated_at=datetime.utcnow()
+        )
+    )
+    await db.commit()
+
+
+async def mark_failed(db, job, error):
+    """
+    Schedule a retry with exponential backoff, or give up after max_attempts
+    """
+    now = datetime.utcnow()
+    if job.attempts >= job.max_attempts:
+        values = {"status": "failed"}
+    else:
+        delay = JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        values = {"status": "queued", "run_after": now + timedelta(seconds=delay)}
+    await db.execute(
+        update(Job).where(Job.id == job.id).values(
+            locked_until=None, last_error=error[:2000], updated_at=now, **values
+        )
+    )
+    await db.commit()
+
+
+class JobWorker:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        processes=JOB_PROCESSES,
+        batch_size=JOB_BATCH_SIZE,
+        poll_interval=JOB_POLL_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.processes = processes
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and driver
+            # threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run_in_process(self, func, *args):
+        """
+        Run a picklable, module-level function in the process pool
+        """
+        if self.processes <= 0:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
+
+    async def _run_job(self, job):
+        func = HANDLERS.get(job.kind)
+        try:
+            if func is None:
+                raise LookupError(f"No handler for job kind '{job.kind}'")
+            await func(self, job.payload)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed, attempt %d/%d", job.id, job.kind, job.attempts, job.max_attempts)
+            async with self.session_factory() as db:
+                await mark_failed(db, job, f"{type(exc).__name__}: {exc}")
+            return False
+        async with self.session_factory() as db:
+            await mark_done(db, job.id)
+        return True
+
+    async def run_once(self):
+        """
+        Claim one batch and run it. Returns the number of jobs claimed.
+        """
+        async with self.session_factory() as db:
+            jobs = await claim(db, self.batch_size)
+        if jobs:
+            await asyncio.gather(*(self._run_job(job) for job in jobs))
+        return len(jobs)
+
+    async def run(self):
+        """
+        Background task started from the app lifespan
+        """
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Job worker iteration failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Shared worker instance
+worker = JobWorker()
@@ -0,0 +1,304 @@
+"""
+Live sessions for the Vaikuntha Institute Learning Platform
+
+A user's schedule (every upcoming session of every course they are enrolled
+in) is loaded with one query: enrollments by (user_id, status), outer-joined
+to live_sessions by (course_id, start_time), so each course costs one index
+range scan. The result is cached per user for LIVE_SCHEDULE_CACHE_TTL
+seconds under the user's schedule tag and a live-sessions tag per enrolled
+course; creating or rescheduling a session invalidates its course's tag and
+enrolling invalidates the user's. Sessions that start while an entry is
+cached are dropped when it is read.
+
+Joining takes a seat when the session has max_participants. The seat is a
+live_session_participants row plus a conditional increment of
+participants_count that only matches while seats are left, in one
+transaction, so the count never passes the limit whatever the concurrency;
+joining again with a seat already taken is free. The counters in `seats`
+stand in front of that, so a class start lets about one join per seat reach
+the database and turns the rest away without a query.
+
+Scheduling, moving or cancelling a session notifies the course's students
+through services.notifications.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select, update
+
+import seats as seat_counters
+from cache import cache, live_session_tag, live_sessions_tag, schedule_tag
+from database import UPSERT_INSERTS
+from ids import new_id
+from models import Course, Enrollment, LiveSession, LiveSessionParticipant
+from schemas import LiveSessionSummary
+from services import notifications
+
+LIVE_SCHEDULE_CACHE_TTL = int(os.getenv("LIVE_SCHEDULE_CACHE_TTL", "60"))  # seconds
+# Joining opens this long before the start time
+LIVE_SESSION_JOIN_WINDOW = timedelta(minutes=int(os.getenv("LIVE_SESSION_JOIN_WINDOW_MINUTES", "15")))
+
+# Enrollments whose sessions appear on the schedule
+SCHEDULE_ENROLLMENT_STATUSES = ("active", "completed")
+SESSION_STATUSES = ("scheduled", "live", "ended", "cancelled")
+
+SESSION_FIELDS = {"title", "description", "start_time", "end_time", "meeting_url", "status", "max_participants"}
+REQUIRED_SESSION_FIELDS = ("title", "start_time", "end_time", "meeting_url")
+
+
+def _unprocessable(detail):
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def _parse_time(value, field):
+    """
+    ISO 8601 to naive UTC, as stored
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise _unprocessable(f"{field} must be an ISO 8601 date and time")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _session_fields(data, required=()):
+    missing = [field for field in required if data.get(field) is None]
+    if missing:
+        raise _unprocessable(f"Missing required fields: {', '.join(missing)}")
+    fields = {key: value for key, value in data.items() if key in SESSION_FIELDS}
+    for field in ("start_time", "end_time"):
+        if field in fields:
+            fields[field] = _parse_time(fields[field], field)
+    if "status" in fields and fields["status"] not in SESSION_STATUSES:
+        raise _unprocessable(f"status must be one of {', '.join(SESSION_STATUSES)}")
+    max_participants = fields.get("max_participants")
+    if max_participants is not None and (not isinstance(max_participants, int) or max_participants < 1):
+        raise _unprocessable("max_participants must be a positive integer")
+    return fields
+
+
+def _check_times(session):
+    if session.end_time <= session.start_time:
+        raise _unprocessable("end_time must be after start_time")
+
+
+async def get_session_or_404(db, session_id):
+    session = await db.get(LiveSession, session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+    return session
+
+
+def _when(session):
+    return session.start_time.strftime("%d %B %Y, %H:%M UTC")
+
+
+async def _announce(db, session, title, message, event):
+    await notifications.announce(
+        db, session.course_id, title, message, "live_session", link=f"/live-sessions/{session.id}",
+        key=f"notification:live-session:{session.id}:{event}:{session.start_time.isoformat()}",
+    )
+
+
+async def create_session(db, course, user, data):
+    session = LiveSession(course_id=course.id, instructor_id=user.id, **_session_fields(data, REQUIRED_SESSION_FIELDS))
+    _check_times(session)
+    db.add(session)
+    await db.flush()
+    await _announce(db, session, f"Live session scheduled: {session.title}",
+                    f"{course.title}: {session.title} starts {_when(session)}.", "scheduled")
+    await db.commit()
+    await cache.invalidate_tags(live_sessions_tag(course.id))
+    return session
+
+
+async def update_session(db, session, data):
+    """
+    Edit or reschedule a session (a new start_time/end_time, or status
+    "cancelled" to drop it from schedules)
+    """
+    fields = _session_fields(data)
+    moved = "start_time" in fields and fields["start_time"] != session.start_time
+    cancelled = fields.get("status") == "cancelled" and session.status != "cancelled"
+    for key, value in fields.items():
+        setattr(session, key, value)
+    _check_times(session)
+    if cancelled:
+        await _announce(db, session, f"Live session cancelled: {session.title}",
+                        f"{session.title} on {_when(session)} has been cancelled.", "cancelled")
+    elif moved:
+        await _announce(db, session, f"Live session rescheduled: {session.title}",
+                        f"{session.title} now starts {_when(session)}.", "rescheduled")
+    await db.commit()
+    await cache.invalidate_tags(live_sessions_tag(session.course_id), live_session_tag(session.id))
+    return session
+
+
+async def list_for_course(db, course_id):
+    query = select(LiveSession).where(LiveSession.course_id == course_id).order_by(LiveSession.start_time)
+    return (await db.execute(query)).scalars().all()
+
+
+def _schedule_query(user_id, now):
+    # Outer join, so enrolled courses without upcoming sessions still give
+    # a row: their tags have to be on the cache entry too
+    return (
+        select(Enrollment.course_id, Course.title, LiveSession)
+        .join(Course, Course.id == Enrollment.course_id)
+        .outerjoin(LiveSession, and_(
+            LiveSession.course_id == Enrollment.course_id,
+            LiveSession.start_time > now,
+            LiveSession.status != "cancelled",
+        ))
+        .where(Enrollment.user_id == user_id, Enrollment.status.in_(SCHEDULE_ENROLLMENT_STATUSES))
+    )
+
+
+async def load_schedule(db, user_id, now=None):
+    """
+    Upcoming sessions across the user's enrollments, soonest first, and the
+    ids of the courses they are enrolled in
+    """
+    rows = (await db.execute(_schedule_query(user_id, now or datetime.utcnow()))).all()
+    sessions = sorted(
+        (
+            LiveSessionSummary.model_validate(session).model_copy(update={"course_title": title}).model_dump(mode="json")
+            for _, title, session in rows if session is not None
+        ),
+        key=lambda entry: (entry["start_time"], entry["id"]),
+    )
+    return sessions, sorted({course_id for course_id, _, _ in rows})
+
+
+async def upcoming_for_user(db, user_id, limit=None):
+    key = f"schedule:{user_id}"
+    sessions = await cache.get(key)
+    if sessions is None:
+        versions = await cache.versions((schedule_tag(user_id),))
+        sessions, course_ids = await load_schedule(db, user_id)
+        # The course tags are only known after the query; a session written
+        # between the query and this read is served until the entry expires
+        tags = (schedule_tag(user_id),) + tuple(live_sessions_tag(course_id) for course_id in course_ids)
+        versions += await cache.versions(tags[1:])
+        await cache.set(key, sessions, ttl=LIVE_SCHEDULE_CACHE_TTL, tags=tags, versions=versions)
+    now = datetime.utcnow().isoformat()
+    upcoming = [session for session in sessions if session["start_time"] > now]
+    return upcoming[:limit] if limit else upcoming
+
+
+async def get_join_info(db, session_id):
+    """
+    What joining needs to know about a session, read through the cache.
+    Returns None if not found.
+    """
+    key, tags = f"live-session:join:{session_id}", (live_session_tag(session_id),)
+    info = await cache.get(key)
+    if info is not None:
+        return info
+
+    versions = await cache.versions(tags)
+    session = await db.get(LiveSession, session_id)
+    if session is None:
+        return None
+    info = {
+        "course_id": session.course_id,
+        "instructor_id": session.instructor_id,
+        "start_time": session.start_time.isoformat(),
+        "end_time": session.end_time.isoformat(),
+        "status": session.status,
+        "max_participants": session.max_participants,
+        "meeting_url": session.meeting_url,
+    }
+    await cache.set(key, info, tags=tags, versions=versions)
+    return info
+
+
+def _session_full():
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Live session is full")
+
+
+async def _has_seat(db, session_id, user_id):
+    query = select(LiveSessionParticipant.id).where(
+        LiveSessionParticipant.session_id == session_id, LiveSessionParticipant.user_id == user_id
+    )
+    return (await db.execute(query)).first() is not None
+
+
+async def _take_seat(db, session_id, course_id, user_id):
+    """
+    Returns (outcome, participants_count after the join or None)
+    """
+    enrolled = select(Enrollment.id).where(
+        Enrollment.user_id == user_id,
+        Enrollment.course_id == course_id,
+        Enrollment.status.in_(SCHEDULE_ENROLLMENT_STATUSES),
+    )
+    if (await db.execute(enrolled)).first() is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enrolled in this course")
+
+    insert = UPSERT_INSERTS[db.bind.dialect.name]
+    seat = await db.execute(
+        insert(LiveSessionParticipant)
+        .values(id=new_id(), session_id=session_id, user_id=user_id, joined_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[LiveSessionParticipant.session_id, LiveSessionParticipant.user_id])
+        .returning(LiveSessionParticipant.id)
+    )
+    if seat.scalar_one_or_none() is None:
+        await db.rollback()
+        return seat_counters.REJOINED, None
+
+    taken = (await db.execute(
+        update(LiveSession)
+        .where(
+            LiveSession.id == session_id,
+            or_(LiveSession.max_participants.is_(None), LiveSession.participants_count < LiveSession.max_participants),
+        )
+        .values(participants_count=LiveSession.participants_count + 1)
+        .returning(LiveSession.participants_count)
+    )).scalar_one_or_none()
+    if taken is None:
+        await db.rollback()
+        return seat_counters.REJECTED, None
+    await db.commit()
+    return seat_counters.JOINED, taken
+
+
+async def join(db, session_id, user, seats=seat_counters.seats):
+    """
+    Admit `user` to a live session and return its meeting URL. Enrolled
+    students take a seat (409 once none are left); the instructor and admins
+    do not need one.
+    """
+    info = await get_join_info(db, session_id)
+    if info is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+    now = datetime.utcnow()
+    opens_at = datetime.fromisoformat(info["start_time"]) - LIVE_SESSION_JOIN_WINDOW
+    if info["status"] in ("ended", "cancelled") or not opens_at <= now < datetime.fromisoformat(info["end_time"]):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Live session is not open for joining")
+    if user.id == info["instructor_id"] or user.role == "admin":
+        return info["meeting_url"]
+
+    capacity = info["max_participants"]
+    answer = await seats.admit(session_id, user.id, capacity)
+    if answer == seat_counters.ADMITTED:
+        return info["meeting_url"]
+    if answer == seat_counters.FULL:
+        # Per-process counters do not know seats taken through other workers
+        if not seats.authoritative and await _has_seat(db, session_id, user.id):
+            return info["meeting_url"]
+        raise _session_full()
+
+    try:
+        outcome, taken = await _take_seat(db, session_id, info["course_id"], user.id)
+    except BaseException:
+        await seats.settle(session_id, user.id, seat_counters.FAILED)
+        raise
+    await seats.settle(session_id, user.id, outcome, taken, capacity)
+    if outcome == seat_counters.REJECTED:
+        raise _session_full()
+    return info["meeting_url"]
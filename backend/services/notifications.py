@@ -0,0 +1,182 @@
+"""
+Notifications for the Vaikuntha Institute Learning Platform
+
+Announcing something to a course (a live session scheduled or moved, an
+instructor's update) writes one notification per enrolled student, which can
+be 100k rows. `announce` only enqueues a job in the caller's transaction; the
+job worker (services.jobs) then pages through the recipients
+NOTIFICATION_BATCH_SIZE at a time (keyset on the (course_id, user_id) index)
+and inserts each page with one executemany, committing after each batch, so
+neither a transaction nor the event loop holds more than one batch.
+
+Each notification id is derived from the job key and the user id, and rows
+are inserted with ON CONFLICT DO NOTHING, so a job that is retried or runs
+twice after its lease expired finishes the fan-out without duplicates.
+
+The unread count shown on every page is cached per user under the user's
+inbox tag; the fan-out invalidates the tags of each batch it delivers, and
+marking notifications read invalidates the reader's.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import false, func, select, tuple_, update
+
+from cache import cache, inbox_tag
+from database import UPSERT_INSERTS
+from models import Enrollment, Notification
+from services import jobs
+
+JOB_KIND = "notification-fanout"
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "1000"))
+
+# Enrollments that receive course announcements
+RECIPIENT_STATUSES = ("active", "completed")
+
+# Namespace for notification ids derived from (job key, user id)
+NOTIFICATION_NAMESPACE = uuid.UUID("5b8d5f3e-3c1a-4f43-9a57-8d6f0c1e2b74")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _unread():
+    # `read = false` rather than IS FALSE, which Postgres cannot look up in
+    # the (user_id, read, created_at) index
+    return Notification.read == false()
+
+
+def delivery_id(key, user_id):
+    return str(uuid.uuid5(NOTIFICATION_NAMESPACE, f"{key}:{user_id}"))
+
+
+async def announce(db, course_id, title, message, type, link=None, key=None):
+    """
+    Queue a notification to every student enrolled in a course, in the
+    caller's transaction. Returns the job key. Pass a `key` that names the
+    event so enqueueing it twice sends it once.
+    """
+    key = key or f"notification:{uuid.uuid4()}"
+    await jobs.enqueue(db, JOB_KIND, key, {
+        "key": key,
+        "course_id": course_id,
+        "title": title,
+        "message": message,
+        "type": type,
+        "link": link,
+        "created_at": datetime.utcnow().isoformat(),
+    })
+    return key
+
+
+async def recipients(db, course_id, after=None, limit=None):
+    """
+    Ids of the students to notify, in user id order, starting after `after`
+    """
+    query = select(Enrollment.user_id).where(
+        Enrollment.course_id == course_id, Enrollment.status.in_(RECIPIENT_STATUSES)
+    )
+    if after is not None:
+        query = query.where(Enrollment.user_id > after)
+    query = query.order_by(Enrollment.user_id).limit(limit)
+    return (await db.execute(query)).scalars().all()
+
+
+async def deliver(db, payload, user_ids):
+    """
+    Insert one batch of notifications and commit
+    """
+    created_at = datetime.fromisoformat(payload["created_at"])
+    rows = [
+        {"id": delivery_id(payload["key"], user_id), "user_id": user_id, "title": payload["title"],
+         "message": payload["message"], "type": payload["type"], "read": False, "link": payload["link"],
+         "created_at": created_at}
+        for user_id in user_ids
+    ]
+    insert = UPSERT_INSERTS[db.bind.dialect.name]
+    await db.execute(insert(Notification).on_conflict_do_nothing(index_elements=[Notification.id]), rows)
+    await db.commit()
+
+
+@jobs.handler(JOB_KIND)
+async def fan_out(worker, payload, batch_size=None):
+    batch_size = batch_size or NOTIFICATION_BATCH_SIZE
+    after = None
+    while True:
+        async with worker.session_factory() as db:
+            batch = await recipients(db, payload["course_id"], after, batch_size)
+            if not batch:
+                return
+            await deliver(db, payload, batch)
+        await cache.invalidate_tags(*(inbox_tag(user_id) for user_id in batch))
+        after = batch[-1]
+        # Let requests on this worker run between batches
+        await asyncio.sleep(0)
+
+
+# Inbox
+def encode_cursor(notification):
+    data = json.dumps({"t": notification.created_at.isoformat(), "id": notification.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()))
+        return datetime.fromisoformat(payload["t"]), payload["id"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+async def list_inbox(db, user_id, unread=False, cursor=None, limit=20):
+    """
+    One page of the user's notifications, newest first, and the cursor for
+    the next page (None on the last one)
+    """
+    query = select(Notification).where(Notification.user_id == user_id)
+    if unread:
+        query = query.where(_unread())
+    if cursor:
+        query = query.where(tuple_(Notification.created_at, Notification.id) < decode_cursor(cursor))
+    query = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+    items = (await db.execute(query)).scalars().all()
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
+
+
+async def unread_count(db, user_id):
+    key, tags = f"inbox:unread:{user_id}", (inbox_tag(user_id),)
+    count = await cache.get(key)
+    if count is not None:
+        return count
+
+    versions = await cache.versions(tags)
+    query = select(func.count()).select_from(Notification).where(
+        Notification.user_id == user_id, _unread()
+    )
+    count = (await db.execute(query)).scalar_one()
+    await cache.set(key, count, tags=tags, versions=versions)
+    return count
+
+
+async def mark_read(db, user_id, notification_id=None):
+    """
+    Mark one notification (or, without an id, all of them) read
+    """
+    statement = update(Notification).where(Notification.user_id == user_id, _unread())
+    if notification_id is not None:
+        exists = select(Notification.id).where(Notification.id == notification_id, Notification.user_id == user_id)
+        if (await db.execute(exists)).first() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
+        statement = statement.where(Notification.id == notification_id)
+    result = await db.execute(statement.values(read=True))
+    await db.commit()
+    await cache.invalidate_tags(inbox_tag(user_id))
+    return result.rowcount
@@ -0,0 +1,170 @@
+"""
+Lecture progress tracking for the Vaikuntha Institute Learning Platform
+
+Video players report progress constantly, so a batch of lecture completions
+is written with a fixed number of statements regardless of its size:
+
+1. one SELECT keeping only lectures that belong to the enrollment's course
+2. one INSERT ... ON CONFLICT (enrollment_id, lecture_id) DO UPDATE that
+   marks items completed, returning only the rows that were not completed
+   before
+3. one UPDATE for lectures being marked incomplete again
+4. one UPDATE that moves Enrollment.completed_lectures by the net change
+   and derives progress and status from it
+
+The percentage is never recomputed by scanning progress_items; it follows
+from the stored counter and Course.lectures_count.
+"""
+
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, case, select, update
+
+from database import UPSERT_INSERTS
+from ids import new_id
+from models import Course, Enrollment, Lecture, ProgressItem, Section
+from services import certificates
+
+# Largest batch accepted by PATCH /enrollments/{id}/progress
+MAX_BATCH_SIZE = 500
+
+
+def parse_updates(progress_data):
+    """
+    Accept either {"lectures": [{"lecture_id", "completed"}, ...]} or a
+    single {"lecture_id", "completed"} and return {lecture_id: completed}.
+    The last entry for a lecture wins.
+    """
+    items = progress_data.get("lectures")
+    if items is None:
+        items = [progress_data]
+    if not isinstance(items, list) or len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Send between 1 and {MAX_BATCH_SIZE} lecture updates",
+        )
+    updates = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("lecture_id"), str):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Each update needs a lecture_id")
+        updates[item["lecture_id"]] = bool(item.get("completed", True))
+    return updates
+
+
+async def _course_lecture_ids(db, course_id, lecture_ids):
+    query = (
+        select(Lecture.id)
+        .join(Section, Lecture.section_id == Section.id)
+        .where(Section.course_id == course_id, Lecture.id.in_(lecture_ids))
+    )
+    return set((await db.execute(query)).scalars().all())
+
+
+async def _mark_completed(db, enrollment_id, lecture_ids, now):
+    insert = UPSERT_INSERTS[db.bind.dialect.name]
+    rows = [
+        {
+            "id": new_id(),
+            "enrollment_id": enrollment_id,
+            "lecture_id": lecture_id,
+            "completed": True,
+            "completion_date": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for lecture_id in sorted(lecture_ids)  # stable order avoids lock-order deadlocks
+    ]
+    statement = insert(ProgressItem).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProgressItem.enrollment_id, ProgressItem.lecture_id],
+        set_={"completed": True, "completion_date": now, "updated_at": now},
+        where=ProgressItem.completed.is_not(True),
+    ).returning(ProgressItem.lecture_id)
+    return len((await db.execute(statement)).all())
+
+
+async def _mark_incomplete(db, enrollment_id, lecture_ids, now):
+    result = await db.execute(
+        update(ProgressItem)
+        .where(
+            ProgressItem.enrollment_id == enrollment_id,
+            ProgressItem.lecture_id.in_(lecture_ids),
+            ProgressItem.completed.is_(True),
+        )
+        .values(completed=False, completion_date=None, updated_at=now),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount
+
+
+async def _apply_delta(db, enrollment_id, delta, now):
+    completed = Enrollment.completed_lectures + delta
+    total = select(Course.lectures_count).where(Course.id == Enrollment.course_id).scalar_subquery()
+    finished = and_(total > 0, completed >= total)
+    statement = (
+        update(Enrollment)
+        .where(Enrollment.id == enrollment_id)
+        .values(
+            completed_lectures=completed,
+            progress=case((total <= 0, 0.0), (finished, 100.0), else_=completed * 100.0 / total),
+            status=case(
+                (Enrollment.status == "refunded", Enrollment.status),
+                (finished, "completed"),
+                else_="active",
+            ),
+            completion_date=case(
+                (finished, case((Enrollment.completion_date.is_(None), now), else_=Enrollment.completion_date)),
+                else_=None,
+            ),
+            updated_at=now,
+        )
+        .returning(
+            Enrollment.user_id,
+            Enrollment.completed_lectures,
+            Enrollment.progress,
+            Enrollment.status,
+            Enrollment.completion_date,
+        )
+    )
+    return (await db.execute(statement, execution_options={"synchronize_session": False})).one()
+
+
+async def write_progress(db, enrollment_id, course_id, updates):
+    """
+    Apply {lecture_id: completed} to an enrollment without committing.
+    Lectures from other courses are ignored; completing the course queues its
+    certificate. Returns (accepted lecture ids, enrollment row with user_id,
+    completed_lectures, progress, status, completion_date).
+    """
+    now = datetime.utcnow()
+    valid = await _course_lecture_ids(db, course_id, list(updates))
+    completed = [lecture_id for lecture_id in valid if updates[lecture_id]]
+    incomplete = [lecture_id for lecture_id in valid if not updates[lecture_id]]
+
+    delta = 0
+    if completed:
+        delta += await _mark_completed(db, enrollment_id, completed, now)
+    if incomplete:
+        delta -= await _mark_incomplete(db, enrollment_id, incomplete, now)
+    state = await _apply_delta(db, enrollment_id, delta, now)
+    if state.status == "completed" and state.completion_date == now:
+        # Just completed: issue the certificate in the background
+        await certificates.enqueue_certificate(db, state.user_id, course_id)
+    return valid, state
+
+
+async def apply_progress(db, enrollment_id, course_id, updates):
+    """
+    `write_progress` in its own transaction
+    """
+    valid, state = await write_progress(db, enrollment_id, course_id, updates)
+    await db.commit()
+    return valid, state
+
+
+async def completed_lecture_ids(db, enrollment_id):
+    query = select(ProgressItem.lecture_id).where(
+        ProgressItem.enrollment_id == enrollment_id, ProgressItem.completed.is_(True)
+    )
+    return (await db.execute(query)).scalars().all()
@@ -0,0 +1,201 @@
+"""
+Write-behind buffer for progress heartbeats for the Vaikuntha Institute Learning Platform
+
+Players send a heartbeat every few seconds while a lecture is playing. Writing
+each one would turn thousands of viewers into thousands of transactions per
+second on progress_items, so heartbeats are collected in memory and written
+in batches by a background task:
+
+- only completions are buffered: a heartbeat never marks a lecture
+  incomplete (that goes through PATCH /enrollments/{id}/progress), and one
+  that carries no completion has nothing to write
+- completions are coalesced per (enrollment, lecture), so a player that keeps
+  reporting a finished lecture costs one row per flush
+- a flush runs every PROGRESS_FLUSH_INTERVAL seconds, as soon as
+  PROGRESS_FLUSH_SIZE distinct lectures are pending, and on shutdown
+- each flush writes through `progress.write_progress`, committing once per
+  PROGRESS_FLUSH_CHUNK enrollments
+- at most PROGRESS_BUFFER_MAX lectures are held; beyond that `add` refuses
+  new keys and the route answers 503 so players retry later
+
+Durability guarantees:
+
+- a heartbeat answered with 202 is NOT yet durable. If the process dies
+  without running the lifespan shutdown (SIGKILL, OOM, power loss), every
+  update accepted since the last successful flush is lost: at most
+  PROGRESS_FLUSH_INTERVAL seconds of heartbeats, or PROGRESS_BUFFER_MAX
+  lectures if the database was unavailable. Players report a finished
+  lecture on every heartbeat while it is open, so a lost completion is
+  recorded again the next time the lecture is played.
+- a graceful shutdown (SIGTERM/SIGINT) flushes everything still pending.
+- if the database is unavailable (OperationalError) a chunk is put back and
+  retried on the next flush. Any other failure retries the chunk one
+  enrollment per transaction and drops (and logs) only the enrollments that
+  still fail, e.g. one deleted since its heartbeat was accepted.
+- writes are idempotent upserts, so several workers with their own buffers
+  may flush the same enrollment safely.
+
+Clients that need a completion to be durable before continuing (e.g. the last
+lecture of a course) should use PATCH /enrollments/{id}/progress instead.
+"""
+
+import asyncio
+import logging
+import os
+
+from sqlalchemy.exc import OperationalError
+
+from database import AsyncSessionLocal
+from services import progress
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5"))  # seconds
+PROGRESS_FLUSH_SIZE = int(os.getenv("PROGRESS_FLUSH_SIZE", "5000"))
+PROGRESS_FLUSH_CHUNK = int(os.getenv("PROGRESS_FLUSH_CHUNK", "200"))  # enrollments per transaction
+PROGRESS_BUFFER_MAX = int(os.getenv("PROGRESS_BUFFER_MAX", "50000"))
+
+
+class ProgressBuffer:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        flush_interval=PROGRESS_FLUSH_INTERVAL,
+        flush_size=PROGRESS_FLUSH_SIZE,
+        flush_chunk=PROGRESS_FLUSH_CHUNK,
+        max_pending=PROGRESS_BUFFER_MAX,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.flush_chunk = flush_chunk
+        self.max_pending = max_pending
+        self._pending = {}  # enrollment_id -> (course_id, set of completed lecture ids)
+        self._size = 0  # distinct (enrollment, lecture) keys in _pending
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.stats = {"accepted": 0, "coalesced": 0, "rejected": 0, "flushed": 0, "dropped": 0, "failed_flushes": 0}
+
+    def __len__(self):
+        return self._size
+
+    def add(self, enrollment_id, course_id, lecture_id):
+        """
+        Queue a lecture completion. Returns False when the buffer is full and
+        the update was not accepted.
+        """
+        entry = self._pending.get(enrollment_id)
+        if entry is not None and lecture_id in entry[1]:
+            self.stats["coalesced"] += 1
+            return True
+        if self._size >= self.max_pending:
+            self.stats["rejected"] += 1
+            return False
+        if entry is None:
+            entry = self._pending[enrollment_id] = (course_id, set())
+        entry[1].add(lecture_id)
+        self._size += 1
+        self.stats["accepted"] += 1
+        if self._size >= self.flush_size:
+            self._wake.set()
+        return True
+
+    async def flush(self):
+        """
+        Write everything pending. Returns the number of lectures written.
+        """
+        async with self._flush_lock:
+            batch, self._pending, self._size = self._pending, {}, 0
+            items = list(batch.items())
+            written = 0
+            for start in range(0, len(items), self.flush_chunk):
+                chunk = items[start:start + self.flush_chunk]
+                try:
+                    await self._write(chunk)
+                except OperationalError:
+                    logger.exception("Progress flush failed; %d enrollments requeued", len(chunk))
+                    self.stats["failed_flushes"] += 1
+                    self._requeue(chunk)
+                    continue
+                except Exception:
+                    logger.exception("Progress flush failed; retrying %d enrollments one by one", len(chunk))
+                    self.stats["failed_flushes"] += 1
+                    written += await self._write_each(chunk)
+                    continue
+                written += sum(len(lecture_ids) for _, (_, lecture_ids) in chunk)
+            self.stats["flushed"] += written
+            return written
+
+    async def _write(self, chunk):
+        async with self.session_factory() as db:
+            for enrollment_id, (course_id, lecture_ids) in chunk:
+                updates = dict.fromkeys(lecture_ids, True)
+                await progress.write_progress(db, enrollment_id, course_id, updates)
+            await db.commit()
+
+    async def _write_each(self, chunk):
+        written = 0
+        for item in chunk:
+            try:
+                await self._write([item])
+            except OperationalError:
+                self._requeue([item])
+            except Exception:
+                logger.exception("Dropping buffered progress for enrollment %s", item[0])
+                self.stats["dropped"] += len(item[1][1])
+            else:
+                written += len(item[1][1])
+        return written
+
+    def _requeue(self, chunk):
+        # Merge with heartbeats that arrived during the flush; anything that
+        # no longer fits is dropped
+        for enrollment_id, (course_id, lecture_ids) in chunk:
+            entry = self._pending.get(enrollment_id)
+            for lecture_id in lecture_ids:
+                if entry is not None and lecture_id in entry[1]:
+                    continue
+                if self._size >= self.max_pending:
+                    self.stats["rejected"] += 1
+                    continue
+                if entry is None:
+                    entry = self._pending[enrollment_id] = (course_id, set())
+                entry[1].add(lecture_id)
+                self._size += 1
+
+    async def run(self):
+        """
+        Background task started from the app lifespan
+        """
+        # asyncio.wait rather than wait_for: on 3.11 wait_for can swallow a
+        # cancellation that races with the event, leaving shutdown hanging
+        waiter = None
+        try:
+            while True:
+                if waiter is None or waiter.done():
+                    waiter = asyncio.ensure_future(self._wake.wait())
+                await asyncio.wait({waiter}, timeout=self.flush_interval)
+                self._wake.clear()
+                if self._size:
+                    # Cancelling the task must not abandon a batch half-written;
+                    # close() waits for the shielded flush through the lock
+                    await asyncio.shield(self.flush())
+        finally:
+            if waiter is not None:
+                waiter.cancel()
+
+    async def close(self):
+        """
+        Final flush on shutdown, after any flush already running
+        """
+        async with self._flush_lock:
+            pass
+        if self._size:
+            written = await self.flush()
+            logger.info("Flushed %d buffered progress updates on shutdown", written)
+        if self._size:
+            logger.error("Dropping %d progress updates that could not be written", self._size)
+
+
+# Shared buffer instance
+buffer = ProgressBuffer()
@@ -0,0 +1,82 @@
+"""
+Course full-text search for the Vaikuntha Institute Learning Platform
+
+Postgres matches against the generated `courses.search_vector` column (GIN
+indexed) and ranks with ts_rank_cd. SQLite, used for local runs and
+benchmarks, matches against the `courses_fts` FTS5 table and ranks with
+bm25. Both are created next to the courses table in models.py. Other
+databases fall back to a case-insensitive LIKE scan.
+
+The last search term is matched as a prefix so partially typed words work
+for typeahead.
+"""
+
+import re
+
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+from models import Course
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+
+def search_terms(text):
+    """
+    Split user input into lower-cased word tokens, dropping query syntax
+    """
+    return [term.lower() for term in TERM_PATTERN.findall(text or "")][:MAX_TERMS]
+
+
+def _pg_tsquery(terms):
+    parts = [f"{term}:*" if i == len(terms) - 1 else term for i, term in enumerate(terms)]
+    return func.to_tsquery("english", " & ".join(parts))
+
+
+def _fts5_match(terms):
+    parts = [f'"{term}"*' if i == len(terms) - 1 else f'"{term}"' for i, term in enumerate(terms)]
+    return " ".join(parts)
+
+
+def apply_search(query, dialect, terms):
+    """
+    Restrict `query` to courses matching `terms`.
+
+    Returns the filtered query and the expression to order it by, best match
+    first.
+    """
+    if dialect == "postgresql":
+        vector = literal_column("courses.search_vector")
+        tsquery = _pg_tsquery(terms)
+        return query.where(vector.op("@@")(tsquery)), func.ts_rank_cd(vector, tsquery).desc()
+
+    if dialect == "sqlite":
+        fts = table("courses_fts", column("rowid"), column("rank"))
+        query = query.join(fts, fts.c.rowid == literal_column("courses.rowid")).where(
+            literal_column("courses_fts").op("MATCH")(_fts5_match(terms))
+        )
+        # FTS5 rank is bm25, where lower is better
+        return query, fts.c.rank.asc()
+
+    conditions = [
+        or_(
+            Course.title.ilike(f"%{term}%"),
+            Course.short_description.ilike(f"%{term}%"),
+            Course.description.ilike(f"%{term}%"),
+        )
+        for term in terms
+    ]
+    return query.where(*conditions), Course.rating.desc()
+
+
+async def suggest(db, text, limit=8):
+    """
+    Typeahead suggestions: published course titles matching the prefix typed so far
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    query = select(Course.id, Course.title, Course.slug).where(Course.status == "published")
+    query, rank = apply_search(query, db.bind.dialect.name, terms)
+    rows = await db.execute(query.order_by(rank).limit(limit))
+    return [{"id": row.id, "title": row.title, "slug": row.slug} for row in rows]
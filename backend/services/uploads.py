@@ -0,0 +1,189 @@
+"""
+Assignment and media uploads for the Vaikuntha Institute Learning Platform
+
+Files are streamed into `storage` and only then referenced from the
+database: a row never points at a partly written object, and if the
+transaction fails the stored object is deleted again.
+
+Small files (assignments, images) go through a single multipart/form-data
+request; Starlette spools those to a temporary file while parsing the form,
+so they never sit in memory either, and they are copied to storage chunk by
+chunk. Videos use a resumable upload: create it, PUT each part as a raw
+request body (streamed with `request.stream()`, never buffered), check which
+parts arrived after a dropped connection, then complete it.
+"""
+
+import os
+import re
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from models import Assignment, AssignmentSubmission, Enrollment
+from storage import (
+    ChecksumMismatch,
+    StorageError,
+    UploadNotFound,
+    UploadTooLarge,
+    iter_upload_file,
+    storage,
+)
+
+MAX_ASSIGNMENT_UPLOAD = int(os.getenv("UPLOAD_MAX_ASSIGNMENT_SIZE", str(50 * 1024 * 1024)))  # bytes
+MAX_MEDIA_UPLOAD = int(os.getenv("UPLOAD_MAX_MEDIA_SIZE", str(10 * 1024 * 1024 * 1024)))  # bytes
+MAX_PART_SIZE = int(os.getenv("UPLOAD_MAX_PART_SIZE", str(256 * 1024 * 1024)))  # bytes
+RECOMMENDED_PART_SIZE = 64 * 1024 * 1024
+
+MEDIA_TYPES = ("image", "video", "audio", "document")
+
+
+def safe_filename(filename):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "-", os.path.basename(filename or "")).strip(".-")
+    return name[:120] or "file"
+
+
+def _storage_error(exc):
+    if isinstance(exc, UploadTooLarge):
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    if isinstance(exc, ChecksumMismatch):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if isinstance(exc, UploadNotFound):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def check_content_length(request, limit):
+    """
+    Reject a body that announces itself as too large before reading any of it
+    """
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Upload exceeds {limit} bytes")
+
+
+async def store_file(key, chunks, max_size, expected_sha256=None):
+    try:
+        return await storage.put(key, chunks, max_size=max_size, expected_sha256=expected_sha256)
+    except StorageError as exc:
+        raise _storage_error(exc)
+
+
+async def submit_assignment(db, user, assignment_id, content, file=None):
+    """
+    Store an assignment submission, streaming the attached file (if any) to
+    storage before the row that references it is written
+    """
+    assignment = await db.get(Assignment, assignment_id)
+    if assignment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
+    enrolled = await db.execute(
+        select(Enrollment.id).where(Enrollment.user_id == user.id, Enrollment.course_id == assignment.course_id)
+    )
+    if enrolled.first() is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only enrolled students can submit")
+
+    stored = None
+    if file is not None:
+        key = f"assignments/{assignment.id}/{user.id}/{uuid.uuid4().hex}-{safe_filename(file.filename)}"
+        stored = await store_file(key, iter_upload_file(file), MAX_ASSIGNMENT_UPLOAD)
+
+    submission = AssignmentSubmission(
+        assignment_id=assignment.id,
+        user_id=user.id,
+        content=content,
+        file_url=stored["url"] if stored else None,
+    )
+    db.add(submission)
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        if stored:
+            await storage.delete(stored["key"])
+        raise
+    return {
+        "id": submission.id,
+        "assignment_id": submission.assignment_id,
+        "content": submission.content,
+        "file_url": submission.file_url,
+        "file_size": stored["size"] if stored else None,
+        "file_sha256": stored["sha256"] if stored else None,
+        "submitted_at": submission.submitted_at.isoformat(),
+    }
+
+
+def _media_type(media_type):
+    if media_type not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"type must be one of {', '.join(MEDIA_TYPES)}",
+        )
+    return media_type
+
+
+def media_key(user, media_type, filename):
+    return f"media/{user.id}/{_media_type(media_type)}/{uuid.uuid4().hex}-{safe_filename(filename)}"
+
+
+async def upload_media(user, media_type, file):
+    stored = await store_file(media_key(user, media_type, file.filename), iter_upload_file(file), MAX_MEDIA_UPLOAD)
+    return {"type": media_type, **stored}
+
+
+# Resumable uploads
+async def start_upload(user, media_type, filename):
+    key = media_key(user, media_type, filename)
+    upload_id = await storage.create_multipart(key)
+    return {"upload_id": upload_id, "key": key, "part_size": RECOMMENDED_PART_SIZE, "max_part_size": MAX_PART_SIZE}
+
+
+async def _owned_upload(user, upload_id):
+    try:
+        key = await storage.upload_key(upload_id)
+    except StorageError as exc:
+        raise _storage_error(exc)
+    if not key.startswith(f"media/{user.id}/") and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your upload")
+    return key
+
+
+async def upload_part(user, upload_id, part_number, request, expected_sha256=None):
+    """
+    Stream one part from the raw request body
+    """
+    if not 1 <= part_number <= 10000:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="part_number must be 1-10000")
+    await _owned_upload(user, upload_id)
+    check_content_length(request, MAX_PART_SIZE)
+    try:
+        return await storage.upload_part(
+            upload_id, part_number, request.stream(), max_size=MAX_PART_SIZE, expected_sha256=expected_sha256
+        )
+    except StorageError as exc:
+        raise _storage_error(exc)
+
+
+async def list_parts(user, upload_id):
+    key = await _owned_upload(user, upload_id)
+    try:
+        parts = await storage.list_parts(upload_id)
+    except StorageError as exc:
+        raise _storage_error(exc)
+    return {"upload_id": upload_id, "key": key, "parts": parts}
+
+
+async def complete_upload(user, upload_id):
+    await _owned_upload(user, upload_id)
+    try:
+        return await storage.complete_multipart(upload_id, max_size=MAX_MEDIA_UPLOAD)
+    except StorageError as exc:
+        raise _storage_error(exc)
+
+
+async def abort_upload(user, upload_id):
+    await _owned_upload(user, upload_id)
+    try:
+        await storage.abort_multipart(upload_id)
+    except StorageError as exc:
+        raise _storage_error(exc)
@@ -0,0 +1,134 @@
+"""
+User accounts for the Vaikuntha Institute Learning Platform
+"""
+
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from auth import invalidate_user
+from models import Enrollment, User
+from passwords import HashingBusy, hasher
+
+MIN_PASSWORD_LENGTH = 8
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Fields a user may change on their own profile; admins may also change the rest
+PROFILE_FIELDS = ("name", "avatar", "bio")
+ADMIN_FIELDS = ("role", "is_active")
+ROLES = ("student", "teacher", "admin")
+
+
+def _unprocessable(detail):
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def _normalize_email(email):
+    if not isinstance(email, str) or not EMAIL_PATTERN.match(email.strip()):
+        raise _unprocessable("A valid email is required")
+    return email.strip().lower()
+
+
+async def _hashing(method, *args):
+    try:
+        return await method(*args)
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-ins in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _check_password(password):
+    if not isinstance(password, str) or len(password) < MIN_PASSWORD_LENGTH:
+        raise _unprocessable(f"Password must be at least {MIN_PASSWORD_LENGTH} characters")
+    return password
+
+
+async def get_by_email(db, email):
+    return (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+
+
+async def register(db, data):
+    name = (data.get("name") or "").strip()
+    if not name:
+        raise _unprocessable("Name is required")
+    email = _normalize_email(data.get("email"))
+    password = _check_password(data.get("password"))
+    if await get_by_email(db, email) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email is already registered")
+
+    user = User(name=name, email=email, hashed_password=await _hashing(hasher.hash, password), role="student")
+    db.add(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email is already registered")
+    return user
+
+
+async def authenticate(db, email, password):
+    """
+    Return the active user with these credentials, or None. A hash made
+    with another bcrypt cost is replaced with one at the configured cost.
+    """
+    user = await get_by_email(db, (email or "").strip().lower())
+    hashed_password = user.hashed_password if user else await _hashing(hasher.dummy_hash)
+    valid, new_hash = await _hashing(hasher.verify_and_update, password or "", hashed_password)
+    if user is None or not valid or not user.is_active:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+
+def ensure_self_or_admin(user_id, user):
+    if user_id != user.id and user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to access this user")
+
+
+async def get_user(db, user_id):
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
+
+
+async def update_user(db, user_id, data, current):
+    """
+    Update a profile. Users may change their own name, avatar, bio and
+    password; admins may also change role and is_active.
+    """
+    ensure_self_or_admin(user_id, current)
+    allowed = PROFILE_FIELDS + (ADMIN_FIELDS if current.role == "admin" else ())
+    unknown = set(data) - set(allowed) - {"password"}
+    if unknown:
+        raise _unprocessable(f"Cannot update: {', '.join(sorted(unknown))}")
+    if "role" in data and data["role"] not in ROLES:
+        raise _unprocessable(f"role must be one of {', '.join(ROLES)}")
+    if "is_active" in data and not isinstance(data["is_active"], bool):
+        raise _unprocessable("is_active must be true or false")
+
+    user = await get_user(db, user_id)
+    for field in allowed:
+        if field in data:
+            setattr(user, field, data[field])
+    if "password" in data:
+        if user_id != current.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the user can change their password")
+        user.hashed_password = await _hashing(hasher.hash, _check_password(data["password"]))
+    await db.commit()
+    # Cached principals carry role and is_active
+    await invalidate_user(user.id)
+    return user
+
+
+async def list_enrollments(db, user_id, current):
+    ensure_self_or_admin(user_id, current)
+    query = select(Enrollment).where(Enrollment.user_id == user_id).order_by(Enrollment.enrollment_date.desc())
+    return (await db.execute(query)).scalars().all()
@@ -0,0 +1,389 @@
+"""
+File storage for the Vaikuntha Institute Learning Platform
+
+Uploads are streamed: bodies are read in chunks and piped to the backend as
+they arrive, with the size limit and SHA-256 checked on the fly, so a worker
+holds one chunk (local) or spools one part to a temporary file (S3) no matter
+how large the file is. Nothing is visible under its final key until the
+whole stream has been written.
+
+Two interchangeable backends with the same async interface:
+
+- LocalStorage: files under STORAGE_ROOT (the default)
+- S3Storage: any S3-compatible service; point S3_ENDPOINT_URL at MinIO or
+  another stand-in for local development. Needs boto3.
+
+Large files use resumable multipart uploads: `create_multipart`, then
+`upload_part` for each part in any order (a failed part is simply sent
+again), `list_parts` to see what a client still has to send, and finally
+`complete_multipart` or `abort_multipart`.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import uuid
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "uploads")
+STORAGE_BASE_URL = os.getenv("STORAGE_BASE_URL", "/uploads")
+S3_BUCKET = os.getenv("S3_BUCKET", "vaikuntha-uploads")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes read from a request at a time
+S3_PART_SIZE = 8 * 1024 * 1024  # S3 requires at least 5 MiB per part except the last
+SPOOL_MAX_MEMORY = 4 * 1024 * 1024  # S3 parts spill to disk beyond this
+
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+(/[A-Za-z0-9._-]+)*$")
+
+
+class StorageError(Exception):
+    pass
+
+
+class UploadTooLarge(StorageError):
+    pass
+
+
+class ChecksumMismatch(StorageError):
+    pass
+
+
+class UploadNotFound(StorageError):
+    pass
+
+
+def check_key(key):
+    if not KEY_PATTERN.match(key) or ".." in key.split("/"):
+        raise StorageError(f"Invalid storage key '{key}'")
+    return key
+
+
+async def iter_upload_file(file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Read a FastAPI UploadFile in chunks instead of `await file.read()`
+    """
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_bytes(data, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Chunk stream over data that is already in memory (generated files)
+    """
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+class Meter:
+    """
+    Pass-through for a chunk stream that counts bytes, hashes them and
+    raises UploadTooLarge as soon as `max_size` is exceeded
+    """
+
+    def __init__(self, chunks, max_size=None):
+        self.chunks = chunks
+        self.max_size = max_size
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    @property
+    def sha256(self):
+        return self.digest.hexdigest()
+
+    async def __aiter__(self):
+        async for chunk in self.chunks:
+            self.size += len(chunk)
+            if self.max_size is not None and self.size > self.max_size:
+                raise UploadTooLarge(f"Upload exceeds {self.max_size} bytes")
+            self.digest.update(chunk)
+            yield chunk
+
+    def verify(self, expected_sha256):
+        if expected_sha256 and expected_sha256.lower() != self.sha256:
+            raise ChecksumMismatch("Uploaded data does not match the given SHA-256")
+
+
+class LocalStorage:
+    """
+    Files on the local filesystem. Writes go to a temporary file next to the
+    target and are renamed into place once complete.
+    """
+
+    def __init__(self, root=STORAGE_ROOT, base_url=STORAGE_BASE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self.multipart_root = os.path.join(self.root, ".multipart")
+
+    def _path(self, key):
+        return os.path.join(self.root, *check_key(key).split("/"))
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    async def _write(self, path, meter, expected_sha256=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(partial, "wb") as target:
+                async for chunk in meter:
+                    await asyncio.to_thread(target.write, chunk)
+            meter.verify(expected_sha256)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+    async def put(self, key, chunks, max_size=None, expected_sha256=None):
+        """
+        Stream `chunks` to `key`. Returns {"key", "url", "size", "sha256"}.
+        """
+        meter = Meter(chunks, max_size)
+        await self._write(self._path(key), meter, expected_sha256)
+        return {"key": key, "url": self.url(key), "size": meter.size, "sha256": meter.sha256}
+
+    async def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    # Multipart uploads: one directory per upload holding its key and parts
+    def _upload_dir(self, upload_id):
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id or ""):
+            raise UploadNotFound(upload_id)
+        path = os.path.join(self.multipart_root, upload_id)
+        if not os.path.isdir(path):
+            raise UploadNotFound(upload_id)
+        return path
+
+    async def create_multipart(self, key):
+        check_key(key)
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.multipart_root, upload_id)
+        os.makedirs(path)
+        with open(os.path.join(path, "key"), "w") as meta:
+            meta.write(key)
+        return upload_id
+
+    async def upload_key(self, upload_id):
+        with open(os.path.join(self._upload_dir(upload_id), "key")) as meta:
+            return meta.read()
+
+    async def upload_part(self, upload_id, part_number, chunks, max_size=None, expected_sha256=None):
+        path = os.path.join(self._upload_dir(upload_id), f"part-{part_number:05d}")
+        meter = Meter(chunks, max_size)
+        if os.path.exists(f"{path}.sha256"):
+            os.remove(f"{path}.sha256")  # a resent part is incomplete until rewritten
+        await self._write(path, meter, expected_sha256)
+        with open(f"{path}.sha256", "w") as checksum:
+            checksum.write(meter.sha256)
+        return {"part_number": part_number, "size": meter.size, "sha256": meter.sha256}
+
+    async def list_parts(self, upload_id):
+        directory = self._upload_dir(upload_id)
+        parts = []
+        for name in sorted(os.listdir(directory)):
+            match = re.fullmatch(r"part-(\d{5})", name)
+            if match is None:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(f"{path}.sha256") as checksum:
+                    sha256 = checksum.read()
+            except FileNotFoundError:
+                continue  # still being written
+            parts.append({"part_number": int(match.group(1)), "size": os.path.getsize(path), "sha256": sha256})
+        return parts
+
+    async def complete_multipart(self, upload_id, max_size=None):
+        """
+        Concatenate the parts in order into the final key, hashing the whole
+        file on the way
+        """
+        key = await self.upload_key(upload_id)
+        directory = self._upload_dir(upload_id)
+        parts = await self.list_parts(upload_id)
+        if not parts:
+            raise StorageError("No parts were uploaded")
+        total = sum(part["size"] for part in parts)
+        if max_size is not None and total > max_size:
+            raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+
+        async def chunks():
+            for part in parts:
+                with open(os.path.join(directory, f"part-{part['part_number']:05d}"), "rb") as source:
+                    while chunk := await asyncio.to_thread(source.read, UPLOAD_CHUNK_SIZE):
+                        yield chunk
+
+        stored = await self.put(key, chunks())
+        shutil.rmtree(directory, ignore_errors=True)
+        return stored
+
+    async def abort_multipart(self, upload_id):
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+
+async def _spooled_parts(chunks, part_size):
+    """
+    Regroup a chunk stream into temporary files of exactly `part_size`
+    bytes. The last one yielded is shorter (possibly empty) and marks the end.
+    """
+    spool, size = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY), 0
+    async for chunk in chunks:
+        while chunk:
+            piece, chunk = chunk[:part_size - size], chunk[part_size - size:]
+            await asyncio.to_thread(spool.write, piece)
+            size += len(piece)
+            if size == part_size:
+                spool.seek(0)
+                yield spool, size
+                spool, size = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY), 0
+    spool.seek(0)
+    yield spool, size
+
+
+class S3Storage:
+    """
+    S3-compatible object storage through a boto3 client. boto3 is blocking,
+    so every call runs in a worker thread; parts are spooled to a temporary
+    file so only SPOOL_MAX_MEMORY bytes per upload stay in memory.
+    """
+
+    def __init__(self, client, bucket=S3_BUCKET, base_url=None):
+        self.client = client
+        self.bucket = bucket
+        self.base_url = (base_url or f"{S3_ENDPOINT_URL or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/")
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    async def _call(self, method, **kwargs):
+        return await asyncio.to_thread(getattr(self.client, method), Bucket=self.bucket, **kwargs)
+
+    async def put(self, key, chunks, max_size=None, expected_sha256=None):
+        check_key(key)
+        meter = Meter(chunks, max_size)
+        parts = _spooled_parts(meter, S3_PART_SIZE)
+        spool, size = await parts.__anext__()
+        if size < S3_PART_SIZE:
+            # Small object: a single PUT
+            with spool:
+                meter.verify(expected_sha256)
+                await self._call("put_object", Key=key, Body=spool, ContentLength=size)
+            return {"key": key, "url": self.url(key), "size": meter.size, "sha256": meter.sha256}
+
+        upload_id = (await self._call("create_multipart_upload", Key=key))["UploadId"]
+        uploaded = []
+        try:
+            while True:
+                with spool:
+                    if size:
+                        response = await self._call(
+                            "upload_part", Key=key, UploadId=upload_id, PartNumber=len(uploaded) + 1,
+                            Body=spool, ContentLength=size,
+                        )
+                        uploaded.append({"ETag": response["ETag"], "PartNumber": len(uploaded) + 1})
+                if size < S3_PART_SIZE:
+                    break
+                spool, size = await parts.__anext__()
+            meter.verify(expected_sha256)
+            await self._call("complete_multipart_upload", Key=key, UploadId=upload_id,
+                             MultipartUpload={"Parts": uploaded})
+        except BaseException:
+            await self._call("abort_multipart_upload", Key=key, UploadId=upload_id)
+            raise
+        return {"key": key, "url": self.url(key), "size": meter.size, "sha256": meter.sha256}
+
+    async def delete(self, key):
+        await self._call("delete_object", Key=check_key(key))
+
+    # Multipart uploads: the upload handle carries the key and S3's UploadId
+    @staticmethod
+    def _handle(key, upload_id):
+        raw = json.dumps({"k": key, "u": upload_id}).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _unpack(handle):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(handle + "=" * (-len(handle) % 4)))
+            return check_key(data["k"]), data["u"]
+        except (ValueError, KeyError, TypeError, StorageError):
+            raise UploadNotFound(handle)
+
+    async def create_multipart(self, key):
+        response = await self._call("create_multipart_upload", Key=check_key(key))
+        return self._handle(key, response["UploadId"])
+
+    async def upload_key(self, upload_id):
+        return self._unpack(upload_id)[0]
+
+    async def upload_part(self, upload_id, part_number, chunks, max_size=None, expected_sha256=None):
+        key, s3_upload_id = self._unpack(upload_id)
+        meter = Meter(chunks, max_size)
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        with spool:
+            async for chunk in meter:
+                await asyncio.to_thread(spool.write, chunk)
+            meter.verify(expected_sha256)
+            spool.seek(0)
+            await self._call("upload_part", Key=key, UploadId=s3_upload_id, PartNumber=part_number,
+                             Body=spool, ContentLength=meter.size)
+        return {"part_number": part_number, "size": meter.size, "sha256": meter.sha256}
+
+    async def list_parts(self, upload_id):
+        key, s3_upload_id = self._unpack(upload_id)
+        try:
+            response = await self._call("list_parts", Key=key, UploadId=s3_upload_id)
+        except Exception as exc:
+            raise UploadNotFound(upload_id) from exc
+        return [
+            {"part_number": part["PartNumber"], "size": part["Size"], "etag": part["ETag"]}
+            for part in response.get("Parts", [])
+        ]
+
+    async def complete_multipart(self, upload_id, max_size=None):
+        key, s3_upload_id = self._unpack(upload_id)
+        parts = await self.list_parts(upload_id)
+        if not parts:
+            raise StorageError("No parts were uploaded")
+        total = sum(part["size"] for part in parts)
+        if max_size is not None and total > max_size:
+            raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+        await self._call(
+            "complete_multipart_upload", Key=key, UploadId=s3_upload_id,
+            MultipartUpload={"Parts": [{"ETag": part["etag"], "PartNumber": part["part_number"]} for part in parts]},
+        )
+        # The whole-file hash is not known here; parts were verified as they arrived
+        return {"key": key, "url": self.url(key), "size": total, "sha256": None}
+
+    async def abort_multipart(self, upload_id):
+        key, s3_upload_id = self._unpack(upload_id)
+        await self._call("abort_multipart_upload", Key=key, UploadId=s3_upload_id)
+
+
+def create_storage(backend=STORAGE_BACKEND):
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        try:
+            import boto3
+        except ImportError as exc:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package") from exc
+        return S3Storage(boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION))
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+
+# Shared storage instance
+storage = create_storage()
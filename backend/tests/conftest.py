@@ -0,0 +1,63 @@
+"""
+Shared fixtures: a throwaway SQLite database, the app behind an httpx
+client, and users to sign in as
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+DIRECTORY = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRECTORY, 'test.db')}"
+os.environ["STORAGE_ROOT"] = os.path.join(DIRECTORY, "uploads")
+os.environ["JOB_WORKER_ENABLED"] = "0"
+
+import httpx
+import pytest
+
+import auth
+from cache import cache
+from database import Base, engine
+from ids import new_id
+from main import app
+from models import User
+from services import certificates
+from storage import storage
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for each in (cache, auth.token_cache, certificates.verified):
+        asyncio.run(each.clear())
+    shutil.rmtree(storage.root, ignore_errors=True)
+    yield engine
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def make_user():
+    """
+    Insert a user and return (id, Authorization headers for them)
+    """
+    def make(role="student"):
+        user_id = new_id()
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [{
+                "id": user_id, "name": f"{role} {user_id[-6:]}", "email": f"{user_id}@example.com",
+                "hashed_password": "!", "role": role,
+            }])
+        return user_id, {"Authorization": f"Bearer {auth.create_access_token(user_id)}"}
+    return make
@@ -0,0 +1,39 @@
+"""
+MemoryCache tag versions: bounded, and never let a stale reader store
+"""
+
+import pytest
+
+from cache import MemoryCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_tag_versions_are_bounded():
+    cache = MemoryCache(max_tag_versions=10)
+    for n in range(1000):
+        await cache.invalidate_tags(f"user:{n}")
+    assert len(cache._tag_versions) == 10
+
+
+async def test_stale_reader_cannot_store_after_its_tag_is_forgotten():
+    cache = MemoryCache(max_tag_versions=2)
+    versions = await cache.versions(("course:1",))
+    await cache.invalidate_tags("course:1")
+    # Push course:1 out of the remembered versions
+    await cache.invalidate_tags("course:2", "course:3")
+    assert "course:1" not in cache._tag_versions
+    assert not await cache.set("course:id:1", "stale", tags=("course:1",), versions=versions)
+
+    fresh = await cache.versions(("course:1",))
+    assert await cache.set("course:id:1", "fresh", tags=("course:1",), versions=fresh)
+    assert await cache.get("course:id:1") == "fresh"
+
+
+async def test_clear_resets_versions():
+    cache = MemoryCache()
+    await cache.invalidate_tags("course:1")
+    versions = await cache.versions(("course:1",))
+    await cache.clear()
+    assert not cache._tag_versions
+    assert not await cache.set("course:id:1", "stale", tags=("course:1",), versions=versions)
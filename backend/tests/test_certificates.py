@@ -0,0 +1,80 @@
+"""
+Certificate jobs that run twice leave one certificate, and its PDF carries
+the stored verification code
+"""
+
+import asyncio
+import zlib
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from database import engine
+from models import Certificate, Course, Enrollment
+from services import certificates, jobs
+from storage import storage
+
+from benchmarks.seed import seed_courses, seed_enrollments, seed_users
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def payload():
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        user_id = seed_users(conn, 1)[0]
+        seed_enrollments(conn, [user_id], [course_id], 1, review_ratio=0)
+        conn.execute(update(Enrollment).values(status="completed", completion_date=datetime(2026, 3, 1)))
+    return {"user_id": user_id, "course_id": course_id}
+
+
+def stored_certificate(payload):
+    with engine.connect() as conn:
+        rows = conn.execute(select(Certificate.verification_code, Certificate.issue_date).where(
+            Certificate.user_id == payload["user_id"], Certificate.course_id == payload["course_id"]
+        )).all()
+    assert len(rows) == 1
+    return rows[0]
+
+
+def printed_text(payload):
+    with open(storage._path(certificates.certificate_key(payload["user_id"], payload["course_id"])), "rb") as f:
+        pdf = f.read()
+    stream = pdf[pdf.index(b"stream\n") + 7:pdf.index(b"\nendstream")]
+    return zlib.decompress(stream).decode("latin-1")
+
+
+async def test_racing_runs_print_the_stored_code(payload):
+    worker = jobs.JobWorker(processes=0)
+    await asyncio.gather(*(certificates.generate_certificate(worker, payload) for _ in range(2)))
+
+    code, _ = stored_certificate(payload)
+    assert code == certificates.verification_code(payload["user_id"], payload["course_id"])
+    assert certificates.check_verification_code(code) == code
+    assert f"Verification code {code}" in printed_text(payload)
+
+
+async def test_losing_run_renders_the_winning_row(payload, monkeypatch):
+    render_and_store = certificates._render_and_store
+    winner = "A" * certificates.CODE_LENGTH
+
+    async def finished_elsewhere(worker, user_id, course_id, data):
+        # Another worker inserts its certificate while this one renders
+        with engine.begin() as conn:
+            conn.execute(insert(Certificate), [{
+                "user_id": user_id, "course_id": course_id, "issue_date": datetime(2026, 3, 2),
+                "certificate_url": "elsewhere", "verification_code": winner,
+            }])
+        monkeypatch.setattr(certificates, "_render_and_store", render_and_store)
+        return await render_and_store(worker, user_id, course_id, data)
+
+    monkeypatch.setattr(certificates, "_render_and_store", finished_elsewhere)
+    await certificates.generate_certificate(jobs.JobWorker(processes=0), payload)
+
+    assert stored_certificate(payload).verification_code == winner
+    text = printed_text(payload)
+    assert f"Verification code {winner}" in text
+    assert "Issued 02 March 2026" in text
@@ -0,0 +1,64 @@
+"""
+Course pages load in a fixed number of statements, however large the course
+"""
+
+import pytest
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal, assert_max_queries, async_engine, count_queries, engine
+from models import Course, Section
+from schemas import CourseDetail
+from services import curriculum
+
+from benchmarks.seed import seed_courses, seed_curriculum
+
+pytestmark = pytest.mark.anyio
+
+SIZES = [(1, 1), (5, 8), (20, 20)]
+
+
+@pytest.fixture
+def course_ids():
+    seed_courses(engine, len(SIZES))
+    with engine.begin() as conn:
+        ids = conn.execute(select(Course.id).order_by(Course.slug)).scalars().all()
+        conn.execute(update(Course).values(status="published"))
+        for course_id, (sections, lectures) in zip(ids, SIZES):
+            seed_curriculum(conn, course_id, sections, lectures)
+    return ids
+
+
+async def statements_for(client, url):
+    with count_queries(async_engine.sync_engine) as statements:
+        response = await client.get(url)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+async def test_load_course_is_bounded(course_ids):
+    for course_id in course_ids:
+        async with AsyncSessionLocal() as db:
+            with assert_max_queries(async_engine.sync_engine, curriculum.MAX_COURSE_QUERIES):
+                CourseDetail.model_validate(await curriculum.load_course(db, course_id=course_id))
+
+
+async def test_course_detail_statements_do_not_grow(client, course_ids):
+    counts = [await statements_for(client, f"/api/v1/courses/{course_id}") for course_id in course_ids]
+    # One for the validators, the rest for the tree
+    assert counts[-1] <= curriculum.MAX_COURSE_QUERIES + 1
+    assert len(set(counts)) == 1, counts
+
+
+async def test_sections_and_lectures_statements_do_not_grow(client, course_ids):
+    sections = [await statements_for(client, f"/api/v1/courses/{course_id}/sections") for course_id in course_ids]
+    assert len(set(sections)) == 1, sections
+    assert sections[0] <= 3
+
+    with engine.connect() as conn:
+        section_ids = [
+            conn.execute(select(Section.id).where(Section.course_id == course_id)).scalars().first()
+            for course_id in course_ids
+        ]
+    lectures = [await statements_for(client, f"/api/v1/sections/{section_id}/lectures") for section_id in section_ids]
+    assert len(set(lectures)) == 1, lectures
+    assert lectures[0] <= 1
@@ -0,0 +1,63 @@
+"""
+Conditional requests: a 304 only while the rendered course is unchanged
+"""
+
+import pytest
+from sqlalchemy import select, update
+
+from database import engine
+from models import Course
+
+from benchmarks.seed import seed_courses, seed_curriculum
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def course_id():
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        conn.execute(update(Course).values(status="published"))
+        seed_curriculum(conn, course_id, 2, 3)
+    return course_id
+
+
+async def revalidate(client, url):
+    first = await client.get(url)
+    assert first.status_code == 200, first.text
+    return first.headers["etag"]
+
+
+async def test_unchanged_course_is_not_modified(client, course_id):
+    for url in ("/api/v1/courses", f"/api/v1/courses/{course_id}"):
+        etag = await revalidate(client, url)
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+
+async def test_counter_change_is_modified(client, course_id, make_user):
+    _, headers = make_user()
+    response = await client.post("/api/v1/enrollments", json={"course_id": course_id}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    urls = ("/api/v1/courses", f"/api/v1/courses/{course_id}")
+    etags = [await revalidate(client, url) for url in urls]
+    response = await client.post(f"/api/v1/courses/{course_id}/reviews", json={"rating": 4}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    for url, etag in zip(urls, etags):
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200, url
+        assert response.headers["etag"] != etag
+
+
+async def test_enrollment_is_modified(client, course_id, make_user):
+    url = f"/api/v1/courses/{course_id}"
+    etag = await revalidate(client, url)
+    _, headers = make_user()
+    response = await client.post("/api/v1/enrollments", json={"course_id": course_id}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["enrollments_count"] == 1
@@ -0,0 +1,58 @@
+"""
+Simultaneous joins fill a capped live session exactly
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, update
+
+import seats
+from database import engine
+from models import Course, Enrollment, LiveSession
+
+from benchmarks.live_joins import burst, recorded
+from benchmarks.seed import seed_courses, seed_users
+
+pytestmark = pytest.mark.anyio
+
+STUDENTS = 500
+CAPACITY = 50
+
+
+@pytest.fixture
+def session():
+    instructor_id = seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        conn.execute(update(Course).values(status="published"))
+        user_ids = seed_users(conn, STUDENTS)
+        conn.execute(insert(Enrollment), [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "course_id": course_id} for user_id in user_ids
+        ])
+        session_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        conn.execute(insert(LiveSession), [{
+            "id": session_id, "title": "Class start", "course_id": course_id, "instructor_id": instructor_id,
+            "start_time": now, "end_time": now + timedelta(hours=1),
+            "meeting_url": "https://meet.example.com/room", "max_participants": CAPACITY,
+        }])
+    return session_id, user_ids
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+async def test_exactly_capacity_joins_succeed(session, workers):
+    from services import live_sessions
+
+    session_id, user_ids = session
+    counters = [seats.MemorySeats() for _ in range(workers)]
+    admitted, errors = await burst(live_sessions.join, session_id, user_ids, counters)
+    assert errors == []
+    assert len(admitted) == CAPACITY
+    assert await recorded(session_id) == (CAPACITY, CAPACITY)
+
+    # Admitted students can come back without taking another seat
+    again, errors = await burst(live_sessions.join, session_id, admitted, counters)
+    assert errors == [] and sorted(again) == sorted(admitted)
+    assert await recorded(session_id) == (CAPACITY, CAPACITY)
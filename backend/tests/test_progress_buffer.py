@@ -0,0 +1,44 @@
+"""
+The write-behind progress buffer persists exactly what the heartbeats said
+"""
+
+import pytest
+from sqlalchemy import select, update
+
+from database import engine
+from models import Course, Lecture, Section
+
+from benchmarks.heartbeats import heartbeats, run_buffered, snapshot
+from benchmarks.seed import seed_courses, seed_curriculum, seed_enrollments, seed_users
+
+pytestmark = pytest.mark.anyio
+
+HEARTBEATS = 10000
+ENROLLMENTS = 500
+
+
+@pytest.fixture
+def course():
+    seed_courses(engine, 1)
+    with engine.begin() as conn:
+        course_id = conn.execute(select(Course.id)).scalar_one()
+        seed_curriculum(conn, course_id, 5, 10)
+        lecture_ids = conn.execute(
+            select(Lecture.id).join(Section).where(Section.course_id == course_id)
+        ).scalars().all()
+        conn.execute(update(Course).values(lectures_count=len(lecture_ids)))
+        enrollment_ids = seed_enrollments(conn, seed_users(conn, ENROLLMENTS), [course_id], 1, review_ratio=0)
+    return course_id, lecture_ids, enrollment_ids
+
+
+async def test_concurrent_heartbeats_are_persisted_once(course):
+    course_id, lecture_ids, enrollment_ids = course
+    beats = heartbeats(HEARTBEATS, enrollment_ids, lecture_ids)
+    await run_buffered(beats, course_id, flush_interval=0.05)
+
+    items, counters = await snapshot()
+    assert items == set(beats)
+    expected = dict.fromkeys(enrollment_ids, 0)
+    for enrollment_id, _ in set(beats):
+        expected[enrollment_id] += 1
+    assert counters == expected
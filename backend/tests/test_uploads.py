@@ -0,0 +1,80 @@
+"""
+Uploads stream into storage: too large is a 413 that leaves nothing behind,
+anything else is stored byte for byte
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from services import uploads
+from storage import storage
+
+pytestmark = pytest.mark.anyio
+
+MB = 1024 * 1024
+
+
+def stored_files(*parts):
+    root = os.path.join(storage.root, *parts)
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root) for name in names
+    )
+
+
+async def body(size, chunk=256 * 1024):
+    # An async iterable, so the request has no Content-Length to reject early
+    for start in range(0, size, chunk):
+        yield os.urandom(min(chunk, size - start))
+
+
+async def test_oversized_part_is_rejected_without_leftovers(client, make_user, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_PART_SIZE", MB)
+    _, headers = make_user("teacher")
+    upload = (await client.post("/api/v1/media/uploads", json={"type": "video", "filename": "a.mp4"}, headers=headers)).json()
+
+    response = await client.put(f"/api/v1/media/uploads/{upload['upload_id']}/parts/1", content=body(2 * MB),
+                                headers=headers)
+    assert response.status_code == 413
+    assert stored_files(".multipart", upload["upload_id"]) == ["key"]
+    assert (await client.get(f"/api/v1/media/uploads/{upload['upload_id']}", headers=headers)).json()["parts"] == []
+
+
+async def test_oversized_media_upload_leaves_no_object(client, make_user, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_MEDIA_UPLOAD", MB)
+    _, headers = make_user("teacher")
+    response = await client.post("/api/v1/media/upload", data={"type": "image"},
+                                 files={"file": ("big.png", os.urandom(2 * MB))}, headers=headers)
+    assert response.status_code == 413
+    assert stored_files("media") == []
+
+
+async def test_media_upload_stores_the_bytes(client, make_user):
+    _, headers = make_user("teacher")
+    data = os.urandom(3 * MB + 17)
+    response = await client.post("/api/v1/media/upload", data={"type": "image"},
+                                 files={"file": ("photo.png", data)}, headers=headers)
+    assert response.status_code == 200, response.text
+    stored = response.json()
+    assert stored["size"] == len(data)
+    assert stored["sha256"] == hashlib.sha256(data).hexdigest()
+    with open(storage._path(stored["key"]), "rb") as f:
+        assert f.read() == data
+
+
+async def test_resumable_upload_stores_the_parts_in_order(client, make_user):
+    _, headers = make_user("teacher")
+    upload = (await client.post("/api/v1/media/uploads", json={"type": "video", "filename": "b.mp4"}, headers=headers)).json()
+    parts = [os.urandom(MB), os.urandom(MB // 2 + 3)]
+    for number, part in reversed(list(enumerate(parts, start=1))):
+        response = await client.put(f"/api/v1/media/uploads/{upload['upload_id']}/parts/{number}", content=part,
+                                    headers={**headers, "X-Content-SHA256": hashlib.sha256(part).hexdigest()})
+        assert response.status_code == 200, response.text
+
+    response = await client.post(f"/api/v1/media/uploads/{upload['upload_id']}/complete", headers=headers)
+    assert response.status_code == 200, response.text
+    with open(storage._path(upload["key"]), "rb") as f:
+        assert f.read() == b"".join(parts)
+    assert stored_files(".multipart") == []
@@ -0,0 +1,24 @@
+"""
+Profile updates
+"""
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_admin_can_make_a_teacher(client, make_user):
+    _, admin = make_user("admin")
+    user_id, headers = make_user()
+    response = await client.patch(f"/api/v1/users/{user_id}", json={"role": "teacher"}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert response.json()["role"] == "teacher"
+
+    # A teacher may create courses
+    response = await client.post("/api/v1/courses", json={
+        "title": "Taught", "description": "By a teacher", "category": "Programming", "level": "Beginner", "price": 0,
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.patch(f"/api/v1/users/{user_id}", json={"role": "instructor"}, headers=admin)
+    assert response.status_code == 422